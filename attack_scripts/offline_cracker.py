@@ -0,0 +1,236 @@
+import os
+import csv
+import json
+import time
+import hashlib
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from candidates import generate_candidates, DEFAULT_RULES
+
+
+DEFAULT_PEPPER = os.getenv("PEPPER", "default-pepper")
+DEFAULT_WORKERS = os.cpu_count() or 1
+SHA256_BATCH = 20000   # candidates per worker task, checked against every SHA256 user
+SLOW_BATCH = {"bcrypt": 16, "argon2id": 16}   # candidates per (user, task)
+
+
+# ---- input ----
+
+# users exported as CSV (psql \copy ... csv header / sqlite3 -csv), JSON array or JSON lines
+def load_users(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith('.csv'):
+            rows = list(csv.DictReader(f))
+        else:
+            text = f.read().strip()
+            rows = json.loads(text) if text.startswith('[') else [json.loads(l) for l in text.splitlines() if l]
+    return [
+        {"username": r["username"], "password_hash": r["password_hash"], "hash_mode": r["hash_mode"]}
+        for r in rows
+        if r.get("password_hash") and r.get("hash_mode")
+    ]
+
+
+def group_by_mode(users):
+    groups = {}
+    for user in users:
+        groups.setdefault(user["hash_mode"], []).append(user)
+    return groups
+
+
+def candidate_batches(rules, size, limit):
+    candidates = generate_candidates(rules)
+    if limit:
+        candidates = itertools.islice(candidates, limit)
+    while batch := list(itertools.islice(candidates, size)):
+        yield batch
+
+
+# ---- workers (run in the process pool) ----
+
+def sha256_worker(batch, targets, pepper):
+    # targets: [(username, salt+pepper bytes, digest bytes)]; raw digests compared, no hex encoding
+    found = []
+    guesses = 0
+    sha256 = hashlib.sha256
+    encoded = [c.encode() for c in batch]
+    for username, tail, digest in targets:
+        for candidate, raw in zip(batch, encoded):
+            guesses += 1
+            if sha256(raw + tail).digest() == digest:
+                found.append((username, candidate))
+                break
+    return found, guesses
+
+
+_argon2_hasher = None
+
+
+def slow_worker(hash_mode, stored_hash, batch, pepper):
+    global _argon2_hasher
+    guesses = 0
+    if hash_mode == "bcrypt":
+        import bcrypt
+        stored = stored_hash.encode()
+        for candidate in batch:
+            guesses += 1
+            if bcrypt.checkpw(f"{candidate}{pepper}".encode(), stored):
+                return candidate, guesses
+    else:
+        from argon2 import PasswordHasher
+        from argon2.exceptions import VerificationError, InvalidHashError
+        _argon2_hasher = _argon2_hasher or PasswordHasher()
+        for candidate in batch:
+            guesses += 1
+            try:
+                if _argon2_hasher.verify(stored_hash, f"{candidate}{pepper}"):
+                    return candidate, guesses
+            except (VerificationError, InvalidHashError):
+                pass
+    return None, guesses
+
+
+# ---- per algorithm drivers ----
+
+def crack_plain(users, args):
+    # several users may share a password - one lookup cracks all of them
+    by_password = {}
+    for u in users:
+        by_password.setdefault(u["password_hash"], []).append(u["username"])
+    cracked, guesses = {}, 0
+    start = time.perf_counter()
+    for batch in candidate_batches(args.rules, SHA256_BATCH, args.limit):
+        for candidate in batch:
+            guesses += 1
+            usernames = by_password.pop(candidate, None)
+            if usernames:
+                cracked.update(dict.fromkeys(usernames, candidate))
+                if not by_password:
+                    break
+        if not by_password or time.perf_counter() - start >= args.max_seconds:
+            break
+    return cracked, guesses, time.perf_counter() - start
+
+
+def crack_sha256(users, pool, args):
+    pepper = args.pepper.encode()
+    targets = []
+    for u in users:
+        digest, _, salt = u["password_hash"].partition(":")
+        try:
+            targets.append((u["username"], salt.encode() + pepper, bytes.fromhex(digest)))
+        except ValueError:
+            print(f"  skipping malformed sha256 hash for {u['username']}")
+
+    cracked, guesses = {}, 0
+    start = time.perf_counter()
+    pending = set()
+    batches = candidate_batches(args.rules, SHA256_BATCH, args.limit)
+
+    while True:
+        remaining = [t for t in targets if t[0] not in cracked]
+        out_of_time = time.perf_counter() - start >= args.max_seconds
+        while remaining and not out_of_time and len(pending) < args.workers * 2:
+            batch = next(batches, None)
+            if batch is None:
+                break
+            pending.add(pool.submit(sha256_worker, batch, remaining, args.pepper))
+        if not pending:
+            break
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            found, count = future.result()
+            guesses += count
+            cracked.update(found)
+    return cracked, guesses, time.perf_counter() - start
+
+
+def crack_slow(hash_mode, users, pool, args):
+    size = SLOW_BATCH[hash_mode]
+    cracked, guesses = {}, 0
+    start = time.perf_counter()
+    pending = {}
+    # one lazy candidate stream per user, so a cracked user simply stops being scheduled
+    streams = {u["username"]: candidate_batches(args.rules, size, args.limit) for u in users}
+    hashes = {u["username"]: u["password_hash"] for u in users}
+    turn = itertools.cycle([u["username"] for u in users])
+
+    while True:
+        out_of_time = time.perf_counter() - start >= args.max_seconds
+        while streams and not out_of_time and len(pending) < args.workers * 2:
+            username = next(turn)
+            if username not in streams:
+                continue
+            batch = next(streams[username], None)
+            if batch is None:
+                del streams[username]
+                continue
+            pending[pool.submit(slow_worker, hash_mode, hashes[username], batch, args.pepper)] = username
+        if not pending:
+            break
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            username = pending.pop(future)
+            password, count = future.result()
+            guesses += count
+            if password is not None:
+                cracked[username] = password
+                streams.pop(username, None)
+    return cracked, guesses, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline dictionary attack against an exported users table")
+    parser.add_argument("users_file", help="CSV/JSON/JSONL export with username, password_hash, hash_mode")
+    parser.add_argument("--pepper", default=DEFAULT_PEPPER, help="server pepper (assumed leaked with the dump)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--rules", nargs="+", default=list(DEFAULT_RULES), choices=["suffix", "case", "leet"])
+    parser.add_argument("--limit", type=int, default=0, help="max candidates per user (0 = all)")
+    parser.add_argument("--max-seconds", type=float, default=300, help="time budget per algorithm")
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    groups = group_by_mode(load_users(args.users_file))
+    print("=" * 70)
+    print(f"Users: {sum(len(g) for g in groups.values())} | workers: {args.workers} | "
+          f"budget: {args.max_seconds:.0f}s per algorithm")
+    print("=" * 70)
+
+    report = {"workers": args.workers, "rules": args.rules, "algorithms": {}}
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for hash_mode, users in sorted(groups.items()):
+            if hash_mode == "plain":
+                cracked, guesses, elapsed = crack_plain(users, args)
+            elif hash_mode == "sha256":
+                cracked, guesses, elapsed = crack_sha256(users, pool, args)
+            elif hash_mode in SLOW_BATCH:
+                cracked, guesses, elapsed = crack_slow(hash_mode, users, pool, args)
+            else:
+                print(f"  {hash_mode:9} unsupported hash mode, skipped")
+                continue
+
+            rate = guesses / elapsed if elapsed else 0.0
+            cores = 1 if hash_mode == "plain" else args.workers
+            report["algorithms"][hash_mode] = {
+                "users": len(users),
+                "cracked": len(cracked),
+                "guesses": guesses,
+                "elapsed_s": round(elapsed, 2),
+                "guesses_per_sec": round(rate, 1),
+                "guesses_per_sec_per_core": round(rate / cores, 1),
+                "passwords": cracked,
+            }
+            print(f"  {hash_mode:9} cracked {len(cracked):4}/{len(users):<4} | {guesses:10} guesses "
+                  f"in {elapsed:7.1f}s | {rate:12.1f} guesses/sec ({rate / cores:10.1f}/core)")
+
+    print("=" * 70)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
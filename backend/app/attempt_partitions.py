@@ -0,0 +1,171 @@
+"""
+Attempt Log Partitions - attempt_logs split into one table per day or per experiment
+Tables are created on first write; a background thread drops partitions past retention
+"""
+import re
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import MetaData, Table, insert, inspect, func, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.config import (
+    ATTEMPT_LOG_PARTITION_BY, ATTEMPT_LOG_RETENTION_DAYS, ATTEMPT_LOG_RETENTION_INTERVAL_SECONDS
+)
+from app.database import AttemptLog, engine
+from app.logger import get_logger
+
+log = get_logger("attempt_partitions")
+
+PARTITION_PREFIX = "attempt_logs_"
+DAY_FORMAT = "%Y%m%d"
+
+
+class AttemptPartitions:
+    def __init__(self, partition_by: str, retention_days: int, retention_interval: float):
+        if partition_by not in ("day", "experiment", "none"):
+            raise ValueError(f"Unknown attempt log partitioning: {partition_by}")
+        self.partition_by = partition_by
+        self.retention_days = retention_days
+        self.retention_interval = retention_interval
+        self.dropped = 0
+        self._metadata = MetaData()
+        self._tables = {}
+        self._created = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # Partition key for a record - None writes to the plain attempt_logs table
+    def key_for(self, record: dict) -> str:
+        match self.partition_by:
+            case "day":
+                return record["timestamp"].strftime(DAY_FORMAT)
+            case "experiment":
+                return re.sub(r"[^a-z0-9_]", "_", record["group_seed"].lower())[:40]
+            case _:
+                return None
+
+    # Table object for a partition, same columns as AttemptLog - /api/stats reads the rollups, so
+    # no extra index slows the inserts
+    def table(self, key: str) -> Table:
+        if key is None:
+            return AttemptLog.__table__
+        table = self._tables.get(key)
+        if table is None:
+            with self._lock:
+                table = self._tables.get(key)
+                if table is None:
+                    name = PARTITION_PREFIX + key
+                    table = Table(name, self._metadata, *(c._copy() for c in AttemptLog.__table__.columns))
+                    self._tables[key] = table
+        return table
+
+    # CREATE on its own committed connection - Postgres DDL is transactional, so creating it inside
+    # the sink's transaction would be undone by a rollback while the name stayed in _created
+    def _ensure_created(self, table: Table):
+        if table.name in self._created:
+            return
+        try:
+            with engine.begin() as conn:
+                table.create(conn, checkfirst=True)
+        except DBAPIError:
+            # Another worker created it between the check and the CREATE
+            if not inspect(engine).has_table(table.name):
+                raise
+        with self._lock:
+            self._created.add(table.name)
+
+    # Insert a batch of records, one bulk INSERT per partition
+    def write(self, db: Session, batch: list):
+        by_key = {}
+        for record in batch:
+            by_key.setdefault(self.key_for(record), []).append(record)
+        # Create every partition before the first INSERT - on SQLite the session then holds the
+        # write lock and a CREATE on another connection would wait for it
+        tables = {key: self.table(key) for key in by_key}
+        for table in tables.values():
+            self._ensure_created(table)
+        for key, rows in by_key.items():
+            db.execute(insert(tables[key]), rows)
+
+    # Existing partition table names, oldest first for day partitions
+    def list_partitions(self) -> list:
+        return sorted(
+            name for name in inspect(engine).get_table_names()
+            if name.startswith(PARTITION_PREFIX)
+        )
+
+    # Day partitions go by their name; experiment partitions by their newest row
+    def _is_expired(self, conn, name: str, cutoff: datetime) -> bool:
+        suffix = name[len(PARTITION_PREFIX):]
+        if self.partition_by == "day":
+            try:
+                return datetime.strptime(suffix, DAY_FORMAT) < cutoff.replace(hour=0, minute=0, second=0,
+                                                                              microsecond=0)
+            except ValueError:
+                return False
+        table = Table(name, MetaData(), autoload_with=conn)
+        newest = conn.execute(select(func.max(table.c.timestamp))).scalar()
+        return newest is not None and newest < cutoff
+
+    # Drop whole partitions older than the retention window, returns dropped table names
+    def drop_expired(self, now: datetime = None) -> list:
+        if self.partition_by == "none" or self.retention_days <= 0:
+            return []
+        cutoff = (now or datetime.utcnow()) - timedelta(days=self.retention_days)
+        dropped = []
+        with engine.begin() as conn:
+            for name in self.list_partitions():
+                if self._is_expired(conn, name, cutoff):
+                    Table(name, MetaData()).drop(conn)
+                    dropped.append(name)
+        with self._lock:
+            for name in dropped:
+                self._created.discard(name)
+                self._tables.pop(name[len(PARTITION_PREFIX):], None)
+        self.dropped += len(dropped)
+        if dropped:
+            log.info("Dropped %s expired partitions: %s", len(dropped), ", ".join(dropped))
+        return dropped
+
+    # Background retention thread
+    def start(self):
+        if self.partition_by == "none" or self.retention_days <= 0:
+            return
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="attempt-log-retention", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while True:
+            try:
+                self.drop_expired()
+            except Exception as e:
+                log.error("Retention run failed: %s", e)
+            if self._stop.wait(self.retention_interval):
+                return
+
+    def stats(self) -> dict:
+        return {
+            "partition_by": self.partition_by,
+            "retention_days": self.retention_days,
+            "partitions": len(self.list_partitions()),
+            "dropped": self.dropped,
+        }
+
+
+attempt_partitions = AttemptPartitions(
+    partition_by=ATTEMPT_LOG_PARTITION_BY,
+    retention_days=ATTEMPT_LOG_RETENTION_DAYS,
+    retention_interval=ATTEMPT_LOG_RETENTION_INTERVAL_SECONDS
+)
@@ -0,0 +1,275 @@
+"""
+Attempt Statistics - Aggregated login attempt counts
+Per-minute rollups merged in by the log sink, GROUP BY over rollups, optional in-process counters
+"""
+import bisect
+import json
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config import AttackResult, STATS_CACHE_REFRESH_SECONDS
+from app.database import AttemptLog, AttemptRollup, engine
+
+
+# Upper bounds of the latency histogram buckets (ms); the last bucket is open-ended
+LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+def latency_bucket(latency_ms: float) -> int:
+    return bisect.bisect_left(LATENCY_BUCKETS_MS, latency_ms)
+
+
+def empty_histogram() -> list:
+    return [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+
+# Estimate a percentile from bucket counts, interpolating inside the bucket
+def histogram_percentile(histogram: list, q: float, max_ms: float) -> float:
+    total = sum(histogram)
+    if not total:
+        return None
+    rank = q * total
+    seen = 0
+    for i, count in enumerate(histogram):
+        if count and seen + count >= rank:
+            lower = LATENCY_BUCKETS_MS[i - 1] if i > 0 else 0.0
+            upper = LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else max_ms
+            upper = min(upper, max_ms)
+            lower = min(lower, upper)
+            return round(lower + (upper - lower) * (rank - seen) / count, 3)
+        seen += count
+    return max_ms
+
+
+def _minute(timestamp: datetime) -> datetime:
+    return timestamp.replace(second=0, microsecond=0)
+
+
+# Aggregate a batch of attempt records by (minute, group_seed, hash_mode, protection_flags, result)
+def aggregate_minutes(batch: list) -> dict:
+    groups = {}
+    for record in batch:
+        key = (
+            _minute(record["timestamp"]), record["group_seed"], record["hash_mode"],
+            record["protection_flags"], record["result"]
+        )
+        agg = groups.get(key)
+        if agg is None:
+            agg = groups[key] = {"count": 0, "latency_sum_ms": 0.0, "latency_max_ms": 0.0,
+                                 "histogram": empty_histogram()}
+        latency = record["latency_ms"]
+        agg["count"] += 1
+        agg["latency_sum_ms"] += latency
+        agg["latency_max_ms"] = max(agg["latency_max_ms"], latency)
+        agg["histogram"][latency_bucket(latency)] += 1
+    return groups
+
+
+# Merge a batch into attempt_rollups inside the caller's transaction
+def merge_rollups(db: Session, batch: list):
+    groups = aggregate_minutes(batch)
+    if not groups:
+        return
+
+    minutes = {key[0] for key in groups}
+    existing = {
+        (row.minute, row.group_seed, row.hash_mode, row.protection_flags, row.result): row
+        for row in (
+            db.query(AttemptRollup)
+            .filter(AttemptRollup.minute.in_(minutes))
+            .with_for_update()
+        )
+    }
+
+    for key, agg in groups.items():
+        row = existing.get(key)
+        if row is None:
+            minute, group_seed, hash_mode, protection_flags, result = key
+            row = AttemptRollup(
+                minute=minute, group_seed=group_seed, hash_mode=hash_mode,
+                protection_flags=protection_flags, result=result,
+                count=0, latency_sum_ms=0.0, latency_max_ms=0.0,
+                latency_histogram=json.dumps(empty_histogram())
+            )
+            db.add(row)
+
+        histogram = [a + b for a, b in zip(json.loads(row.latency_histogram), agg["histogram"])]
+        row.count += agg["count"]
+        row.latency_sum_ms += agg["latency_sum_ms"]
+        row.latency_max_ms = max(row.latency_max_ms, agg["latency_max_ms"])
+        row.latency_histogram = json.dumps(histogram)
+        row.p50_ms = histogram_percentile(histogram, 0.50, row.latency_max_ms)
+        row.p95_ms = histogram_percentile(histogram, 0.95, row.latency_max_ms)
+        row.p99_ms = histogram_percentile(histogram, 0.99, row.latency_max_ms)
+
+
+# One-off migration: build rollups from attempt_logs rows written before rollups existed.
+# Skipped once any rollup exists, so it never counts a row twice. Returns the rows merged.
+def backfill_rollups(db: Session, chunk_size: int = 10000) -> int:
+    if db.query(AttemptRollup.id).first() is not None:
+        return 0
+
+    rows = (
+        db.query(AttemptLog.timestamp, AttemptLog.group_seed, AttemptLog.hash_mode,
+                 AttemptLog.protection_flags, AttemptLog.result, AttemptLog.latency_ms)
+        .order_by(AttemptLog.timestamp)
+        .execution_options(yield_per=chunk_size)
+    )
+    merged = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row._asdict())
+        if len(chunk) >= chunk_size:
+            merge_rollups(db, chunk)
+            db.flush()
+            merged += len(chunk)
+            chunk = []
+    merge_rollups(db, chunk)
+    merged += len(chunk)
+    db.commit()
+    return merged
+
+
+# Hour bucket expression for the active database
+def _time_bucket_column():
+    if engine.dialect.name == "sqlite":
+        return func.strftime("%Y-%m-%dT%H:00:00", AttemptRollup.minute)
+    return func.date_trunc("hour", AttemptRollup.minute)
+
+
+def _time_bucket(value) -> str:
+    if isinstance(value, datetime):
+        return value.replace(minute=0, second=0, microsecond=0).isoformat()
+    return str(value)
+
+
+# Count attempts by (result, hash_mode, protection_flags, hour) from the minute rollups
+def query_attempt_counts(db: Session) -> dict:
+    bucket = _time_bucket_column().label("bucket")
+    rows = (
+        db.query(
+            AttemptRollup.result,
+            AttemptRollup.hash_mode,
+            AttemptRollup.protection_flags,
+            bucket,
+            func.sum(AttemptRollup.count).label("count"),
+        )
+        .group_by(AttemptRollup.result, AttemptRollup.hash_mode, AttemptRollup.protection_flags, bucket)
+        .all()
+    )
+    return {
+        (row.result, row.hash_mode, row.protection_flags, _time_bucket(row.bucket)): int(row.count)
+        for row in rows
+    }
+
+
+# Per-minute counts by result and latency percentiles for the last N minutes
+def query_minute_rollups(db: Session, minutes: int) -> list:
+    since = _minute(datetime.utcnow()) - timedelta(minutes=minutes)
+    rows = (
+        db.query(AttemptRollup)
+        .filter(AttemptRollup.minute >= since)
+        .order_by(AttemptRollup.minute)
+        .all()
+    )
+
+    by_minute = {}
+    for row in rows:
+        entry = by_minute.get(row.minute)
+        if entry is None:
+            entry = by_minute[row.minute] = {"count": 0, "by_result": defaultdict(int),
+                                             "latency_max_ms": 0.0, "histogram": empty_histogram()}
+        entry["count"] += row.count
+        entry["by_result"][row.result] += row.count
+        entry["latency_max_ms"] = max(entry["latency_max_ms"], row.latency_max_ms)
+        entry["histogram"] = [a + b for a, b in zip(entry["histogram"], json.loads(row.latency_histogram))]
+
+    return [
+        {
+            "minute": minute.isoformat(),
+            "count": entry["count"],
+            "by_result": dict(entry["by_result"]),
+            "p50_ms": histogram_percentile(entry["histogram"], 0.50, entry["latency_max_ms"]),
+            "p95_ms": histogram_percentile(entry["histogram"], 0.95, entry["latency_max_ms"]),
+            "p99_ms": histogram_percentile(entry["histogram"], 0.99, entry["latency_max_ms"]),
+            "max_ms": entry["latency_max_ms"],
+        }
+        for minute, entry in by_minute.items()
+    ]
+
+
+# Build the /api/stats response from grouped counts
+def build_stats(counts: dict) -> dict:
+    by_result = defaultdict(int)
+    by_hash_mode = defaultdict(lambda: defaultdict(int))
+    by_protection = defaultdict(lambda: defaultdict(int))
+    by_time = defaultdict(lambda: defaultdict(int))
+
+    for (result, hash_mode, protection_flags, bucket), count in counts.items():
+        by_result[result] += count
+        by_hash_mode[hash_mode][result] += count
+        by_protection[protection_flags][result] += count
+        by_time[bucket][result] += count
+
+    total = sum(by_result.values())
+    successful = by_result[AttackResult.SUCCESS.value]
+
+    return {
+        "total_attempts": total,
+        "successful": successful,
+        "failed": by_result[AttackResult.FAILED.value],
+        "locked": by_result[AttackResult.LOCKED.value],
+        "captcha_required": by_result[AttackResult.CAPTCHA_REQUIRED.value],
+        "totp_required": by_result[AttackResult.TOTP_REQUIRED.value],
+        "success_rate": round((successful / total * 100), 2) if total > 0 else 0,
+        "by_hash_mode": {k: dict(v) for k, v in by_hash_mode.items()},
+        "by_protection": {k: dict(v) for k, v in by_protection.items()},
+        "by_hour": {k: dict(v) for k, v in sorted(by_time.items())},
+    }
+
+
+# Counts only what the log sink has committed, so dropped or failed records never show up.
+# Each worker only sees its own batches - refresh() re-reads the rollups to include the others.
+class AttemptCounters:
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        self._counts = defaultdict(int)
+        self._seeded = False
+        self._seeded_at = 0.0
+        self._lock = threading.Lock()
+
+    # Load current totals from the rollups (app startup, then every refresh interval)
+    def seed(self, db: Session):
+        counts = query_attempt_counts(db)
+        with self._lock:
+            self._counts = defaultdict(int, counts)
+            self._seeded = True
+            self._seeded_at = time.monotonic()
+
+    def refresh_due(self) -> bool:
+        return self._seeded and time.monotonic() - self._seeded_at >= self.refresh_interval
+
+    # Count a committed batch of attempt records - ignored until seeded so nothing is counted twice
+    def record_batch(self, batch: list):
+        if not self._seeded:
+            return
+        with self._lock:
+            for record in batch:
+                key = (record["result"], record["hash_mode"], record["protection_flags"],
+                       _time_bucket(record["timestamp"]))
+                self._counts[key] += 1
+
+    def is_seeded(self) -> bool:
+        return self._seeded
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._counts)
+
+
+attempt_counters = AttemptCounters(refresh_interval=STATS_CACHE_REFRESH_SECONDS)
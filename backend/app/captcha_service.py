@@ -0,0 +1,87 @@
+"""
+CAPTCHA Service - Pre-rendered CAPTCHA image pool
+One shared renderer, background refill below a low-water mark
+"""
+import base64
+import random
+import string
+import threading
+from collections import deque
+
+from captcha.image import ImageCaptcha
+
+from app.config import CAPTCHA_POOL_SIZE, CAPTCHA_POOL_LOW_WATER
+from app.logger import get_logger
+
+log = get_logger("captcha")
+
+
+CAPTCHA_CODE_LENGTH = 5
+
+
+class CaptchaPool:
+    def __init__(self, size: int, low_water: int):
+        self.size = size
+        self.low_water = low_water
+        self._renderer = ImageCaptcha(width=280, height=90)
+        self._render_lock = threading.Lock()
+        self._pool = deque()
+        self._refill_needed = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.served = 0
+        self.rendered_on_request = 0
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._refill_needed.set()
+        self._thread = threading.Thread(target=self._run, name="captcha-pool", daemon=True)
+        self._thread.start()
+        log.info("Pool started: size=%s, low_water=%s", self.size, self.low_water)
+
+    def stop(self):
+        self._stop.set()
+        self._refill_needed.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    # Render a new random code as base64 PNG
+    def render(self, code: str = None) -> tuple:
+        code = code or ''.join(random.choices(string.ascii_uppercase + string.digits, k=CAPTCHA_CODE_LENGTH))
+        with self._render_lock:
+            data = self._renderer.generate(code)
+        return code, base64.b64encode(data.getvalue()).decode('utf-8')
+
+    # Hand out a pre-rendered pair - renders inline only if the pool ran dry
+    def take(self) -> tuple:
+        try:
+            pair = self._pool.popleft()
+        except IndexError:
+            self.rendered_on_request += 1
+            log.warning("Pool empty, rendering on request")
+            pair = self.render()
+        self.served += 1
+        if len(self._pool) < self.low_water:
+            self._refill_needed.set()
+        return pair
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._refill_needed.wait()
+            self._refill_needed.clear()
+            while len(self._pool) < self.size and not self._stop.is_set():
+                self._pool.append(self.render())
+
+    def stats(self) -> dict:
+        return {
+            "available": len(self._pool),
+            "size": self.size,
+            "served": self.served,
+            "rendered_on_request": self.rendered_on_request,
+        }
+
+
+captcha_pool = CaptchaPool(size=CAPTCHA_POOL_SIZE, low_water=CAPTCHA_POOL_LOW_WATER)
@@ -0,0 +1,239 @@
+"""
+CAPTCHA Store - Active CAPTCHA codes per username
+Bounded size, expiry sweeping, issued/expired/solved counters, memory or shared SQLite backend
+"""
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from app.config import (
+    CAPTCHA_STORE_BACKEND, CAPTCHA_STORE_MAX_SIZE, CAPTCHA_TTL_MINUTES,
+    CAPTCHA_SWEEP_INTERVAL_SECONDS, SHARED_STATE_SQLITE_PATH
+)
+from app.shared_state import SQLiteConnections
+from app.logger import get_logger
+
+log = get_logger("captcha")
+
+
+# Entries are kept in insertion order; with a fixed TTL that is also expiry order,
+# so both eviction and sweeping only ever look at the oldest end
+class MemoryCaptchaBackend:
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._counters = Counter()
+        self._lock = threading.Lock()
+
+    # Store entry, returns how many old entries were evicted to make room
+    def put(self, username: str, entry: dict) -> int:
+        with self._lock:
+            self._entries.pop(username, None)
+            self._entries[username] = entry
+            evicted = 0
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def get(self, username: str) -> dict:
+        return self._entries.get(username)
+
+    def pop(self, username: str) -> dict:
+        with self._lock:
+            return self._entries.pop(username, None)
+
+    # Remove the entry only if it holds this code and has not expired - True for exactly one caller
+    def pop_matching(self, username: str, code: str, now: float) -> bool:
+        with self._lock:
+            entry = self._entries.get(username)
+            if not entry or entry["code"] != code or entry["expires"] <= now:
+                return False
+            del self._entries[username]
+            return True
+
+    def sweep(self, now: float) -> int:
+        removed = 0
+        with self._lock:
+            while self._entries:
+                username, entry = next(iter(self._entries.items()))
+                if entry["expires"] > now:
+                    break
+                del self._entries[username]
+                removed += 1
+        return removed
+
+    def incr(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def counters(self) -> dict:
+        return dict(self._counters)
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+# Shared across uvicorn workers on the same host
+class SQLiteCaptchaBackend:
+    def __init__(self, path: str, max_size: int):
+        self.max_size = max_size
+        self.connections = SQLiteConnections(path)
+        conn = self.connections.get()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS captcha_codes ("
+            "username TEXT PRIMARY KEY, code TEXT, image TEXT, expires REAL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_captcha_codes_expires ON captcha_codes (expires)")
+        conn.execute("CREATE TABLE IF NOT EXISTS captcha_counters (name TEXT PRIMARY KEY, value INTEGER)")
+
+    def put(self, username: str, entry: dict) -> int:
+        def apply(conn):
+            conn.execute(
+                "INSERT OR REPLACE INTO captcha_codes (username, code, image, expires) VALUES (?, ?, ?, ?)",
+                (username, entry["code"], entry["image"], entry["expires"])
+            )
+            overflow = conn.execute("SELECT COUNT(*) FROM captcha_codes").fetchone()[0] - self.max_size
+            if overflow <= 0:
+                return 0
+            conn.execute(
+                "DELETE FROM captcha_codes WHERE username IN "
+                "(SELECT username FROM captcha_codes ORDER BY expires LIMIT ?)",
+                (overflow,)
+            )
+            return overflow
+        return self.connections.transaction(apply)
+
+    def get(self, username: str) -> dict:
+        row = self.connections.get().execute(
+            "SELECT code, image, expires FROM captcha_codes WHERE username = ?", (username,)
+        ).fetchone()
+        if not row:
+            return None
+        return {"code": row[0], "image": row[1], "expires": row[2]}
+
+    def pop(self, username: str) -> dict:
+        def apply(conn):
+            entry = self.get(username)
+            conn.execute("DELETE FROM captcha_codes WHERE username = ?", (username,))
+            return entry
+        return self.connections.transaction(apply)
+
+    # One DELETE decides the winner, so two workers can never both consume the same code
+    def pop_matching(self, username: str, code: str, now: float) -> bool:
+        cursor = self.connections.get().execute(
+            "DELETE FROM captcha_codes WHERE username = ? AND code = ? AND expires > ?",
+            (username, code, now)
+        )
+        return cursor.rowcount == 1
+
+    def sweep(self, now: float) -> int:
+        cursor = self.connections.get().execute("DELETE FROM captcha_codes WHERE expires <= ?", (now,))
+        return cursor.rowcount
+
+    def incr(self, name: str, amount: int = 1):
+        self.connections.get().execute(
+            "INSERT INTO captcha_counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, amount)
+        )
+
+    def counters(self) -> dict:
+        return dict(self.connections.get().execute("SELECT name, value FROM captcha_counters").fetchall())
+
+    def size(self) -> int:
+        return self.connections.get().execute("SELECT COUNT(*) FROM captcha_codes").fetchone()[0]
+
+
+class CaptchaStore:
+    def __init__(self, backend, ttl_seconds: float, sweep_interval: float):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def issue(self, username: str, code: str, image: str):
+        evicted = self.backend.put(username, {
+            "code": code,
+            "image": image,
+            "expires": time.time() + self.ttl_seconds
+        })
+        self.backend.incr("issued")
+        if evicted:
+            self.backend.incr("evicted", evicted)
+
+    # Active entry for username, None if missing or expired
+    def get(self, username: str) -> dict:
+        entry = self.backend.get(username)
+        if entry and entry["expires"] <= time.time():
+            if self.backend.pop(username):
+                self.backend.incr("expired")
+            return None
+        return entry
+
+    # Check code - a correct code is consumed atomically, so it solves only once
+    def solve(self, username: str, code: str) -> bool:
+        if code and self.backend.pop_matching(username, code.upper(), time.time()):
+            self.backend.incr("solved")
+            return True
+        self.get(username)  # drops and counts an expired entry
+        return False
+
+    def discard(self, username: str):
+        self.backend.pop(username)
+
+    def sweep(self) -> int:
+        removed = self.backend.sweep(time.time())
+        if removed:
+            self.backend.incr("expired", removed)
+        return removed
+
+    # Background sweeper thread
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="captcha-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.sweep_interval):
+            removed = self.sweep()
+            if removed:
+                log.debug("Swept %s expired codes", removed)
+
+    def stats(self) -> dict:
+        counters = self.backend.counters()
+        return {
+            "active": self.backend.size(),
+            "issued": counters.get("issued", 0),
+            "expired": counters.get("expired", 0),
+            "solved": counters.get("solved", 0),
+            "evicted": counters.get("evicted", 0),
+        }
+
+
+def create_captcha_store() -> CaptchaStore:
+    match CAPTCHA_STORE_BACKEND:
+        case "memory":
+            backend = MemoryCaptchaBackend(CAPTCHA_STORE_MAX_SIZE)
+        case "sqlite":
+            backend = SQLiteCaptchaBackend(SHARED_STATE_SQLITE_PATH, CAPTCHA_STORE_MAX_SIZE)
+        case _:
+            raise ValueError(f"Unknown CAPTCHA store backend: {CAPTCHA_STORE_BACKEND}")
+
+    return CaptchaStore(
+        backend,
+        ttl_seconds=CAPTCHA_TTL_MINUTES * 60,
+        sweep_interval=CAPTCHA_SWEEP_INTERVAL_SECONDS
+    )
+
+
+captcha_store = create_captcha_store()
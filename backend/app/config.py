@@ -48,16 +48,86 @@ class AttackResult(str, Enum):
 PROTECTION_MODE = ProtectionMode.CAPTCHA
 HASH_MODE = HashMode.PLAIN
 
+# Logging - request-level tracing is DEBUG; production runs use INFO or higher
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")  # per-module overrides, e.g. "app.protection=DEBUG"
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # text / json
+
+# Database engine / connection pool
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_POOL_WARMUP = int(os.getenv("DB_POOL_WARMUP", DB_POOL_SIZE))  # connections opened at startup
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "5000"))
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "1000"))  # compiled SQL cache entries
+
 # PROTECTION SETTINGS
 MAX_FAILED_ATTEMPTS = 5
 MAX_CAPTCHA_FAILED_ATTEMPTS = 9
 LOCKOUT_DURATION_MINUTES = 3
 MAX_LOGIN_REQUESTS_PER_MINUTE = 10
 
-# Hash parameters
-BCRYPT_COST = 12
-ARGON2_TIME_COST = 1
-ARGON2_MEMORY_COST = 64 * 1024
-ARGON2_PARALLELISM = 1
+# Shared state - SQLite file used when several uvicorn workers must share state
+SHARED_STATE_SQLITE_PATH = os.getenv("SHARED_STATE_SQLITE_PATH", "shared_state.db")
+
+# CAPTCHA image pool - pre-rendered (code, image) pairs
+CAPTCHA_POOL_SIZE = int(os.getenv("CAPTCHA_POOL_SIZE", "200"))
+CAPTCHA_POOL_LOW_WATER = int(os.getenv("CAPTCHA_POOL_LOW_WATER", "50"))
+
+# CAPTCHA store - active codes per username
+CAPTCHA_STORE_BACKEND = os.getenv("CAPTCHA_STORE_BACKEND", "memory")  # memory / sqlite (shared across workers)
+CAPTCHA_STORE_MAX_SIZE = int(os.getenv("CAPTCHA_STORE_MAX_SIZE", "10000"))
+CAPTCHA_TTL_MINUTES = 5
+CAPTCHA_SWEEP_INTERVAL_SECONDS = 30
+
+# Rate limiter engine
+RATE_LIMIT_ALGORITHM = os.getenv("RATE_LIMIT_ALGORITHM", "sliding_window")  # sliding_window / token_bucket
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")  # memory / sqlite (shared across workers)
+RATE_LIMIT_WINDOW_SECONDS = 60
+RATE_LIMIT_EVICT_INTERVAL_SECONDS = 60
+
+# Login unit of work - one commit per login request instead of one per state change
+LOGIN_UNIT_OF_WORK = os.getenv("LOGIN_UNIT_OF_WORK", "true").lower() == "true"
+
+# Hash parameters - run calibrate_hashing.py to pick values for this host (writes them to .env)
+BCRYPT_COST = int(os.getenv("BCRYPT_COST", "12"))
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "1"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", 64 * 1024))  # KiB
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "1"))
+
+# Batch login - /api/login/batch for auditing runs, only for JWT subjects listed here
+BATCH_LOGIN_AUDITORS = [u.strip() for u in os.getenv("BATCH_LOGIN_AUDITORS", "").split(",") if u.strip()]
+BATCH_LOGIN_MAX_PAIRS = int(os.getenv("BATCH_LOGIN_MAX_PAIRS", "1000"))
+
+# Rehash on login - move users to the current HASH_MODE/cost after a successful login
+REHASH_ON_LOGIN = os.getenv("REHASH_ON_LOGIN", "true").lower() == "true"
+
+# Hashing executor - process pool for bcrypt/argon2id work
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", os.cpu_count() or 1))
+HASH_QUEUE_SIZE = int(os.getenv("HASH_QUEUE_SIZE", HASH_WORKERS * 4))
+HASH_QUEUE_TIMEOUT_SECONDS = float(os.getenv("HASH_QUEUE_TIMEOUT_SECONDS", "0.5"))
+
+ATTEMPT_LOG_FILE = "attempts.log"
+
+# User cache - read-through cache of user rows for the login hot path
+USER_CACHE_ENABLED = os.getenv("USER_CACHE_ENABLED", "true").lower() == "true"
+USER_CACHE_BACKEND = os.getenv("USER_CACHE_BACKEND", "memory")  # memory / sqlite (invalidations shared across workers)
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+
+# Stats - in-process counters advanced by persisted log batches instead of querying the rollups.
+# Re-read from the rollups every refresh interval to pick up the other workers' attempts
+STATS_CACHE_ENABLED = os.getenv("STATS_CACHE_ENABLED", "false").lower() == "true"
+STATS_CACHE_REFRESH_SECONDS = float(os.getenv("STATS_CACHE_REFRESH_SECONDS", "30"))
+
+# Attempt log sink - batched background writes to DB + file
+ATTEMPT_LOG_BATCH_SIZE = int(os.getenv("ATTEMPT_LOG_BATCH_SIZE", "200"))
+ATTEMPT_LOG_FLUSH_INTERVAL_SECONDS = float(os.getenv("ATTEMPT_LOG_FLUSH_INTERVAL_SECONDS", "0.5"))
+ATTEMPT_LOG_QUEUE_SIZE = int(os.getenv("ATTEMPT_LOG_QUEUE_SIZE", "100000"))
 
-ATTEMPT_LOG_FILE = "attempts.log"
\ No newline at end of file
+# Attempt log partitions - one attempt_logs_<key> table per day or per experiment (GROUP_SEED)
+ATTEMPT_LOG_PARTITION_BY = os.getenv("ATTEMPT_LOG_PARTITION_BY", "day")  # day | experiment | none
+ATTEMPT_LOG_RETENTION_DAYS = int(os.getenv("ATTEMPT_LOG_RETENTION_DAYS", "14"))  # 0 keeps everything
+ATTEMPT_LOG_RETENTION_INTERVAL_SECONDS = float(os.getenv("ATTEMPT_LOG_RETENTION_INTERVAL_SECONDS", "3600"))
\ No newline at end of file
@@ -1,17 +1,193 @@
 """
 Database Models and Configuration
 """
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Float
+from sqlalchemy import create_engine, event, text, Column, Integer, String, Text, DateTime, Float, Index, JSON
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker, DeclarativeBase, Session
-from typing import Generator
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from typing import AsyncGenerator, Generator
 from datetime import datetime
-from app.config import DATABASE_URL
+import threading
+import time
+from app.config import (
+    DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT_SECONDS,
+    DB_POOL_RECYCLE_SECONDS, DB_POOL_PRE_PING, DB_POOL_WARMUP,
+    DB_STATEMENT_TIMEOUT_MS, DB_STATEMENT_CACHE_SIZE
+)
+from app.logger import get_logger
+from app.spans import span
+
+log = get_logger("database")
 
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable is not set")
 
-engine = create_engine(DATABASE_URL, echo=False)
+
+# Pool checkout/wait counters per engine (exposed on /health)
+def _new_pool_metrics() -> dict:
+    return {
+        "checkouts": 0,
+        "connects": 0,
+        "timeouts": 0,
+        "wait_ms_total": 0.0,
+        "wait_ms_max": 0.0,
+    }
+
+
+pool_metrics = {"sync": _new_pool_metrics(), "async": _new_pool_metrics()}
+_pool_metrics_lock = threading.Lock()
+
+
+# Times how long each checkout waits for a free connection
+class _PoolTimingMixin:
+    metrics_key = "sync"
+    
+    def _do_get(self):
+        metrics = pool_metrics[self.metrics_key]
+        start = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except PoolTimeoutError:
+            with _pool_metrics_lock:
+                metrics["timeouts"] += 1
+            raise
+        waited = (time.perf_counter() - start) * 1000
+        with _pool_metrics_lock:
+            metrics["checkouts"] += 1
+            metrics["wait_ms_total"] += waited
+            metrics["wait_ms_max"] = max(metrics["wait_ms_max"], waited)
+        return record
+
+
+class InstrumentedQueuePool(_PoolTimingMixin, QueuePool):
+    metrics_key = "sync"
+
+
+class InstrumentedAsyncQueuePool(_PoolTimingMixin, AsyncAdaptedQueuePool):
+    metrics_key = "async"
+
+
+# Same database through its asyncio driver: asyncpg for Postgres, aiosqlite for SQLite
+def to_async_url(url: str) -> URL:
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    drivers = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+    if backend not in drivers:
+        raise ValueError(f"No async driver configured for {backend}")
+    return parsed.set(drivername=f"{backend}+{drivers[backend]}")
+
+
+# Engine options per backend - statement timeout and pool sizing
+def build_engine_options(url: str, use_async: bool = False) -> dict:
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    options = {
+        "echo": False,
+        "query_cache_size": DB_STATEMENT_CACHE_SIZE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    
+    if backend == "postgresql":
+        if use_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    elif backend == "sqlite":
+        # SQLite has no statement timeout; busy timeout bounds waits on the write lock
+        options["connect_args"] = {"timeout": DB_STATEMENT_TIMEOUT_MS / 1000, "check_same_thread": False}
+        if parsed.database in (None, "", ":memory:"):
+            # In-memory SQLite lives in a single connection - keep SQLAlchemy's default pool
+            return options
+    
+    options.update({
+        "poolclass": InstrumentedAsyncQueuePool if use_async else InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": DB_POOL_RECYCLE_SECONDS,
+    })
+    return options
+
+
+engine = create_engine(DATABASE_URL, **build_engine_options(DATABASE_URL))
+async_engine = create_async_engine(to_async_url(DATABASE_URL), **build_engine_options(DATABASE_URL, use_async=True))
+
+
+@event.listens_for(engine, "connect")
+def _count_connect(dbapi_connection, connection_record):
+    with _pool_metrics_lock:
+        pool_metrics["sync"]["connects"] += 1
+
+
+@event.listens_for(async_engine.sync_engine, "connect")
+def _count_async_connect(dbapi_connection, connection_record):
+    with _pool_metrics_lock:
+        pool_metrics["async"]["connects"] += 1
+
+
+# Open connections up front so the first burst of logins doesn't pay connection setup
+def warm_up_pool(count: int = DB_POOL_WARMUP):
+    if not isinstance(engine.pool, QueuePool):
+        return
+    count = min(count, DB_POOL_SIZE)
+    connections = []
+    try:
+        for _ in range(count):
+            conn = engine.connect()
+            conn.execute(text("SELECT 1"))
+            connections.append(conn)
+    except Exception as e:
+        log.warning("Pool warm-up stopped after %s connections: %s", len(connections), e)
+    finally:
+        for conn in connections:
+            conn.close()
+    log.info("Pool warmed up: %s connections", len(connections))
+
+
+async def warm_up_async_pool(count: int = DB_POOL_WARMUP):
+    if not isinstance(async_engine.pool, QueuePool):
+        return
+    count = min(count, DB_POOL_SIZE)
+    connections = []
+    try:
+        for _ in range(count):
+            conn = await async_engine.connect()
+            await conn.execute(text("SELECT 1"))
+            connections.append(conn)
+    except Exception as e:
+        log.warning("Async pool warm-up stopped after %s connections: %s", len(connections), e)
+    finally:
+        for conn in connections:
+            await conn.close()
+    log.info("Async pool warmed up: %s connections", len(connections))
+
+
+def _pool_stats(pool, metrics: dict) -> dict:
+    stats = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+        })
+    with _pool_metrics_lock:
+        stats.update(metrics)
+    checkouts = stats["checkouts"]
+    stats["wait_ms_avg"] = round(stats["wait_ms_total"] / checkouts, 3) if checkouts else 0
+    return stats
+
+
+def get_pool_stats() -> dict:
+    return {
+        "sync": _pool_stats(engine.pool, pool_metrics["sync"]),
+        "async": _pool_stats(async_engine.pool, pool_metrics["async"]),
+    }
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 class Base(DeclarativeBase):
     pass
@@ -25,6 +201,20 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Provide async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Persist state changes - deferred to the request's single commit in unit-of-work mode
+def save_changes(db: Session):
+    if db.info.get("unit_of_work"):
+        return
+    with span("db_commit"):
+        db.commit()
+
+
 
 class User(Base):
     __tablename__ = "users"
@@ -52,7 +242,37 @@ class AttemptLog(Base):
     result = Column(String(20), nullable=False)
     latency_ms = Column(Float, nullable=False)
     ip_address = Column(String(45))
+    stages = Column(JSON)  # per-stage durations in ms, see app/spans.py
+    # No composite stats index: /api/stats groups attempt_rollups (ux_attempt_rollups_key), never
+    # these rows, so such an index would only slow down the sink's bulk inserts
+
+
+# Per-minute aggregates of attempt_logs, merged in by the attempt log sink
+class AttemptRollup(Base):
+    __tablename__ = "attempt_rollups"
+    
+    id = Column(Integer, primary_key=True)
+    minute = Column(DateTime, nullable=False, index=True)
+    group_seed = Column(String(50), nullable=False)
+    hash_mode = Column(String(20), nullable=False)
+    protection_flags = Column(String(20), nullable=False)
+    result = Column(String(20), nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    latency_sum_ms = Column(Float, nullable=False, default=0.0)
+    latency_max_ms = Column(Float, nullable=False, default=0.0)
+    latency_histogram = Column(Text, nullable=False)  # JSON bucket counts, see attempt_stats.LATENCY_BUCKETS_MS
+    p50_ms = Column(Float)
+    p95_ms = Column(Float)
+    p99_ms = Column(Float)
+
+    __table_args__ = (
+        Index(
+            "ux_attempt_rollups_key",
+            "minute", "group_seed", "hash_mode", "protection_flags", "result",
+            unique=True
+        ),
+    )
 
 
-print("[OK] Database module loaded")
-print(f"[DB] {DATABASE_URL[:50] if DATABASE_URL else 'Not configured'}...")
\ No newline at end of file
+log.info("Database module loaded")
+log.info("DB: %s...", DATABASE_URL[:50] if DATABASE_URL else 'Not configured')
\ No newline at end of file
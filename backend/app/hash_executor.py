@@ -0,0 +1,208 @@
+"""
+Hashing Executor - Process pool for CPU-bound password hashing
+Bounded submission queue with backpressure, sync and async entry points
+"""
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from app.config import (
+    HASH_WORKERS, HASH_QUEUE_SIZE, HASH_QUEUE_TIMEOUT_SECONDS, HashMode
+)
+from app.hash_utils import hash_password, verify_password
+from app.logger import get_logger, configure_worker_logging
+
+log = get_logger("hash")
+
+
+# Cheap modes run inline - pickling to a worker costs more than the hash itself
+INLINE_HASH_MODES = {HashMode.PLAIN, HashMode.SHA256}
+
+
+class HashQueueFull(Exception):
+    pass
+
+
+class QueueSlots:
+    # Bounded count of pending pool jobs; threads and coroutines can both wait for a free slot
+    def __init__(self, size: int):
+        self.size = size
+        self.pending = 0
+        self.waited = 0
+        self.rejected = 0
+        self._cond = threading.Condition()
+        self._waiters = deque()
+
+    def _try_take(self) -> bool:
+        if self.pending < self.size:
+            self.pending += 1
+            return True
+        return False
+
+    def try_acquire(self) -> bool:
+        with self._cond:
+            if self._try_take():
+                return True
+            self.rejected += 1
+            return False
+
+    def acquire(self, timeout: float) -> bool:
+        with self._cond:
+            if self._try_take():
+                return True
+            self.waited += 1
+            if self._cond.wait_for(lambda: self.pending < self.size, timeout):
+                return self._try_take()
+            self.rejected += 1
+            return False
+
+    async def acquire_async(self, timeout: float) -> bool:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        with self._cond:
+            if self._try_take():
+                return True
+            self.waited += 1
+        while True:
+            with self._cond:
+                if self._try_take():
+                    return True
+                waiter = loop.create_future()
+                self._waiters.append((loop, waiter))
+            try:
+                await asyncio.wait_for(waiter, deadline - loop.time())
+            except asyncio.TimeoutError:
+                with self._cond:
+                    self.rejected += 1
+                return False
+            finally:
+                with self._cond:
+                    if (loop, waiter) in self._waiters:
+                        self._waiters.remove((loop, waiter))
+
+    # Wake one waiting thread and one waiting coroutine - whoever loses re-checks and waits again
+    def release(self):
+        with self._cond:
+            self.pending -= 1
+            self._cond.notify()
+            while self._waiters:
+                loop, waiter = self._waiters.popleft()
+                if not waiter.done():
+                    loop.call_soon_threadsafe(_wake, waiter)
+                    break
+
+    def stats(self) -> dict:
+        return {
+            "workers": HASH_WORKERS,
+            "queue_size": self.size,
+            "pending": self.pending,
+            "waited": self.waited,
+            "rejected": self.rejected,
+        }
+
+
+def _wake(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+_queue_slots = QueueSlots(HASH_QUEUE_SIZE)
+
+
+# Create the process pool on first use
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(
+                    max_workers=HASH_WORKERS,
+                    initializer=configure_worker_logging
+                )
+                log.info("Process pool started: workers=%s, queue=%s", HASH_WORKERS, HASH_QUEUE_SIZE)
+    return _executor
+
+
+# Stop the process pool (app shutdown)
+def shutdown_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True, cancel_futures=True)
+            _executor = None
+            log.info("Process pool stopped")
+
+
+# Submit work to a pool slot that is already reserved
+def _submit_reserved(fn, *args) -> Future:
+    try:
+        future = get_executor().submit(fn, *args)
+    except Exception:
+        _queue_slots.release()
+        raise
+    future.add_done_callback(lambda _: _queue_slots.release())
+    return future
+
+
+# Submit work to the pool - wait up to HASH_QUEUE_TIMEOUT_SECONDS for a slot (or not at all),
+# then raise HashQueueFull
+def _submit(fn, *args, wait: bool = True) -> Future:
+    if wait:
+        acquired = _queue_slots.acquire(HASH_QUEUE_TIMEOUT_SECONDS)
+    else:
+        acquired = _queue_slots.try_acquire()
+    if not acquired:
+        raise HashQueueFull(f"Hash queue full ({HASH_QUEUE_SIZE} pending)")
+    return _submit_reserved(fn, *args)
+
+
+# Async variant - waits for a slot without blocking the event loop
+async def _submit_async(fn, *args) -> Future:
+    if not await _queue_slots.acquire_async(HASH_QUEUE_TIMEOUT_SECONDS):
+        raise HashQueueFull(f"Hash queue full ({HASH_QUEUE_SIZE} pending)")
+    return _submit_reserved(fn, *args)
+
+
+def _run_inline(fn, *args) -> Future:
+    future = Future()
+    try:
+        future.set_result(fn(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+# Run fn inline for cheap modes, otherwise return a pool future
+def _dispatch(fn, hash_mode: HashMode, *args, wait: bool = True) -> Future:
+    if hash_mode in INLINE_HASH_MODES:
+        return _run_inline(fn, *args)
+    return _submit(fn, *args, wait=wait)
+
+
+async def _dispatch_async(fn, hash_mode: HashMode, *args):
+    if hash_mode in INLINE_HASH_MODES:
+        future = _run_inline(fn, *args)
+    else:
+        future = await _submit_async(fn, *args)
+    return await asyncio.wrap_future(future)
+
+
+def submit_hash(password: str, hash_mode: HashMode, wait: bool = True) -> Future:
+    return _dispatch(hash_password, hash_mode, password, hash_mode, wait=wait)
+
+
+# Awaitable helpers - for async endpoints
+async def hash_password_async(password: str, hash_mode: HashMode) -> str:
+    return await _dispatch_async(hash_password, hash_mode, password, hash_mode)
+
+
+async def verify_password_async(password: str, stored_hash: str, hash_mode: HashMode, parsed: dict = None) -> bool:
+    return await _dispatch_async(verify_password, hash_mode, password, stored_hash, hash_mode, parsed)
+
+
+# Current pool usage (for health/monitoring)
+def get_queue_stats() -> dict:
+    return _queue_slots.stats()
@@ -15,6 +15,9 @@ from app.config import (
     PEPPER,
     HashMode
 )
+from app.logger import get_logger
+
+log = get_logger("hash")
 
 argon2_hasher = PasswordHasher(
     time_cost=ARGON2_TIME_COST,
@@ -51,16 +54,52 @@ def hash_password(password: str, hash_mode: HashMode) -> str:
             raise ValueError(f"Unknown hash mode: {hash_mode}")
 
 
-def verify_password(password: str, stored_hash: str, hash_mode: HashMode) -> bool:
+# Split a stored hash into algorithm, cost parameters, salt and digest
+def parse_hash(stored_hash: str, hash_mode: HashMode) -> dict:
+    parsed = {"algorithm": hash_mode.value, "cost": None, "salt": None, "digest": None}
+    try:
+        match hash_mode:
+            case HashMode.PLAIN:
+                parsed["digest"] = stored_hash
+            
+            case HashMode.SHA256:
+                # hash:salt
+                if ":" in stored_hash:
+                    parsed["digest"], parsed["salt"] = stored_hash.split(":", 1)
+            
+            case HashMode.BCRYPT:
+                # $2b$<cost>$<22-char salt><31-char digest>
+                _, variant, cost, rest = stored_hash.split("$", 3)
+                parsed["algorithm"] = f"bcrypt-{variant}"
+                parsed["cost"] = {"rounds": int(cost)}
+                parsed["salt"], parsed["digest"] = rest[:22], rest[22:]
+            
+            case HashMode.ARGON2ID:
+                # $argon2id$v=19$m=<kib>,t=<iterations>,p=<lanes>$<salt>$<digest>
+                _, variant, _, params, salt, digest = stored_hash.split("$")
+                parsed["algorithm"] = variant
+                parsed["cost"] = {k: int(v) for k, v in (p.split("=") for p in params.split(","))}
+                parsed["salt"], parsed["digest"] = salt, digest
+    
+    except ValueError:
+        log.warning("Could not parse %s hash", hash_mode.value)
+    
+    return parsed
+
+
+def verify_password(password: str, stored_hash: str, hash_mode: HashMode, parsed: dict = None) -> bool:
     try:
         match hash_mode:
             case HashMode.PLAIN:
                 return password == stored_hash
             
             case HashMode.SHA256:
-                if ":" not in stored_hash:
+                if parsed and parsed["salt"] is not None:
+                    hashed, salt = parsed["digest"], parsed["salt"]
+                elif ":" in stored_hash:
+                    hashed, salt = stored_hash.split(":", 1)
+                else:
                     return False
-                hashed, salt = stored_hash.split(":", 1)
                 combined = f"{password}{salt}{PEPPER}"
                 computed_hash = hashlib.sha256(combined.encode()).hexdigest()
                 return computed_hash == hashed
@@ -80,6 +119,11 @@ def verify_password(password: str, stored_hash: str, hash_mode: HashMode) -> boo
             case _:
                 return False
     
-    except (VerifyMismatchError, ValueError, Exception) as e:
-        print(f"[ERROR] Password verification failed: {e}")
+    except VerifyMismatchError:
+        # Wrong argon2 password - the normal failure path, nothing to log
+        return False
+    
+    except Exception as e:
+        # Malformed hash etc. - DEBUG, this runs once per login attempt in the pool workers
+        log.debug("Password verification error: %s", e)
         return False
\ No newline at end of file
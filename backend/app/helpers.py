@@ -3,18 +3,72 @@ Helper Functions - General utilities
 JWT, logging, user queries, and basic validation
 """
 from sqlalchemy.orm import Session
-from fastapi import HTTPException
-from jose import jwt
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from jose import jwt, JWTError
 from datetime import datetime, timedelta
-import json
+from typing import AsyncGenerator
+from contextvars import ContextVar, Token
+import asyncio
+import time
 
-from app.database import User, AttemptLog
+from app.database import AsyncSessionLocal, User
 from app.config import (
     HashMode, AttackResult, SECRET_KEY, GROUP_SEED, 
-    PROTECTION_MODE, ATTEMPT_LOG_FILE
+    PROTECTION_MODE, USER_CACHE_ENABLED, LOGIN_UNIT_OF_WORK, BATCH_LOGIN_AUDITORS
 )
-from app.hash_utils import verify_password
+from app.attempt_log_sink import attempt_log_sink
+from app.metrics import login_stage_seconds, observe_attempt
+from app.spans import current_spans
+from app.user_cache import user_cache, attach_cached_user
+from app.hash_executor import (
+    HashQueueFull, verify_password_async
+)
+from app.logger import get_logger
+
+log = get_logger("helpers")
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+# Set by batch endpoints: log_attempt collects records here instead of queueing them
+_attempt_batch: ContextVar = ContextVar("attempt_batch", default=None)
+
+
+
+# Login session - all protection state changes are committed once, at the end of the request
+async def get_login_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        db.info["unit_of_work"] = LOGIN_UNIT_OF_WORK
+        try:
+            yield db
+            await _commit_login(db)
+        except HTTPException as e:
+            # 401/403/423 outcomes still carry counter/lockout changes that must persist;
+            # a 5xx means the request broke part way, so its changes are dropped
+            if e.status_code < 500:
+                await _commit_login(db)
+            else:
+                await db.rollback()
+            raise
+        except Exception:
+            await db.rollback()
+            raise
+        finally:
+            # Batch attempt logs are written only once the users UPDATEs are committed - on SQLite
+            # the insert would otherwise wait on this session's write lock
+            records = db.info.pop("attempt_batch", None)
+            if records:
+                await asyncio.to_thread(attempt_log_sink.write_batch, records)
+
 
+# The final commit runs after the attempt is logged, so it only reaches /metrics
+async def _commit_login(db: AsyncSession):
+    start = time.perf_counter()
+    await db.commit()
+    hash_mode = db.info.get("logged_hash_mode")
+    if hash_mode:
+        login_stage_seconds.observe(time.perf_counter() - start, stage="db_commit", hash_mode=hash_mode)
 
 
 # Create JWT token for authenticated user
@@ -23,59 +77,135 @@ def create_jwt_token(username: str) -> str:
     return jwt.encode({"sub": username, "exp": expire}, SECRET_KEY, algorithm="HS256")
 
 
-# Write attempt to log file
-def log_attempt_to_file(log_data: dict):
+# Username from a token issued by create_jwt_token, None if invalid or expired
+def decode_jwt_username(token: str) -> str:
     try:
-        with open(ATTEMPT_LOG_FILE, 'a') as f:
-            f.write(json.dumps(log_data) + '\n')
-    except Exception as e:
-        print(f"ERROR: Log write failed: {e}")
+        return jwt.decode(token, SECRET_KEY, algorithms=["HS256"]).get("sub")
+    except JWTError:
+        return None
+
+
+# Bearer token whose subject is listed in BATCH_LOGIN_AUDITORS
+def require_batch_auditor(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)) -> str:
+    username = decode_jwt_username(credentials.credentials) if credentials else None
+    if not username:
+        raise HTTPException(
+            status_code=401,
+            detail={"error": "unauthorized", "message": "Valid bearer token required"},
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    if username not in BATCH_LOGIN_AUDITORS:
+        raise HTTPException(
+            status_code=403,
+            detail={"error": "forbidden", "message": "Not allowed to run batch logins"}
+        )
+    return username
+
 
+# Collect attempt records for the current request - get_login_db writes them after its commit.
+# Pass the returned token to end_attempt_batch once the request's attempts are logged.
+def start_attempt_batch(db: AsyncSession) -> Token:
+    records = []
+    db.info["attempt_batch"] = records
+    return _attempt_batch.set(records)
 
-# Log attempt to both database and file
+
+# Back to queueing single attempts - the task may serve later, non-batch requests
+def end_attempt_batch(token: Token):
+    _attempt_batch.reset(token)
+
+
+# Queue attempt for batched write to both database and file, with the request's stage spans
 def log_attempt(db: Session, result: AttackResult, username: str, 
                 hash_mode: HashMode, latency_ms: float, ip: str):
-    attempt = AttemptLog(
-        timestamp=datetime.utcnow(),
-        group_seed=GROUP_SEED,
-        username=username,
-        hash_mode=hash_mode.value,
-        protection_flags=PROTECTION_MODE.name,
-        result=result.value,
-        latency_ms=latency_ms,
-        ip_address=ip
-    )
-    db.add(attempt)
-    db.commit()
-    
-    log_attempt_to_file({
-        "timestamp": datetime.utcnow().isoformat(),
+    timestamp = datetime.utcnow()
+    stages = dict(current_spans() or {}) or None
+    record = {
+        "timestamp": timestamp,
         "group_seed": GROUP_SEED,
         "username": username,
         "hash_mode": hash_mode.value,
         "protection_flags": PROTECTION_MODE.name,
         "result": result.value,
-        "latency_ms": latency_ms
-    })
+        "latency_ms": latency_ms,
+        "ip_address": ip,
+        "stages": stages
+    }
+    batch = _attempt_batch.get()
+    if batch is not None:
+        batch.append(record)
+    else:
+        attempt_log_sink.enqueue(record)
+    observe_attempt(hash_mode.value, result.value, latency_ms, stages)
+    db.info["logged_hash_mode"] = hash_mode.value
+
+
+# Find many users at once - cache hits first, one IN query for the rest
+def find_users(db: Session, usernames: list) -> dict:
+    users = {}
+    missing = {}
+    for username in dict.fromkeys(usernames):
+        values = user_cache.get(username) if USER_CACHE_ENABLED else None
+        if values is not None:
+            users[username] = attach_cached_user(db, values)
+        else:
+            missing[username] = user_cache.version(username) if USER_CACHE_ENABLED else None
+    
+    if missing:
+        for user in db.query(User).filter(User.username.in_(missing)):
+            users[user.username] = user
+            if USER_CACHE_ENABLED:
+                user_cache.put(user, missing[user.username])
+    return users
 
 
-# Find user by username
+# Find user by username - served from the user cache when enabled
 def find_user(db: Session, username: str) -> User:
-    return db.query(User).filter(User.username == username).first()
+    if USER_CACHE_ENABLED:
+        values = user_cache.get(username)
+        if values is not None:
+            return attach_cached_user(db, values)
+        version = user_cache.version(username)
+    
+    user = db.query(User).filter(User.username == username).first()
+    if user and USER_CACHE_ENABLED:
+        user_cache.put(user, version)
+    return user
+
+
+# Parsed hash metadata for the user (cached alongside the user row)
+def get_hash_info(user: User) -> dict:
+    if USER_CACHE_ENABLED:
+        return user_cache.hash_info(user)
+    return None
 
 
 # Raise 401 if user doesn't exist
 def validate_user_exists(user: User, username: str):
     if not user:
-        print(f"User not found: {username}")
+        log.debug("User not found: %s", username)
         raise HTTPException(
             status_code=401,
             detail={"error": "Invalid credentials", "message": "Invalid username or password"}
         )
 
 
-# Check if password is correct - returns True/False
-def validate_password(user: User, password: str) -> bool:
-    is_valid = verify_password(password, user.password_hash, HashMode(user.hash_mode))
-    print(f"Password {user.username}: {'Correct' if is_valid else 'Wrong'}")
+# Raise 503 when the hashing pool is saturated
+def raise_hash_queue_full(e: HashQueueFull):
+    log.warning("Hash queue full: %s", e)
+    raise HTTPException(
+        status_code=503,
+        detail={"error": "Service unavailable", "message": "Server busy, please retry"}
+    )
+
+
+# Check if password is correct - awaits the hashing pool without holding a worker thread
+async def validate_password_async(user: User, password: str) -> bool:
+    try:
+        is_valid = await verify_password_async(
+            password, user.password_hash, HashMode(user.hash_mode), get_hash_info(user)
+        )
+    except HashQueueFull as e:
+        raise_hash_queue_full(e)
+    log.debug("Password %s: %s", user.username, 'Correct' if is_valid else 'Wrong')
     return is_valid
\ No newline at end of file
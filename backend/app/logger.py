@@ -0,0 +1,93 @@
+"""
+Logging - Structured, non-blocking application logging
+Records go through a QueueHandler; a listener thread does the actual stdout writes
+"""
+import atexit
+import json
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+from app.config import LOG_LEVEL, LOG_LEVELS, LOG_FORMAT
+
+
+ROOT_LOGGER = "app"
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+def _build_formatter() -> logging.Formatter:
+    if LOG_FORMAT == "json":
+        return JsonFormatter()
+    return logging.Formatter("%(asctime)s %(levelname)-5s [%(name)s] %(message)s")
+
+
+# Per-module overrides, e.g. "app.protection=WARNING,app.main=DEBUG"
+def _apply_levels():
+    logging.getLogger(ROOT_LOGGER).setLevel(LOG_LEVEL.upper())
+    for item in filter(None, LOG_LEVELS.split(",")):
+        name, _, level = item.partition("=")
+        logging.getLogger(name.strip()).setLevel(level.strip().upper())
+
+
+# Route app.* records through an in-memory queue to a background writer thread
+def configure_logging():
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(_build_formatter())
+
+    log_queue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.handlers = [QueueHandler(log_queue)]
+    root.propagate = False
+    _apply_levels()
+
+    atexit.register(shutdown_logging)
+
+
+# Worker processes (hashing pool) have no listener thread - write directly
+def configure_worker_logging():
+    global _listener
+    _listener = None
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(_build_formatter())
+    root = logging.getLogger(ROOT_LOGGER)
+    root.handlers = [handler]
+    root.propagate = False
+    _apply_levels()
+
+
+# Drain queued records before exit
+def shutdown_logging():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+# Module logger: use %-style args so disabled levels skip formatting entirely
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+configure_logging()
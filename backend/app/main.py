@@ -2,30 +2,49 @@
 FastAPI Application - Main API endpoints
 """
 from fastapi import FastAPI, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import select, func, text
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
+import asyncio
 import time
-import traceback
 
-from app.database import get_db, User, AttemptLog
+from app.database import (
+    get_db, get_async_db, SessionLocal, User, async_engine, warm_up_pool, warm_up_async_pool, get_pool_stats
+)
 from app.config import (
     GROUP_SEED, PROTECTION_MODE, HASH_MODE, PROJECT_NAME, FRONTEND_URL,
     MAX_LOGIN_REQUESTS_PER_MINUTE, MAX_CAPTCHA_FAILED_ATTEMPTS, MAX_FAILED_ATTEMPTS, LOCKOUT_DURATION_MINUTES,
+    STATS_CACHE_ENABLED, REHASH_ON_LOGIN, BATCH_LOGIN_MAX_PAIRS, HASH_QUEUE_SIZE,
     AttackResult, HashMode, PasswordStrength, ProtectionMode
 )
-from app.hash_utils import hash_password
+from app.hash_executor import HashQueueFull, hash_password_async, shutdown_executor, get_queue_stats
+from app.attempt_log_sink import attempt_log_sink
+from app.attempt_stats import attempt_counters, query_attempt_counts, query_minute_rollups, build_stats
+from app.attempt_partitions import attempt_partitions
+from app.user_cache import user_cache
+from app.rehash import rehasher, hash_mode_report
+from app.captcha_service import captcha_pool
+from app.captcha_store import captcha_store
 from app.helpers import (
-    find_user, validate_user_exists, validate_password,
-    log_attempt, create_jwt_token
+    find_user, find_users, validate_user_exists, validate_password_async, get_hash_info,
+    log_attempt, create_jwt_token, raise_hash_queue_full, get_login_db,
+    require_batch_auditor, start_attempt_batch, end_attempt_batch
 )
 from app.protection_service import (
     cleanup_stale_protection_data, validate_account_not_locked,
     requires_captcha, validate_captcha, requires_totp, ensure_totp_exists,
-    get_totp_code, validate_totp, check_rate_limit, apply_lockout,
-    reset_protection_state, generate_captcha_code, generate_captcha_image,
+    get_totp_code, validate_totp, check_rate_limit, register_failed_attempt,
+    reset_protection_state, generate_captcha_code, get_captcha_image,
     handle_invalid_captcha, handle_totp_required, handle_invalid_totp
 )
+from app.spans import start_spans, span
+from app.metrics import render_metrics
+from app.logger import get_logger
+
+log = get_logger("main")
 
 
 app = FastAPI(title=PROJECT_NAME)
@@ -39,6 +58,36 @@ app.add_middleware(
 )
 
 
+@app.on_event("startup")
+async def on_startup():
+    warm_up_pool()
+    await warm_up_async_pool()
+    attempt_log_sink.start()
+    attempt_partitions.start()
+    
+    if PROTECTION_MODE == ProtectionMode.CAPTCHA:
+        captcha_pool.start()
+        captcha_store.start()
+    
+    if STATS_CACHE_ENABLED:
+        db = SessionLocal()
+        try:
+            attempt_counters.seed(db)
+        finally:
+            db.close()
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    attempt_log_sink.stop()
+    attempt_partitions.stop()
+    captcha_pool.stop()
+    captcha_store.stop()
+    shutdown_executor()
+    rehasher.stop()
+    await async_engine.dispose()
+
+
 
 class RegisterRequest(BaseModel):
     username: str
@@ -60,11 +109,15 @@ class LoginTOTPRequest(BaseModel):
     captcha_code: str = None
 
 
+class BatchLoginRequest(BaseModel):
+    attempts: list[LoginRequest]
+
+
 
 
 # Handle failed password attempt
 def handle_failed_password(user: User, db: Session, start_time: float, ip: str):
-    print(f"Password failed: {user.username}")
+    log.debug("Password failed: %s", user.username)
     
     match PROTECTION_MODE:
         case ProtectionMode.TOTP:
@@ -75,7 +128,7 @@ def handle_failed_password(user: User, db: Session, start_time: float, ip: str):
             latency = (time.time() - start_time) * 1000
             log_attempt(db, AttackResult.TOTP_REQUIRED, user.username, HashMode(user.hash_mode), latency, ip)
             
-            print(f"TOTP required despite wrong password: {user.username}")
+            log.debug("TOTP required despite wrong password: %s", user.username)
             
             raise HTTPException(
                 status_code=403,
@@ -87,18 +140,15 @@ def handle_failed_password(user: User, db: Session, start_time: float, ip: str):
             )
         
         case ProtectionMode.LOCKOUT:
-            # Increment and check lockout threshold
-            user.failed_attempts += 1
-            db.commit()
-            print(f"Failed attempts: {user.failed_attempts}/{MAX_FAILED_ATTEMPTS}")
+            # Increment and lock atomically once the threshold is reached
+            failed_attempts = register_failed_attempt(user, db, lock_after=MAX_FAILED_ATTEMPTS)
+            log.debug("Failed attempts: %s/%s", failed_attempts, MAX_FAILED_ATTEMPTS)
             
-            if user.failed_attempts >= MAX_FAILED_ATTEMPTS:
-                apply_lockout(user, db)
-                
+            if failed_attempts >= MAX_FAILED_ATTEMPTS:
                 latency = (time.time() - start_time) * 1000
                 log_attempt(db, AttackResult.LOCKED, user.username, HashMode(user.hash_mode), latency, ip)
                 
-                print(f"Account locked: {user.username}")
+                log.info("Account locked: %s", user.username)
                 
                 raise HTTPException(
                     status_code=423,
@@ -118,19 +168,18 @@ def handle_failed_password(user: User, db: Session, start_time: float, ip: str):
             )
         
         case ProtectionMode.CAPTCHA:
-            # Increment and check CAPTCHA threshold
-            user.failed_attempts += 1
-            db.commit()
-            print(f"Failed attempts: {user.failed_attempts}/{MAX_CAPTCHA_FAILED_ATTEMPTS}")
+            # Increment atomically and check CAPTCHA threshold
+            failed_attempts = register_failed_attempt(user, db)
+            log.debug("Failed attempts: %s/%s", failed_attempts, MAX_CAPTCHA_FAILED_ATTEMPTS)
             
-            if user.failed_attempts >= MAX_CAPTCHA_FAILED_ATTEMPTS:
-                code = generate_captcha_code(user.username, force_new=True)
-                image = generate_captcha_image(code)
+            if failed_attempts >= MAX_CAPTCHA_FAILED_ATTEMPTS:
+                generate_captcha_code(user.username, force_new=True)
+                image = get_captcha_image(user.username)
                 
                 latency = (time.time() - start_time) * 1000
                 log_attempt(db, AttackResult.CAPTCHA_REQUIRED, user.username, HashMode(user.hash_mode), latency, ip)
                 
-                print(f"CAPTCHA required: {user.username}")
+                log.debug("CAPTCHA required: %s", user.username)
                 
                 raise HTTPException(
                     status_code=403,
@@ -163,25 +212,30 @@ def handle_failed_password(user: User, db: Session, start_time: float, ip: str):
 
 
 # Complete successful login
-def handle_successful_login(user: User, db: Session, start_time: float, ip: str):
+def handle_successful_login(user: User, db: Session, start_time: float, ip: str, password: str = None,
+                            issue_token: bool = True):
     reset_protection_state(user, db)
     
+    # Password is known to be correct here - upgrade an outdated hash in the background
+    if REHASH_ON_LOGIN:
+        rehasher.schedule(user, password, get_hash_info(user))
+    
     latency = (time.time() - start_time) * 1000
     log_attempt(db, AttackResult.SUCCESS, user.username, HashMode(user.hash_mode), latency, ip)
     
-    print(f"Login success: {user.username}")
-    
-    token = create_jwt_token(user.username)
+    log.debug("Login success: %s", user.username)
     
-    return {
+    response = {
         "success": True,
         "message": "Login successful",
-        "token": token,
         "user": {
             "username": user.username,
             "password_strength": user.password_strength
         }
     }
+    if issue_token:
+        response["token"] = create_jwt_token(user.username)
+    return response
 
 
 # Root endpoint - API info
@@ -206,15 +260,18 @@ def root():
 
 # Register new user
 @app.post("/api/register")
-def register(request: RegisterRequest, db: Session = Depends(get_db)):
-    existing = db.query(User).filter(User.username == request.username).first()
+async def register(request: RegisterRequest, db: AsyncSession = Depends(get_async_db)):
+    existing = await db.scalar(select(User.id).where(User.username == request.username))
     if existing:
         raise HTTPException(
             status_code=400,
             detail={"error": "Invalid Username", "message": "Username already exists"}
         )
     
-    password_hash = hash_password(request.password, HASH_MODE)
+    try:
+        password_hash = await hash_password_async(request.password, HASH_MODE)
+    except HashQueueFull as e:
+        raise_hash_queue_full(e)
     
     user = User(
         username=request.username,
@@ -225,10 +282,9 @@ def register(request: RegisterRequest, db: Session = Depends(get_db)):
     )
     
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
     
-    print(f"User registered: {user.username} (hash={HASH_MODE.value})")
+    log.info("User registered: %s (hash=%s)", user.username, HASH_MODE.value)
     
     return {
         "success": True,
@@ -240,56 +296,115 @@ def register(request: RegisterRequest, db: Session = Depends(get_db)):
     }
 
 
+# The login steps below are sync and run inside AsyncSession.run_sync,
+# so the protection helpers are shared; only password hashing is awaited between them
+
+# Look up user and run the checks that come before the password
+def load_login_user(db: Session, username: str) -> User:
+    with span("user_lookup"):
+        user = find_user(db, username)
+    return prepare_login_user(db, user, username)
+
+
+# Checks that come before the password, for an already loaded user
+def prepare_login_user(db: Session, user: User, username: str) -> User:
+    validate_user_exists(user, username)
+    
+    log.debug("User state: attempts=%s, locked=%s", user.failed_attempts, bool(user.locked_until))
+    
+    with span("protection_cleanup"):
+        cleanup_stale_protection_data(user, db)
+        validate_account_not_locked(user)
+    return user
+
+
+# Rest of /api/login once the password has been verified
+def complete_login(db: Session, user: User, request: LoginRequest, password_correct: bool,
+                   start_time: float, ip: str, issue_token: bool = True):
+    if not password_correct:
+        handle_failed_password(user, db, start_time, ip)
+    
+    captcha_required = requires_captcha(user)
+    
+    # If CAPTCHA required, validate it BEFORE checking password
+    if captcha_required:
+        captcha_valid = validate_captcha(user, request.captcha_code)
+        if not captcha_valid:
+            # Generate and show CAPTCHA
+            handle_invalid_captcha(user, db, start_time, ip)
+    
+       
+    if requires_totp(user):
+        ensure_totp_exists(user, db)
+        handle_totp_required(user, db, start_time, ip)
+    
+    return handle_successful_login(user, db, start_time, ip, request.password, issue_token)
+
+
+# /api/login_totp checks CAPTCHA before the password
+def check_login_captcha(db: Session, user: User, captcha_code: str, start_time: float, ip: str):
+    captcha_required = requires_captcha(user)
+    
+    if captcha_required:
+        captcha_valid = validate_captcha(user, captcha_code)
+        if not captcha_valid:
+            handle_invalid_captcha(user, db, start_time, ip)
+
+
+# Rest of /api/login_totp once the password has been verified
+def complete_login_totp(db: Session, user: User, request: LoginTOTPRequest, password_correct: bool,
+                        start_time: float, ip: str):
+    if not password_correct:
+        ensure_totp_exists(user, db)
+        handle_failed_password(user, db, start_time, ip)
+    
+    # Check TOTP mode enabled
+    if not requires_totp(user):
+        raise HTTPException(
+            status_code=400,
+            detail={"error": "totp_not_enabled", "message": "TOTP not enabled for this user"}
+        )
+    
+    ensure_totp_exists(user, db)
+    
+    # Check if TOTP code provided
+    if not request.totp_code:
+        handle_totp_required(user, db, start_time, ip)
+    
+    # Validate TOTP code
+    try:
+        validate_totp(user, request.totp_code)
+    except HTTPException:
+        handle_invalid_totp(user, db, start_time, ip)
+    
+    return handle_successful_login(user, db, start_time, ip, request.password)
+
+
 # Main login endpoint
 @app.post("/api/login")
-def login(request: LoginRequest, http_request: Request, db: Session = Depends(get_db)):
+async def login(request: LoginRequest, http_request: Request, db: AsyncSession = Depends(get_login_db)):
     start_time = time.time()
+    start_spans()
     ip = http_request.client.host if http_request.client else "unknown"
     
-    print(f"Login attempt: {request.username} from {ip} (mode={PROTECTION_MODE.name})")
-    
-    user = None
+    log.debug("Login attempt: %s from %s (mode=%s)", request.username, ip, PROTECTION_MODE.name)
     
     if PROTECTION_MODE == ProtectionMode.RATE_LIMITING:
         check_rate_limit(ip, MAX_LOGIN_REQUESTS_PER_MINUTE, "login")
     
     try:
-        user = find_user(db, request.username)
-        validate_user_exists(user, request.username)
-        
-        print(f"User state: attempts={user.failed_attempts}, locked={bool(user.locked_until)}")
-        
-        cleanup_stale_protection_data(user, db)
-        validate_account_not_locked(user)
-
-        password_correct = validate_password(user, request.password)
-        if not password_correct:
-            handle_failed_password(user, db, start_time, ip)
-        
-        captcha_required = requires_captcha(user)
-        
-        # If CAPTCHA required, validate it BEFORE checking password
-        if captcha_required:
-            captcha_valid = validate_captcha(user, request.captcha_code)
-            if not captcha_valid:
-                # Generate and show CAPTCHA
-                handle_invalid_captcha(user, db, start_time, ip)
-        
-           
-        if requires_totp(user):
-            ensure_totp_exists(user, db)
-            handle_totp_required(user, db, start_time, ip)
-        
-        return handle_successful_login(user, db, start_time, ip)
+        user = await db.run_sync(load_login_user, request.username)
+        with span("password_verify"):
+            password_correct = await validate_password_async(user, request.password)
+        return await db.run_sync(complete_login, user, request, password_correct, start_time, ip)
     
     except HTTPException:
         raise
     
     except Exception as e:
         latency = (time.time() - start_time) * 1000
-        log_attempt(db, AttackResult.FAILED, request.username, HASH_MODE, latency, ip)
-        print(f"ERROR: {e}")
-        traceback.print_exc()
+        log_attempt(db.sync_session, AttackResult.FAILED, request.username, HASH_MODE, latency, ip)
+        log.exception("Login failed: %s", e)
         raise HTTPException(
             status_code=500,
             detail={"error": "Internal server error", "message": str(e)}
@@ -298,76 +413,133 @@ def login(request: LoginRequest, http_request: Request, db: Session = Depends(ge
 
 # Login with TOTP verification
 @app.post("/api/login_totp")
-def login_totp(request: LoginTOTPRequest, http_request: Request, db: Session = Depends(get_db)):
+async def login_totp(request: LoginTOTPRequest, http_request: Request, db: AsyncSession = Depends(get_login_db)):
     start_time = time.time()
+    start_spans()
     ip = http_request.client.host if http_request.client else "unknown"
     
-    print(f"Login TOTP: {request.username} from {ip} (mode={PROTECTION_MODE.name})")
-    
-    user = None
+    log.debug("Login TOTP: %s from %s (mode=%s)", request.username, ip, PROTECTION_MODE.name)
     
     if PROTECTION_MODE == ProtectionMode.RATE_LIMITING:
         check_rate_limit(ip, MAX_LOGIN_REQUESTS_PER_MINUTE, "login")
     
     try:
-        user = find_user(db, request.username)
-        validate_user_exists(user, request.username)
-        
-        print(f"User state: attempts={user.failed_attempts}, locked={bool(user.locked_until)}")
-        
-        cleanup_stale_protection_data(user, db)
-        validate_account_not_locked(user)
-        
-        # Check CAPTCHA if required
-        captcha_required = requires_captcha(user)
-        
-        if captcha_required:
-            captcha_valid = validate_captcha(user, request.captcha_code)
-            if not captcha_valid:
-                handle_invalid_captcha(user, db, start_time, ip)
-        
-        # Check password
-        password_correct = validate_password(user, request.password)
-        
-        if not password_correct:
-            ensure_totp_exists(user, db)
-            handle_failed_password(user, db, start_time, ip)
-        
-        # Check TOTP mode enabled
-        if not requires_totp(user):
-            raise HTTPException(
-                status_code=400,
-                detail={"error": "totp_not_enabled", "message": "TOTP not enabled for this user"}
-            )
-        
-        ensure_totp_exists(user, db)
-        
-        # Check if TOTP code provided
-        if not request.totp_code:
-            handle_totp_required(user, db, start_time, ip)
-        
-        # Validate TOTP code
-        try:
-            validate_totp(user, request.totp_code)
-        except HTTPException:
-            handle_invalid_totp(user, db, start_time, ip)
-        
-        return handle_successful_login(user, db, start_time, ip)
+        user = await db.run_sync(load_login_user, request.username)
+        await db.run_sync(check_login_captcha, user, request.captcha_code, start_time, ip)
+        with span("password_verify"):
+            password_correct = await validate_password_async(user, request.password)
+        return await db.run_sync(complete_login_totp, user, request, password_correct, start_time, ip)
     
     except HTTPException:
         raise
     
     except Exception as e:
         latency = (time.time() - start_time) * 1000
-        log_attempt(db, AttackResult.FAILED, request.username, HASH_MODE, latency, ip)
-        print(f"ERROR: {e}")
-        traceback.print_exc()
+        log_attempt(db.sync_session, AttackResult.FAILED, request.username, HASH_MODE, latency, ip)
+        log.exception("Login failed: %s", e)
         raise HTTPException(
             status_code=500,
             detail={"error": "Internal server error", "message": str(e)}
         )
 
 
+# HTTPException raised by the login pipeline -> one batch result entry
+def batch_result(username: str, e: HTTPException) -> dict:
+    detail = e.detail if isinstance(e.detail, dict) else {"message": str(e.detail)}
+    return {"username": username, "status_code": e.status_code, "success": False, **detail}
+
+
+# Batch stage 1: one IN query, then the pre-password checks per pair (each pair has its own spans)
+def prepare_batch(db: Session, attempts: list, pair_spans: list, ip: str) -> list:
+    users = find_users(db, [a.username for a in attempts])
+    prepared = []
+    for attempt, spans in zip(attempts, pair_spans):
+        start_spans(spans)
+        try:
+            if PROTECTION_MODE == ProtectionMode.RATE_LIMITING:
+                check_rate_limit(ip, MAX_LOGIN_REQUESTS_PER_MINUTE, "login")
+            prepared.append(prepare_login_user(db, users.get(attempt.username), attempt.username))
+        except HTTPException as e:
+            prepared.append(batch_result(attempt.username, e))
+    return prepared
+
+
+# Batch stage 3: same failure/CAPTCHA/TOTP/success handling as /api/login, per pair
+def complete_batch(db: Session, attempts: list, prepared: list, verified: list, pair_spans: list,
+                   start_time: float, ip: str) -> list:
+    results = []
+    for attempt, user, password_correct, spans in zip(attempts, prepared, verified, pair_spans):
+        start_spans(spans)
+        if isinstance(user, dict):
+            results.append(user)
+            continue
+        if isinstance(password_correct, HTTPException):
+            results.append(batch_result(attempt.username, password_correct))
+            continue
+        try:
+            complete_login(db, user, attempt, password_correct, start_time, ip, issue_token=False)
+            results.append({"username": attempt.username, "status_code": 200, "success": True})
+        except HTTPException as e:
+            results.append(batch_result(attempt.username, e))
+    return results
+
+
+# Bulk credential check for auditing runs (bearer token of a BATCH_LOGIN_AUDITORS user)
+@app.post("/api/login/batch")
+async def login_batch(request: BatchLoginRequest, http_request: Request,
+                      auditor: str = Depends(require_batch_auditor),
+                      db: AsyncSession = Depends(get_login_db)):
+    if len(request.attempts) > BATCH_LOGIN_MAX_PAIRS:
+        raise HTTPException(
+            status_code=413,
+            detail={"error": "batch_too_large", "message": f"At most {BATCH_LOGIN_MAX_PAIRS} pairs per batch"}
+        )
+    
+    start_time = time.time()
+    ip = http_request.client.host if http_request.client else "unknown"
+    pair_spans = [{} for _ in request.attempts]
+    batch_token = start_attempt_batch(db)
+    
+    log.info("Batch login by %s: %s pairs from %s", auditor, len(request.attempts), ip)
+    
+    # Verify concurrently, but never hold more pool slots than the queue has
+    slots = asyncio.Semaphore(HASH_QUEUE_SIZE)
+    
+    # gather runs each verify in its own task, so start_spans only affects that pair
+    async def verify(user, attempt, spans):
+        if isinstance(user, dict):
+            return None
+        start_spans(spans)
+        async with slots:
+            try:
+                with span("password_verify"):
+                    return await validate_password_async(user, attempt.password)
+            except HTTPException as e:
+                return e
+    
+    try:
+        prepared = await db.run_sync(prepare_batch, request.attempts, pair_spans, ip)
+        verified = await asyncio.gather(*(
+            verify(user, attempt, spans) for user, attempt, spans in zip(prepared, request.attempts, pair_spans)
+        ))
+        # Attempt logs are collected in db.info and bulk-written by get_login_db after the commit
+        results = await db.run_sync(complete_batch, request.attempts, prepared, verified, pair_spans,
+                                    start_time, ip)
+    finally:
+        end_attempt_batch(batch_token)
+    
+    summary = {}
+    for result in results:
+        summary[result["status_code"]] = summary.get(result["status_code"], 0) + 1
+    
+    return {
+        "total": len(results),
+        "succeeded": summary.get(200, 0),
+        "by_status": {str(k): v for k, v in sorted(summary.items())},
+        "results": results,
+    }
+
+
 # Get TOTP code for user (for testing/attacks)
 @app.get("/api/get_totp")
 def get_totp(username: str, group_seed: str, db: Session = Depends(get_db)):
@@ -393,29 +565,35 @@ def get_totp(username: str, group_seed: str, db: Session = Depends(get_db)):
             detail={"error": "Invalid user", "message": "User does not have TOTP enabled"}
         )
     
-    print(f"TOTP requested: {username} = {code}")
+    log.debug("TOTP requested: %s = %s", username, code)
     return {"totp_code": code}
 
 
+# Users per hash mode/cost and rehash-on-login progress
+@app.get("/api/hash_report")
+async def get_hash_report(db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(hash_mode_report)
+
+
+# Prometheus scrape endpoint - login latency and per-stage histograms
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 # Get statistics (for frontend dashboard)
 @app.get("/api/stats")
-def get_stats(db: Session = Depends(get_db)):
-    total = db.query(AttemptLog).count()
-    successful = db.query(AttemptLog).filter(AttemptLog.result == AttackResult.SUCCESS.value).count()
-    failed = db.query(AttemptLog).filter(AttemptLog.result == AttackResult.FAILED.value).count()
-    locked = db.query(AttemptLog).filter(AttemptLog.result == AttackResult.LOCKED.value).count()
-    captcha_required = db.query(AttemptLog).filter(AttemptLog.result == AttackResult.CAPTCHA_REQUIRED.value).count()
-    totp_required = db.query(AttemptLog).filter(AttemptLog.result == AttackResult.TOTP_REQUIRED.value).count()
-    
-    return {
-        "total_attempts": total,
-        "successful": successful,
-        "failed": failed,
-        "locked": locked,
-        "captcha_required": captcha_required,
-        "totp_required": totp_required,
-        "success_rate": round((successful / total * 100), 2) if total > 0 else 0
-    }
+async def get_stats(db: AsyncSession = Depends(get_async_db)):
+    if STATS_CACHE_ENABLED and attempt_counters.is_seeded():
+        return build_stats(attempt_counters.snapshot())
+    return build_stats(await db.run_sync(query_attempt_counts))
+
+
+# Per-minute attempt counts and latency percentiles (reads rollups only)
+@app.get("/api/stats/minutes")
+async def get_minute_stats(minutes: int = 60, db: AsyncSession = Depends(get_async_db)):
+    minutes = max(1, min(minutes, 24 * 60))
+    return {"minutes": await db.run_sync(query_minute_rollups, minutes)}
 
 
 # Get current system configuration (for frontend)
@@ -430,15 +608,23 @@ def get_config():
 
 # Health check endpoint
 @app.get("/health")
-def health(db: Session = Depends(get_db)):
+async def health(db: AsyncSession = Depends(get_async_db)):
     try:
-        db.execute("SELECT 1")
-        user_count = db.query(User).count()
+        await db.execute(text("SELECT 1"))
+        user_count = await db.scalar(select(func.count()).select_from(User))
         
         return {
             "status": "healthy",
             "database": "connected",
-            "users": user_count
+            "users": user_count,
+            "db_pool": get_pool_stats(),
+            "hash_queue": get_queue_stats(),
+            "attempt_log_sink": attempt_log_sink.stats(),
+            "attempt_partitions": attempt_partitions.stats(),
+            "rehash": rehasher.stats(),
+            "user_cache": user_cache.stats(),
+            "captcha_pool": captcha_pool.stats(),
+            "captcha_store": captcha_store.stats()
         }
     except Exception as e:
         return {
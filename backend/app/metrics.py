@@ -0,0 +1,80 @@
+"""
+Metrics - In-process histograms rendered in Prometheus text format for /metrics
+Per worker process; scrape each worker (or run one worker) for exact numbers
+"""
+import bisect
+import threading
+
+# Bucket upper bounds in seconds (1ms .. 10s)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: tuple, buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"buckets": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            series["buckets"][index] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: {"buckets": list(s["buckets"]), "sum": s["sum"], "count": s["count"]}
+                      for key, s in self._series.items()}
+        for key, s in sorted(series.items()):
+            labels = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key))
+            prefix = labels + "," if labels else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), s["buckets"]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{prefix}le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {s['sum']}")
+            lines.append(f"{self.name}_count{{{labels}}} {s['count']}")
+        return lines
+
+
+login_stage_seconds = Histogram(
+    "login_stage_duration_seconds",
+    "Duration of each login pipeline stage",
+    ("stage", "hash_mode"),
+)
+
+login_seconds = Histogram(
+    "login_duration_seconds",
+    "End-to-end login latency as logged for the attempt",
+    ("hash_mode", "result"),
+)
+
+REGISTRY = (login_stage_seconds, login_seconds)
+
+
+# Record one finished attempt: total latency plus each stage span
+def observe_attempt(hash_mode: str, result: str, latency_ms: float, stages: dict):
+    login_seconds.observe(latency_ms / 1000, hash_mode=hash_mode, result=result)
+    for stage, duration_ms in (stages or {}).items():
+        login_stage_seconds.observe(duration_ms / 1000, stage=stage, hash_mode=hash_mode)
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
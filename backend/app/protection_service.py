@@ -3,25 +3,26 @@ Protection Service - All protection-related logic
 Lockout, CAPTCHA, TOTP, rate limiting, and protection validation
 """
 from datetime import datetime, timedelta
+from sqlalchemy import update, select, case, func
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 from fastapi import HTTPException
 import random
 import string
-import base64
-from io import BytesIO
 
 from app.config import (
     PROTECTION_MODE, ProtectionMode,
-    MAX_FAILED_ATTEMPTS, LOCKOUT_DURATION_MINUTES,
-    MAX_CAPTCHA_FAILED_ATTEMPTS
+    LOCKOUT_DURATION_MINUTES, MAX_CAPTCHA_FAILED_ATTEMPTS
 )
-from app.database import User
-from captcha.image import ImageCaptcha
+from app.database import User, save_changes
+from app.rate_limiter import rate_limiter
+from app.captcha_service import captcha_pool
+from app.captcha_store import captcha_store
+from app.user_cache import track_user_change
+from app.spans import span
+from app.logger import get_logger
 
-
-# In-memory storage
-active_captcha_codes = {}
-rate_limit_requests = {}
+log = get_logger("protection")
 
 
 # Check if account is currently locked
@@ -37,17 +38,45 @@ def is_account_locked(user: User) -> bool:
     
     user.locked_until = None
     user.failed_attempts = 0
-    print(f"Lockout expired: {user.username}")
+    log.debug("Lockout expired: %s", user.username)
     return False
 
 
-# Apply lockout if threshold reached
-def apply_lockout(user: User, db: Session):
-    if PROTECTION_MODE == ProtectionMode.LOCKOUT:
-        if user.failed_attempts >= MAX_FAILED_ATTEMPTS:
-            user.locked_until = datetime.utcnow() + timedelta(minutes=LOCKOUT_DURATION_MINUTES)
-            db.commit()
-            print(f"Locked: {user.username} for {LOCKOUT_DURATION_MINUTES}min")
+# Count a failed attempt with one atomic UPDATE (and lock once lock_after is reached)
+# Returns the new failed_attempts; user is updated in place without reloading the row
+@span("failed_attempt_update")
+def register_failed_attempt(user: User, db: Session, lock_after: int = None) -> int:
+    # Pending ORM changes (e.g. an expired lockout reset) must land before the UPDATE
+    db.flush()
+    
+    new_count = func.coalesce(User.failed_attempts, 0) + 1
+    values = {"failed_attempts": new_count}
+    if lock_after:
+        values["locked_until"] = case(
+            (new_count >= lock_after, datetime.utcnow() + timedelta(minutes=LOCKOUT_DURATION_MINUTES)),
+            else_=User.locked_until
+        )
+    
+    stmt = (
+        update(User)
+        .where(User.id == user.id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if db.get_bind().dialect.update_returning:
+        row = db.execute(stmt.returning(User.failed_attempts, User.locked_until)).one()
+    else:
+        # SQLite < 3.35: the UPDATE holds the write lock until commit, so reading back is still exact
+        db.execute(stmt)
+        row = db.execute(select(User.failed_attempts, User.locked_until).where(User.id == user.id)).one()
+    
+    set_committed_value(user, "failed_attempts", row.failed_attempts)
+    set_committed_value(user, "locked_until", row.locked_until)
+    track_user_change(db, user)
+    
+    if lock_after and row.failed_attempts >= lock_after:
+        log.info("Locked: %s for %smin", user.username, LOCKOUT_DURATION_MINUTES)
+    return row.failed_attempts
 
 
 # Get remaining lockout time in minutes
@@ -62,7 +91,7 @@ def get_minutes_until_unlock(user: User) -> int:
 def validate_account_not_locked(user: User):
     if is_account_locked(user):
         minutes_left = get_minutes_until_unlock(user)
-        print(f"Account locked: {user.username} ({minutes_left}min left)")
+        log.debug("Account locked: %s (%smin left)", user.username, minutes_left)
         raise HTTPException(
             status_code=423,
             detail={"error": "Locked", "message": f"Account locked. Try again in {minutes_left} minutes."}
@@ -77,53 +106,42 @@ def requires_captcha(user: User) -> bool:
 
 
 # Validate CAPTCHA code
+@span("captcha_check")
 def is_captcha_valid(username: str, code: str) -> bool:
-    print(f"Validating CAPTCHA for {username}: '{code}'")
-    
-    if not code or username not in active_captcha_codes:
-        return False
-    
-    captcha_data = active_captcha_codes[username]
-    
-    if datetime.utcnow() > captcha_data["expires"]:
-        del active_captcha_codes[username]
-        return False
-    
-    if code.upper() == captcha_data["code"]:
-        del active_captcha_codes[username]
-        return True
-    
-    return False
+    log.debug("Validating CAPTCHA for %s: '%s'", username, code)
+    return captcha_store.solve(username, code)
 
 
 # Generate random 5-character CAPTCHA code
+@span("captcha_render")
 def generate_captcha_code(username: str, force_new: bool = False) -> str:
-    if force_new or username not in active_captcha_codes:
-        code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=5))
-        active_captcha_codes[username] = {
-            "code": code,
-            "expires": datetime.utcnow() + timedelta(minutes=5)
-        }
-        print(f"CAPTCHA generated for {username}: {code}")
-        return code
+    captcha_data = None if force_new else captcha_store.get(username)
+    if captcha_data:
+        return captcha_data["code"]
     
-    return active_captcha_codes[username]["code"]
+    code, image = captcha_pool.take()
+    captcha_store.issue(username, code, image)
+    log.debug("CAPTCHA generated for %s: %s", username, code)
+    return code
 
 
 # Generate CAPTCHA image and return as base64
 def generate_captcha_image(code: str) -> str:
-    image = ImageCaptcha(width=280, height=90)
-    data = image.generate(code)
-    buffered = BytesIO(data.read())
-    img_base64 = base64.b64encode(buffered.getvalue()).decode('utf-8')
-    return img_base64
+    return captcha_pool.render(code)[1]
+
+
+# Get the pre-rendered image for the user's active CAPTCHA code
+def get_captcha_image(username: str) -> str:
+    captcha_data = captcha_store.get(username)
+    if not captcha_data:
+        return None
+    return captcha_data["image"] or generate_captcha_image(captcha_data["code"])
 
 
 # Get active CAPTCHA code for user (for testing/attacks)
 def get_captcha_code(username: str) -> str:
-    if username in active_captcha_codes:
-        return active_captcha_codes[username]["code"]
-    return None
+    captcha_data = captcha_store.get(username)
+    return captcha_data["code"] if captcha_data else None
 
 
 # Check if CAPTCHA is valid - returns True/False
@@ -132,7 +150,7 @@ def validate_captcha(user: User, captcha_code: str) -> bool:
         return True
     
     is_valid = is_captcha_valid(user.username, captcha_code if captcha_code else "")
-    print(f"CAPTCHA {user.username}: {'Valid' if is_valid else 'Invalid'}")
+    log.debug("CAPTCHA %s: %s", user.username, 'Valid' if is_valid else 'Invalid')
     return is_valid
 
 
@@ -162,58 +180,44 @@ def get_totp_code(user: User) -> str:
 def ensure_totp_exists(user: User, db: Session):
     if not user.totp_secret:
         user.totp_secret = generate_totp_code()
-        db.commit()
-        print(f"TOTP generated for {user.username}: {user.totp_secret}")
+        save_changes(db)
+        log.debug("TOTP generated for %s: %s", user.username, user.totp_secret)
     else:
-        print(f"TOTP exists for {user.username}: {user.totp_secret}")
+        log.debug("TOTP exists for %s: %s", user.username, user.totp_secret)
 
 
 # Raise 401 if TOTP code is invalid
 def validate_totp(user: User, totp_code: str):
     if not totp_code:
-        print(f"TOTP missing: {user.username}")
+        log.debug("TOTP missing: %s", user.username)
         raise HTTPException(
             status_code=403,
             detail={"error": "totp_required", "message": "TOTP code required"}
         )
     
     if not verify_totp_code(user, totp_code):
-        print(f"TOTP invalid: {user.username}")
+        log.debug("TOTP invalid: %s", user.username)
         raise HTTPException(
             status_code=401,
             detail={"error": "totp_required", "message": "Invalid TOTP code"}
         )
     
-    print(f"TOTP valid: {user.username}")
+    log.debug("TOTP valid: %s", user.username)
 
 
 # Check and enforce rate limit
+@span("rate_limit")
 def check_rate_limit(ip: str, max_per_minute: int, endpoint: str):
-    now = datetime.utcnow()
-    cutoff = now - timedelta(seconds=60)
-    
-    if ip not in rate_limit_requests:
-        rate_limit_requests[ip] = []
-    
-    rate_limit_requests[ip] = [
-        (ts, ep) for ts, ep in rate_limit_requests[ip] if ts > cutoff
-    ]
-    
-    endpoint_requests = [
-        ts for ts, ep in rate_limit_requests[ip] if ep == endpoint
-    ]
+    allowed, retry_after, count = rate_limiter.hit(ip, endpoint, max_per_minute)
     
-    if len(endpoint_requests) >= max_per_minute:
-        oldest = min(endpoint_requests)
-        retry_after = int((oldest + timedelta(seconds=60) - now).total_seconds())
-        print(f"Rate limit exceeded: {ip} on {endpoint} ({len(endpoint_requests)}/{max_per_minute})")
+    if not allowed:
+        log.info("Rate limit exceeded: %s on %s (%s/%s)", ip, endpoint, count, max_per_minute)
         raise HTTPException(
             status_code=429,
             detail={"error": "Rate limiting", "message": f"Too many requests. Try again in {retry_after} seconds."}
         )
     
-    rate_limit_requests[ip].append((now, endpoint))
-    print(f"Rate limit OK: {ip} {len(endpoint_requests) + 1}/{max_per_minute} on {endpoint}")
+    log.debug("Rate limit OK: %s %s/%s on %s", ip, count, max_per_minute, endpoint)
 
 
 # Handle invalid CAPTCHA with correct password - dont increment failed_attempts
@@ -222,13 +226,13 @@ def handle_invalid_captcha(user: User, db: Session, start_time: float, ip: str):
     from app.config import HashMode, AttackResult
     import time
     
-    code = generate_captcha_code(user.username, force_new=True)
-    image = generate_captcha_image(code)
+    generate_captcha_code(user.username, force_new=True)
+    image = get_captcha_image(user.username)
     
     latency = (time.time() - start_time) * 1000
     log_attempt(db, AttackResult.CAPTCHA_REQUIRED, user.username, HashMode(user.hash_mode), latency, ip)
     
-    print(f"CAPTCHA invalid, password correct: {user.username}")
+    log.debug("CAPTCHA invalid, password correct: %s", user.username)
     
     raise HTTPException(
         status_code=403,
@@ -251,7 +255,7 @@ def handle_totp_required(user: User, db: Session, start_time: float, ip: str):
     latency = (time.time() - start_time) * 1000
     log_attempt(db, AttackResult.TOTP_REQUIRED, user.username, HashMode(user.hash_mode), latency, ip)
     
-    print(f"TOTP required: {user.username}")
+    log.debug("TOTP required: %s", user.username)
     
     raise HTTPException(
         status_code=403,
@@ -274,7 +278,7 @@ def handle_invalid_totp(user: User, db: Session, start_time: float, ip: str):
     latency = (time.time() - start_time) * 1000
     log_attempt(db, AttackResult.TOTP_REQUIRED, user.username, HashMode(user.hash_mode), latency, ip)
     
-    print(f"TOTP invalid, password correct: {user.username}")
+    log.debug("TOTP invalid, password correct: %s", user.username)
     
     raise HTTPException(
         status_code=401,
@@ -291,18 +295,17 @@ def reset_protection_state(user: User, db: Session):
     user.failed_attempts = 0
     user.locked_until = None
     
-    if user.username in active_captcha_codes:
-        del active_captcha_codes[user.username]
+    captcha_store.discard(user.username)
     
-    db.commit()
-    print(f"Protection reset: {user.username}")
+    save_changes(db)
+    log.debug("Protection reset: %s", user.username)
 
 
 # Clean up protection data that doesn't match current mode
 def cleanup_stale_protection_data(user: User, db: Session):
     changed = False
     
-    print(f"Cleanup {user.username}: mode={PROTECTION_MODE.name}, attempts={user.failed_attempts}, locked={bool(user.locked_until)}, totp={bool(user.totp_secret)}")
+    log.debug("Cleanup %s: mode=%s, attempts=%s, locked=%s, totp=%s", user.username, PROTECTION_MODE.name, user.failed_attempts, bool(user.locked_until), bool(user.totp_secret))
     
     match PROTECTION_MODE:
         case ProtectionMode.NONE | ProtectionMode.RATE_LIMITING:
@@ -315,15 +318,13 @@ def cleanup_stale_protection_data(user: User, db: Session):
             if user.totp_secret:
                 user.totp_secret = None
                 changed = True
-            if user.username in active_captcha_codes:
-                del active_captcha_codes[user.username]
+            captcha_store.discard(user.username)
         
         case ProtectionMode.LOCKOUT:
             if user.totp_secret:
                 user.totp_secret = None
                 changed = True
-            if user.username in active_captcha_codes:
-                del active_captcha_codes[user.username]
+            captcha_store.discard(user.username)
         
         case ProtectionMode.CAPTCHA:
             if user.locked_until:
@@ -340,9 +341,8 @@ def cleanup_stale_protection_data(user: User, db: Session):
             if user.locked_until:
                 user.locked_until = None
                 changed = True
-            if user.username in active_captcha_codes:
-                del active_captcha_codes[user.username]
+            captcha_store.discard(user.username)
     
     if changed:
-        db.commit()
-        print(f"Cleanup done: attempts={user.failed_attempts}, locked={bool(user.locked_until)}, totp={bool(user.totp_secret)}")
\ No newline at end of file
+        save_changes(db)
+        log.debug("Cleanup done: attempts=%s, locked=%s, totp=%s", user.failed_attempts, bool(user.locked_until), bool(user.totp_secret))
\ No newline at end of file
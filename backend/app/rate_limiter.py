@@ -0,0 +1,179 @@
+"""
+Rate Limiter Engine - Per-(ip, endpoint) request limiting
+Token bucket and sliding-window counter algorithms, memory or shared SQLite state
+"""
+import math
+import threading
+import time
+
+from app.config import (
+    RATE_LIMIT_ALGORITHM, RATE_LIMIT_BACKEND, SHARED_STATE_SQLITE_PATH,
+    RATE_LIMIT_WINDOW_SECONDS, RATE_LIMIT_EVICT_INTERVAL_SECONDS
+)
+from app.shared_state import SQLiteConnections
+from app.logger import get_logger
+
+log = get_logger("rate_limit")
+
+
+# Every algorithm keeps a fixed 3-float state per key: (a, b, c)
+EMPTY_STATE = (0.0, 0.0, 0.0)
+
+
+# State: (window_start, current_count, previous_count)
+class SlidingWindowCounter:
+    def consume(self, state: tuple, now: float, limit: int, window: float):
+        window_start, current, previous = state
+        current_start = now - (now % window)
+
+        if window_start != current_start:
+            previous = current if window_start == current_start - window else 0.0
+            current = 0.0
+            window_start = current_start
+
+        # Weight the previous window by how much of it still overlaps
+        elapsed = now - current_start
+        estimated = previous * (1 - elapsed / window) + current
+
+        if estimated >= limit:
+            if current >= limit or previous == 0:
+                retry_after = current_start + window - now
+            else:
+                retry_after = window * (1 - (limit - current) / previous) - elapsed
+            return (window_start, current, previous), False, max(1, math.ceil(retry_after)), int(estimated)
+
+        current += 1
+        return (window_start, current, previous), True, 0, int(estimated) + 1
+
+
+# State: (tokens, last_refill, unused)
+class TokenBucket:
+    def consume(self, state: tuple, now: float, limit: int, window: float):
+        tokens, last_refill, _ = state
+        rate = limit / window
+
+        if last_refill == 0:
+            tokens = float(limit)
+        else:
+            tokens = min(float(limit), tokens + (now - last_refill) * rate)
+
+        if tokens < 1:
+            retry_after = (1 - tokens) / rate
+            return (tokens, now, 0.0), False, max(1, math.ceil(retry_after)), limit
+
+        tokens -= 1
+        return (tokens, now, 0.0), True, 0, limit - int(tokens)
+
+
+class MemoryBackend:
+    def __init__(self):
+        self._states = {}
+        self._last_seen = {}
+        self._lock = threading.Lock()
+
+    # Apply fn to the key's state atomically and store the result
+    def update(self, key: str, now: float, fn):
+        with self._lock:
+            new_state, *result = fn(self._states.get(key, EMPTY_STATE))
+            self._states[key] = new_state
+            self._last_seen[key] = now
+        return result
+
+    def evict_idle(self, cutoff: float) -> int:
+        with self._lock:
+            idle = [k for k, seen in self._last_seen.items() if seen < cutoff]
+            for key in idle:
+                del self._states[key]
+                del self._last_seen[key]
+        return len(idle)
+
+    def size(self) -> int:
+        return len(self._states)
+
+
+# Shared state for multiple uvicorn workers on the same host
+class SQLiteBackend:
+    def __init__(self, path: str):
+        self.connections = SQLiteConnections(path)
+        conn = self.connections.get()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits ("
+            "key TEXT PRIMARY KEY, a REAL, b REAL, c REAL, last_seen REAL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_rate_limits_last_seen ON rate_limits (last_seen)")
+
+    def update(self, key: str, now: float, fn):
+        def apply(conn):
+            row = conn.execute("SELECT a, b, c FROM rate_limits WHERE key = ?", (key,)).fetchone()
+            new_state, *result = fn(tuple(row) if row else EMPTY_STATE)
+            conn.execute(
+                "INSERT INTO rate_limits (key, a, b, c, last_seen) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET a = excluded.a, b = excluded.b, "
+                "c = excluded.c, last_seen = excluded.last_seen",
+                (key, *new_state, now)
+            )
+            return result
+        return self.connections.transaction(apply)
+
+    def evict_idle(self, cutoff: float) -> int:
+        cursor = self.connections.get().execute("DELETE FROM rate_limits WHERE last_seen < ?", (cutoff,))
+        return cursor.rowcount
+
+    def size(self) -> int:
+        return self.connections.get().execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+
+
+ALGORITHMS = {
+    "sliding_window": SlidingWindowCounter,
+    "token_bucket": TokenBucket,
+}
+
+
+class RateLimiter:
+    def __init__(self, algorithm, backend, window: float, evict_interval: float):
+        self.algorithm = algorithm
+        self.backend = backend
+        self.window = window
+        self.evict_interval = evict_interval
+        self._next_eviction = time.time() + evict_interval
+
+    # Returns (allowed, retry_after_seconds, current_count)
+    def hit(self, ip: str, endpoint: str, limit: int):
+        now = time.time()
+        self._maybe_evict(now)
+        return self.backend.update(
+            f"{ip}|{endpoint}", now,
+            lambda state: self.algorithm.consume(state, now, limit, self.window)
+        )
+
+    # Drop keys idle for over two windows - their state is fully expired
+    def _maybe_evict(self, now: float):
+        if now < self._next_eviction:
+            return
+        self._next_eviction = now + self.evict_interval
+        evicted = self.backend.evict_idle(now - 2 * self.window)
+        if evicted:
+            log.debug("Evicted %s idle keys", evicted)
+
+
+def create_rate_limiter() -> RateLimiter:
+    if RATE_LIMIT_ALGORITHM not in ALGORITHMS:
+        raise ValueError(f"Unknown rate limit algorithm: {RATE_LIMIT_ALGORITHM}")
+
+    match RATE_LIMIT_BACKEND:
+        case "memory":
+            backend = MemoryBackend()
+        case "sqlite":
+            backend = SQLiteBackend(SHARED_STATE_SQLITE_PATH)
+        case _:
+            raise ValueError(f"Unknown rate limit backend: {RATE_LIMIT_BACKEND}")
+
+    return RateLimiter(
+        ALGORITHMS[RATE_LIMIT_ALGORITHM](),
+        backend,
+        window=RATE_LIMIT_WINDOW_SECONDS,
+        evict_interval=RATE_LIMIT_EVICT_INTERVAL_SECONDS
+    )
+
+
+rate_limiter = create_rate_limiter()
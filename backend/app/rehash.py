@@ -0,0 +1,157 @@
+"""
+Rehash on Login - Move users to the current HASH_MODE and cost parameters after a successful login
+The new hash is computed in the hash pool and written by a background thread, never in the request
+"""
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.config import (
+    HASH_MODE, BCRYPT_COST, ARGON2_TIME_COST, ARGON2_MEMORY_COST, ARGON2_PARALLELISM, HashMode
+)
+from app.database import SessionLocal, User
+from app.hash_executor import HashQueueFull, submit_hash
+from app.hash_utils import parse_hash
+from app.user_cache import user_cache
+from app.logger import get_logger
+
+log = get_logger("rehash")
+
+
+# Cost parameters a freshly created hash would have (same shape as parse_hash()["cost"])
+def target_cost(hash_mode: HashMode) -> dict:
+    match hash_mode:
+        case HashMode.BCRYPT:
+            return {"rounds": BCRYPT_COST}
+        case HashMode.ARGON2ID:
+            return {"m": ARGON2_MEMORY_COST, "t": ARGON2_TIME_COST, "p": ARGON2_PARALLELISM}
+        case _:
+            return None
+
+
+def needs_rehash(user: User, parsed: dict = None) -> bool:
+    if user.hash_mode != HASH_MODE.value:
+        return True
+    parsed = parsed or parse_hash(user.password_hash, HashMode(user.hash_mode))
+    return parsed["cost"] != target_cost(HASH_MODE)
+
+
+class Rehasher:
+    def __init__(self):
+        self.counters = Counter()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._writer = None
+
+    def _get_writer(self) -> ThreadPoolExecutor:
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rehash-writer")
+        return self._writer
+
+    # Queue a rehash if the user is on an old mode/cost; never blocks or fails the login
+    def schedule(self, user: User, password: str, parsed: dict = None):
+        if not password or not needs_rehash(user, parsed):
+            return
+        with self._lock:
+            if user.id in self._pending:
+                return
+            self._pending.add(user.id)
+
+        try:
+            future = submit_hash(password, HASH_MODE, wait=False)
+        except HashQueueFull:
+            # Login traffic has priority - try again on the next successful login
+            self._done(user.id, "skipped_busy")
+            return
+
+        self.counters["scheduled"] += 1
+        user_id, username, old_hash = user.id, user.username, user.password_hash
+        future.add_done_callback(
+            lambda f: self._get_writer().submit(self._write, f, user_id, username, old_hash)
+        )
+
+    # Store the new hash only if the row still holds the hash that was verified
+    def _write(self, future, user_id: int, username: str, old_hash: str):
+        db = SessionLocal()
+        try:
+            new_hash = future.result()
+            result = db.execute(
+                update(User)
+                .where(User.id == user_id, User.password_hash == old_hash)
+                .values(password_hash=new_hash, hash_mode=HASH_MODE.value)
+            )
+            db.commit()
+            user_cache.invalidate(username)
+            if result.rowcount:
+                log.debug("Rehashed %s to %s", username, HASH_MODE.value)
+                self._done(user_id, "rehashed")
+            else:
+                self._done(user_id, "conflicts")
+        except Exception as e:
+            db.rollback()
+            log.error("Rehash failed for %s: %s", username, e)
+            self._done(user_id, "failed")
+        finally:
+            db.close()
+
+    def _done(self, user_id: int, outcome: str):
+        with self._lock:
+            self._pending.discard(user_id)
+            self.counters[outcome] += 1
+
+    def stop(self):
+        if self._writer is not None:
+            self._writer.shutdown(wait=True)
+            self._writer = None
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "scheduled": self.counters["scheduled"],
+            "rehashed": self.counters["rehashed"],
+            "conflicts": self.counters["conflicts"],
+            "skipped_busy": self.counters["skipped_busy"],
+            "failed": self.counters["failed"],
+        }
+
+
+def _cost_label(cost: dict) -> str:
+    if not cost:
+        return "-"
+    return ",".join(f"{key}={value}" for key, value in sorted(cost.items()))
+
+
+# Users per (hash_mode, cost) and how many still differ from the current settings
+def hash_mode_report(db: Session) -> dict:
+    current_cost = target_cost(HASH_MODE)
+    counts = Counter()
+    outdated = 0
+    total = 0
+
+    rows = db.query(User.hash_mode, User.password_hash).execution_options(yield_per=1000)
+    for hash_mode, password_hash in rows:
+        cost = parse_hash(password_hash, HashMode(hash_mode))["cost"]
+        counts[(hash_mode, _cost_label(cost))] += 1
+        total += 1
+        if hash_mode != HASH_MODE.value or cost != current_cost:
+            outdated += 1
+
+    return {
+        "current": {"hash_mode": HASH_MODE.value, "cost": _cost_label(current_cost)},
+        "total_users": total,
+        "outdated_users": outdated,
+        "by_mode": [
+            {"hash_mode": mode, "cost": cost, "users": count,
+             "current": mode == HASH_MODE.value and cost == _cost_label(current_cost)}
+            for (mode, cost), count in sorted(counts.items())
+        ],
+        "rehash": rehasher.stats(),
+    }
+
+
+rehasher = Rehasher()
@@ -0,0 +1,33 @@
+"""
+Shared State - SQLite connections for state shared across uvicorn workers
+"""
+import sqlite3
+import threading
+
+
+class SQLiteConnections:
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    # One autocommit connection per thread, WAL so readers don't block the writer
+    def get(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # Run fn(conn) inside BEGIN IMMEDIATE - atomic read-modify-write across processes
+    def transaction(self, fn):
+        conn = self.get()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return result
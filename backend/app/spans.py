@@ -0,0 +1,34 @@
+"""
+Login Spans - Per-stage timers for the login pipeline
+One span dict per request (context variable), stages add their elapsed milliseconds
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current_spans: ContextVar = ContextVar("login_spans", default=None)
+
+
+# Start collecting spans for the current request (or switch to a batch pair's own dict)
+def start_spans(spans: dict = None) -> dict:
+    spans = {} if spans is None else spans
+    _current_spans.set(spans)
+    return spans
+
+
+def current_spans() -> dict:
+    return _current_spans.get()
+
+
+# Time a stage; repeated stages within one request are summed, no-op outside a login
+@contextmanager
+def span(name: str):
+    spans = _current_spans.get()
+    if spans is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        spans[name] = round(spans.get(name, 0.0) + (time.perf_counter() - start) * 1000, 3)
@@ -0,0 +1,193 @@
+"""
+User Cache - Read-through LRU/TTL cache of user rows for the login hot path
+Holds column values plus parsed hash metadata; a cache hit needs no database query
+Committed user changes (counters, lockout, TOTP, rehash) invalidate the entry instead of writing through,
+and the invalidation is shared across uvicorn workers with the sqlite backend
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.config import (
+    USER_CACHE_BACKEND, USER_CACHE_SIZE, USER_CACHE_TTL_SECONDS, SHARED_STATE_SQLITE_PATH, HashMode
+)
+from app.database import User
+from app.hash_utils import parse_hash
+from app.shared_state import SQLiteConnections
+
+
+USER_COLUMNS = [attr.key for attr in User.__mapper__.column_attrs]
+
+
+# Invalidation version per username - bumped on every committed change, this process only
+class MemoryInvalidations:
+    def __init__(self):
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def version(self, username: str) -> int:
+        return self._versions.get(username, 0)
+
+    def bump(self, username: str):
+        with self._lock:
+            self._versions[username] = self._versions.get(username, 0) + 1
+
+
+# Shared across uvicorn workers on the same host - a lockout committed by one worker
+# invalidates the entry cached by all the others
+class SQLiteInvalidations:
+    def __init__(self, path: str):
+        self.connections = SQLiteConnections(path)
+        self.connections.get().execute(
+            "CREATE TABLE IF NOT EXISTS user_cache_versions (username TEXT PRIMARY KEY, version INTEGER)"
+        )
+
+    def version(self, username: str) -> int:
+        row = self.connections.get().execute(
+            "SELECT version FROM user_cache_versions WHERE username = ?", (username,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def bump(self, username: str):
+        self.connections.get().execute(
+            "INSERT INTO user_cache_versions (username, version) VALUES (?, 1) "
+            "ON CONFLICT(username) DO UPDATE SET version = version + 1",
+            (username,)
+        )
+
+
+class UserCache:
+    def __init__(self, invalidations, max_size: int, ttl_seconds: float):
+        self.invalidations = invalidations
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+
+    # Version to pass to put() - read it before loading the row, so a change committed
+    # between the load and the put still invalidates the new entry
+    def version(self, username: str) -> int:
+        return self.invalidations.version(username)
+
+    # Return cached column values or None (expired or invalidated entries count as a miss)
+    def get(self, username: str) -> dict:
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is not None and entry["expires"] < time.monotonic():
+                del self._entries[username]
+                entry = None
+        if entry is not None and entry["version"] != self.invalidations.version(username):
+            with self._lock:
+                if self._entries.get(username) is entry:
+                    del self._entries[username]
+            entry = None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            if username in self._entries:
+                self._entries.move_to_end(username)
+            self.hits += 1
+            return entry["values"]
+
+    # Store a snapshot of a freshly loaded row
+    def put(self, user: User, version: int):
+        with self._lock:
+            self._entries[user.username] = {
+                "values": {key: getattr(user, key) for key in USER_COLUMNS},
+                "version": version,
+                "hash_info": None,
+                "expires": time.monotonic() + self.ttl_seconds,
+            }
+            self._entries.move_to_end(user.username)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    # Drop the entry here and, through the version bump, in every worker sharing the backend
+    def invalidate(self, username: str):
+        with self._lock:
+            self._entries.pop(username, None)
+            self.invalidated += 1
+        self.invalidations.bump(username)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    # Parsed hash metadata - parsed once per cached user, re-parsed if the hash changed
+    def hash_info(self, user: User) -> dict:
+        with self._lock:
+            entry = self._entries.get(user.username)
+            cached = entry["hash_info"] if entry else None
+        if cached and cached["stored_hash"] == user.password_hash:
+            return cached["parsed"]
+
+        parsed = parse_hash(user.password_hash, HashMode(user.hash_mode))
+        with self._lock:
+            entry = self._entries.get(user.username)
+            if entry and entry["values"]["password_hash"] == user.password_hash:
+                entry["hash_info"] = {"stored_hash": user.password_hash, "parsed": parsed}
+        return parsed
+
+    def stats(self) -> dict:
+        return {
+            "backend": USER_CACHE_BACKEND,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidated": self.invalidated,
+        }
+
+
+# Rebuild a session-bound User from cached values without a SELECT
+def attach_cached_user(db: Session, values: dict) -> User:
+    user = User(**values)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+def create_user_cache() -> UserCache:
+    match USER_CACHE_BACKEND:
+        case "memory":
+            invalidations = MemoryInvalidations()
+        case "sqlite":
+            invalidations = SQLiteInvalidations(SHARED_STATE_SQLITE_PATH)
+        case _:
+            raise ValueError(f"Unknown user cache backend: {USER_CACHE_BACKEND}")
+
+    return UserCache(invalidations, max_size=USER_CACHE_SIZE, ttl_seconds=USER_CACHE_TTL_SECONDS)
+
+
+user_cache = create_user_cache()
+
+
+# Register a change made outside the ORM flush (e.g. an atomic UPDATE) for the commit-time invalidation
+def track_user_change(session: Session, user: User):
+    session.info.setdefault("changed_users", set()).add(user.username)
+
+
+# Collect users written by a flush, invalidate them once the commit lands
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session, flush_context):
+    changed = session.info.setdefault("changed_users", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User):
+            changed.add(obj.username)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session):
+    for username in session.info.pop("changed_users", ()):
+        user_cache.invalidate(username)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_users(session):
+    session.info.pop("changed_users", None)
@@ -0,0 +1,126 @@
+"""
+Concurrency benchmark for failed-attempt counters
+Fires N parallel failed attempts at one account and checks the stored count is exact
+"""
+import sys
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.database import Base, engine, SessionLocal, User
+from app.protection_service import register_failed_attempt
+
+BENCH_USERNAME = "bench_concurrency"
+
+
+def reset_bench_user() -> int:
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == BENCH_USERNAME).first()
+        if not user:
+            user = User(
+                username=BENCH_USERNAME,
+                password_hash="x",
+                password_strength="weak",
+                hash_mode="plain",
+            )
+            db.add(user)
+        user.failed_attempts = 0
+        user.locked_until = None
+        db.commit()
+        return user.id
+    finally:
+        db.close()
+
+
+def read_failed_attempts(user_id: int) -> int:
+    db = SessionLocal()
+    try:
+        return db.get(User, user_id).failed_attempts
+    finally:
+        db.close()
+
+
+# Old behaviour: load row, += 1 in Python, commit
+def orm_increment(user_id: int):
+    db = SessionLocal()
+    try:
+        user = db.get(User, user_id)
+        user.failed_attempts += 1
+        db.commit()
+    finally:
+        db.close()
+
+
+# New behaviour: single atomic UPDATE ... RETURNING
+def atomic_increment(user_id: int):
+    db = SessionLocal()
+    try:
+        user = db.get(User, user_id)
+        register_failed_attempt(user, db)
+        db.commit()
+    finally:
+        db.close()
+
+
+def run(increment, attempts: int, concurrency: int) -> dict:
+    user_id = reset_bench_user()
+    barrier = threading.Barrier(min(attempts, concurrency))
+    errors = []
+
+    def attempt(_):
+        try:
+            barrier.wait(timeout=10)
+        except threading.BrokenBarrierError:
+            pass
+        try:
+            increment(user_id)
+        except Exception as e:
+            errors.append(e)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(attempt, range(attempts)))
+    elapsed = time.perf_counter() - start
+
+    stored = read_failed_attempts(user_id)
+    return {
+        "expected": attempts - len(errors),
+        "stored": stored,
+        "lost_updates": attempts - len(errors) - stored,
+        "errors": len(errors),
+        "elapsed_s": round(elapsed, 3),
+        "attempts_per_sec": round(attempts / elapsed, 1) if elapsed else 0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Failed-attempt counter concurrency benchmark")
+    parser.add_argument("--attempts", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=200)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+
+    print("=" * 60)
+    print(f"Database: {engine.dialect.name} | attempts={args.attempts} | concurrency={args.concurrency}")
+    print("=" * 60)
+
+    results = {}
+    for name, increment in [("orm", orm_increment), ("atomic", atomic_increment)]:
+        results[name] = run(increment, args.attempts, args.concurrency)
+        r = results[name]
+        print(f"  {name:7} expected={r['expected']:5} stored={r['stored']:5} "
+              f"lost={r['lost_updates']:4} errors={r['errors']:3} "
+              f"{r['attempts_per_sec']:8.1f} attempts/sec")
+
+    print("=" * 60)
+    if results["atomic"]["lost_updates"] == 0:
+        print("[SUCCESS] Atomic counter is exact")
+    else:
+        print("[FAILED] Atomic counter lost updates")
+        sys.exit(1)
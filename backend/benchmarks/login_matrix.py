@@ -0,0 +1,233 @@
+"""
+Login benchmark matrix - every ProtectionMode x HashMode cell against an in-process app on SQLite
+Each cell runs in a fresh subprocess (own temp dir, DB and hash pool) with the same fixed workload,
+and the JSON report (throughput, p50/p95/p99, CPU, RSS per cell) is meant to be diffed across commits.
+Throughput and percentiles count only requests that reached the hash pool; 503 "hash queue full"
+rejections are reported separately and make the cell invalid
+"""
+import sys
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import resource
+import subprocess
+import tempfile
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+DEFAULT_REPORT = BACKEND_DIR / "benchmarks" / "results" / "login_matrix.json"
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values: list, p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+# Same attempts for every cell: (username, password) pairs from a seeded RNG
+def build_workload(users: int, attempts: int, success_ratio: float, seed: int) -> list:
+    rng = random.Random(seed)
+    workload = []
+    for i in range(attempts):
+        n = rng.randrange(users)
+        correct = rng.random() < success_ratio
+        workload.append((f"bench{n}", f"pass{n}" if correct else f"wrong{i}"))
+    return workload
+
+
+# ---- child process: one matrix cell ----
+
+def run_cell(protection: str, hash_mode: str, args) -> dict:
+    from app import config
+    config.PROTECTION_MODE = config.ProtectionMode[protection]
+    config.HASH_MODE = config.HashMode(hash_mode)
+
+    import httpx
+    from sqlalchemy import insert
+    from app.database import Base, engine, SessionLocal, User
+    from app.hash_utils import hash_password
+    from app.hash_executor import shutdown_executor
+    from app import main
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        db.execute(insert(User), [
+            {
+                "username": f"bench{n}",
+                "password_hash": hash_password(f"pass{n}", config.HASH_MODE),
+                "password_strength": "weak",
+                "hash_mode": config.HASH_MODE.value,
+                "failed_attempts": 0,
+            }
+            for n in range(args.users)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+    workload = build_workload(args.users, args.attempts, args.success_ratio, args.seed)
+
+    async def drive() -> tuple:
+        await main.on_startup()
+        latencies = []
+        statuses = Counter()
+        semaphore = asyncio.Semaphore(args.concurrency)
+        transport = httpx.ASGITransport(app=main.app, client=("10.0.0.1", 50000))
+
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            async def attempt(username: str, password: str):
+                async with semaphore:
+                    t0 = time.perf_counter()
+                    response = await client.post("/api/login", json={"username": username, "password": password})
+                    if response.status_code != 503:
+                        latencies.append((time.perf_counter() - t0) * 1000)
+                    statuses[response.status_code] += 1
+
+            start = time.perf_counter()
+            await asyncio.gather(*(attempt(u, p) for u, p in workload))
+            elapsed = time.perf_counter() - start
+
+        await main.on_shutdown()
+        return latencies, statuses, elapsed
+
+    usage_before = resource.getrusage(resource.RUSAGE_SELF)
+    latencies, statuses, elapsed = asyncio.run(drive())
+    shutdown_executor()
+    usage_self = resource.getrusage(resource.RUSAGE_SELF)
+    usage_children = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    latencies.sort()
+    cpu_seconds = (usage_self.ru_utime - usage_before.ru_utime) + (usage_self.ru_stime - usage_before.ru_stime) \
+        + usage_children.ru_utime + usage_children.ru_stime
+    return {
+        "protection_mode": protection,
+        "hash_mode": hash_mode,
+        "requests": len(latencies),
+        "rejected_503": statuses[503],
+        "valid": statuses[503] == 0,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        **{f"p{p}_ms": round(percentile(latencies, p), 3) for p in PERCENTILES},
+        "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        "cpu_s": round(cpu_seconds, 3),
+        "max_rss_mb": round(usage_self.ru_maxrss / 1024, 1),
+        "worker_max_rss_mb": round(usage_children.ru_maxrss / 1024, 1),
+        "status_counts": {str(k): v for k, v in sorted(statuses.items())},
+    }
+
+
+# ---- parent process: matrix driver ----
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def spawn_cell(protection: str, hash_mode: str, args) -> dict:
+    with tempfile.TemporaryDirectory(prefix="login_bench_") as workdir:
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{Path(workdir) / 'bench.db'}",
+            "LOG_LEVEL": "WARNING",
+            "PYTHONPATH": str(BACKEND_DIR),
+            # Every in-flight request must get a pool slot, otherwise the cell measures 503s
+            "HASH_QUEUE_SIZE": str(max(args.concurrency, int(os.environ.get("HASH_QUEUE_SIZE", 0)))),
+        }
+        command = [
+            sys.executable, str(Path(__file__).resolve()), "--cell", f"{protection}:{hash_mode}",
+            "--users", str(args.users), "--attempts", str(args.attempts),
+            "--concurrency", str(args.concurrency), "--success-ratio", str(args.success_ratio),
+            "--seed", str(args.seed),
+        ]
+        proc = subprocess.run(command, cwd=workdir, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {"protection_mode": protection, "hash_mode": hash_mode,
+                "error": (proc.stderr.strip().splitlines() or ["failed"])[-1]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def run_matrix(args):
+    from app.config import ProtectionMode, HashMode
+
+    protections = args.protection or [m.name for m in ProtectionMode]
+    hash_modes = args.hash_mode or [m.value for m in HashMode]
+
+    print("=" * 78)
+    print(f"Login matrix | users={args.users} attempts={args.attempts} "
+          f"concurrency={args.concurrency} seed={args.seed}")
+    print("=" * 78)
+
+    cells = []
+    for protection in protections:
+        for hash_mode in hash_modes:
+            cell = spawn_cell(protection, hash_mode, args)
+            cells.append(cell)
+            if "error" in cell:
+                print(f"  {protection:14} {hash_mode:9} [ERROR] {cell['error']}")
+            else:
+                print(f"  {protection:14} {hash_mode:9} {cell['throughput_rps']:8.1f} req/s | "
+                      f"p50 {cell['p50_ms']:8.2f} p95 {cell['p95_ms']:8.2f} p99 {cell['p99_ms']:8.2f} ms | "
+                      f"cpu {cell['cpu_s']:6.2f}s rss {cell['max_rss_mb']:6.1f}MB")
+                if not cell["valid"]:
+                    print(f"  {'':24} [INVALID] {cell['rejected_503']} requests rejected with 503")
+
+    report = {
+        "benchmark": "login_matrix",
+        "commit": git_commit(),
+        "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "workload": {
+            "users": args.users,
+            "attempts": args.attempts,
+            "concurrency": args.concurrency,
+            "success_ratio": args.success_ratio,
+            "seed": args.seed,
+        },
+        "cells": cells,
+    }
+
+    out = Path(args.output)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+    print("=" * 78)
+    print(f"[SUCCESS] Report written to {out}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ProtectionMode x HashMode login benchmark")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--attempts", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--success-ratio", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=1215067)
+    parser.add_argument("--protection", action="append", help="limit to these ProtectionMode names")
+    parser.add_argument("--hash-mode", action="append", help="limit to these HashMode values")
+    parser.add_argument("--output", default=str(DEFAULT_REPORT))
+    parser.add_argument("--cell", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.cell:
+        protection, hash_mode = args.cell.split(":")
+        print(json.dumps(run_cell(protection, hash_mode, args)))
+    else:
+        run_matrix(args)
@@ -0,0 +1,194 @@
+"""
+Calibrate hash parameters
+Measures bcrypt/argon2id hash + verify time on this machine and picks the strongest
+settings within a target verification latency and a concurrent memory budget
+"""
+import sys
+import re
+import json
+import time
+import argparse
+import statistics
+import contextlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / 'app'))
+
+import bcrypt
+from argon2 import PasswordHasher
+
+from app.config import (
+    PEPPER, HASH_WORKERS, BCRYPT_COST,
+    ARGON2_TIME_COST, ARGON2_MEMORY_COST, ARGON2_PARALLELISM
+)
+
+ENV_FILE = Path(__file__).parent / '.env'
+SAMPLE_PASSWORD = f"correct horse battery staple{PEPPER}"
+BCRYPT_MIN_COST = 4
+BCRYPT_MAX_COST = 20
+ARGON2_MIN_MEMORY_KIB = 8 * 1024
+ARGON2_MAX_TIME_COST = 20
+
+
+# Median of hash and verify time (ms) over samples runs
+def measure(hash_fn, verify_fn, samples: int) -> dict:
+    hash_ms, verify_ms = [], []
+    for _ in range(samples):
+        t0 = time.perf_counter()
+        stored = hash_fn()
+        t1 = time.perf_counter()
+        verify_fn(stored)
+        t2 = time.perf_counter()
+        hash_ms.append((t1 - t0) * 1000)
+        verify_ms.append((t2 - t1) * 1000)
+    return {
+        "hash_ms": round(statistics.median(hash_ms), 2),
+        "verify_ms": round(statistics.median(verify_ms), 2),
+    }
+
+
+def measure_bcrypt(cost: int, samples: int) -> dict:
+    password = SAMPLE_PASSWORD.encode()
+    return measure(
+        lambda: bcrypt.hashpw(password, bcrypt.gensalt(rounds=cost)),
+        lambda stored: bcrypt.checkpw(password, stored),
+        samples
+    )
+
+
+def measure_argon2(time_cost: int, memory_kib: int, parallelism: int, samples: int) -> dict:
+    hasher = PasswordHasher(time_cost=time_cost, memory_cost=memory_kib, parallelism=parallelism)
+    return measure(
+        lambda: hasher.hash(SAMPLE_PASSWORD),
+        lambda stored: hasher.verify(stored, SAMPLE_PASSWORD),
+        samples
+    )
+
+
+# Highest bcrypt cost whose verify time stays within target (each +1 doubles the work)
+def calibrate_bcrypt(target_ms: float, samples: int) -> dict:
+    print("bcrypt:")
+    best = None
+    for cost in range(BCRYPT_MIN_COST, BCRYPT_MAX_COST + 1):
+        timing = measure_bcrypt(cost, samples if cost < 12 else max(1, samples // 2))
+        print(f"  cost={cost:2}  hash {timing['hash_ms']:9.2f} ms  verify {timing['verify_ms']:9.2f} ms")
+        if timing["verify_ms"] > target_ms:
+            break
+        best = {"cost": cost, **timing}
+    return best or {"cost": BCRYPT_MIN_COST, **measure_bcrypt(BCRYPT_MIN_COST, samples)}
+
+
+# Memory first (largest power of two that fits budget / concurrency), then time cost up to target.
+# None when the budget cannot give every concurrent verification the minimum memory
+def calibrate_argon2(target_ms: float, memory_budget_mb: int, concurrency: int,
+                     parallelism: int, samples: int) -> dict:
+    print("argon2id:")
+    per_hash_kib = memory_budget_mb * 1024 // max(1, concurrency)
+    if per_hash_kib < ARGON2_MIN_MEMORY_KIB:
+        print(f"  {per_hash_kib} KiB per verification is below the {ARGON2_MIN_MEMORY_KIB // 1024} MiB minimum")
+        return None
+    memory_kib = ARGON2_MIN_MEMORY_KIB
+    while memory_kib * 2 <= per_hash_kib:
+        memory_kib *= 2
+
+    best = None
+    while best is None:
+        for time_cost in range(1, ARGON2_MAX_TIME_COST + 1):
+            timing = measure_argon2(time_cost, memory_kib, parallelism, samples)
+            print(f"  m={memory_kib // 1024:5} MiB t={time_cost:2} p={parallelism}  "
+                  f"hash {timing['hash_ms']:9.2f} ms  verify {timing['verify_ms']:9.2f} ms")
+            if timing["verify_ms"] > target_ms:
+                break
+            best = {"time_cost": time_cost, "memory_kib": memory_kib, "parallelism": parallelism, **timing}
+        if best is None:
+            if memory_kib <= ARGON2_MIN_MEMORY_KIB:
+                best = {"time_cost": 1, "memory_kib": memory_kib, "parallelism": parallelism, **timing}
+            memory_kib //= 2
+    return best
+
+
+# Replace or append KEY=value lines, leaving the rest of the file untouched
+def write_env(path: Path, values: dict):
+    lines = path.read_text().splitlines() if path.exists() else []
+    remaining = dict(values)
+    for i, line in enumerate(lines):
+        match = re.match(r"\s*(?:export\s+)?([A-Z0-9_]+)\s*=", line)
+        if match and match.group(1) in remaining:
+            lines[i] = f"{match.group(1)}={remaining.pop(match.group(1))}"
+    lines.extend(f"{key}={value}" for key, value in remaining.items())
+    path.write_text("\n".join(lines) + "\n")
+
+
+# Measure both algorithms, write .env unless dry run; None when no argon2id setting fits the budget
+def calibrate(args) -> dict:
+    print("=" * 60)
+    print(f"Target verify: {args.target_ms:.0f} ms | Memory budget: {args.memory_budget_mb} MB "
+          f"for {args.concurrency} concurrent verifications")
+    print(f"Current: BCRYPT_COST={BCRYPT_COST} ARGON2 t={ARGON2_TIME_COST} "
+          f"m={ARGON2_MEMORY_COST} KiB p={ARGON2_PARALLELISM}")
+    print("=" * 60)
+
+    bcrypt_result = calibrate_bcrypt(args.target_ms, args.samples)
+    argon2_result = calibrate_argon2(
+        args.target_ms, args.memory_budget_mb, args.concurrency, args.parallelism, args.samples
+    )
+    if argon2_result is None:
+        print(f"[ERROR] No argon2id setting fits {args.memory_budget_mb} MB for {args.concurrency} "
+              f"concurrent verifications - raise --memory-budget-mb or lower --concurrency")
+        return None
+
+    values = {
+        "BCRYPT_COST": bcrypt_result["cost"],
+        "ARGON2_TIME_COST": argon2_result["time_cost"],
+        "ARGON2_MEMORY_COST": argon2_result["memory_kib"],
+        "ARGON2_PARALLELISM": argon2_result["parallelism"],
+    }
+    report = {
+        "target_ms": args.target_ms,
+        "memory_budget_mb": args.memory_budget_mb,
+        "concurrency": args.concurrency,
+        "bcrypt": {**bcrypt_result, "logins_per_sec_per_core": round(1000 / bcrypt_result["verify_ms"], 1)},
+        "argon2id": {
+            **argon2_result,
+            "logins_per_sec_per_core": round(1000 / argon2_result["verify_ms"], 1),
+            "concurrent_memory_mb": argon2_result["memory_kib"] * args.concurrency // 1024,
+        },
+        "config": values,
+    }
+
+    print("=" * 60)
+    print(f"[RESULT] bcrypt   cost={values['BCRYPT_COST']:<3} verify {bcrypt_result['verify_ms']:8.2f} ms "
+          f"-> {report['bcrypt']['logins_per_sec_per_core']:8.1f} logins/sec/core")
+    print(f"[RESULT] argon2id t={values['ARGON2_TIME_COST']} m={values['ARGON2_MEMORY_COST'] // 1024} MiB "
+          f"p={values['ARGON2_PARALLELISM']} verify {argon2_result['verify_ms']:8.2f} ms "
+          f"-> {report['argon2id']['logins_per_sec_per_core']:8.1f} logins/sec/core "
+          f"({report['argon2id']['concurrent_memory_mb']} MB at {args.concurrency} concurrent)")
+
+    if not args.dry_run:
+        write_env(Path(args.env_file), values)
+        print(f"[SUCCESS] Wrote {', '.join(values)} to {args.env_file}")
+    print("=" * 60)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Calibrate bcrypt/argon2id parameters for this host")
+    parser.add_argument("--target-ms", type=float, default=250.0, help="max verify latency per login")
+    parser.add_argument("--memory-budget-mb", type=int, default=1024,
+                        help="total argon2 memory for all concurrent verifications")
+    parser.add_argument("--concurrency", type=int, default=HASH_WORKERS,
+                        help="concurrent verifications (defaults to HASH_WORKERS)")
+    parser.add_argument("--parallelism", type=int, default=ARGON2_PARALLELISM)
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--env-file", default=str(ENV_FILE))
+    parser.add_argument("--dry-run", action="store_true", help="report only, do not write .env")
+    parser.add_argument("--json", action="store_true", help="print the result as JSON")
+    args = parser.parse_args()
+
+    # With --json only the report goes to stdout, progress goes to stderr
+    with contextlib.redirect_stdout(sys.stderr) if args.json else contextlib.nullcontext():
+        report = calibrate(args)
+    if report is None:
+        sys.exit(1)
+    if args.json:
+        print(json.dumps(report, indent=2))
@@ -8,7 +8,10 @@ from pathlib import Path
 # Add app folder to path
 sys.path.insert(0, str(Path(__file__).parent / 'app'))
 
-from app.database import Base, engine
+from sqlalchemy import inspect, text
+
+from app.database import Base, engine, SessionLocal
+from app.attempt_stats import backfill_rollups
 
 print("=" * 60)
 print("Creating database tables...")
@@ -17,7 +20,26 @@ print("=" * 60)
 # Create all tables defined in Base
 Base.metadata.create_all(bind=engine)
 
+# Upgrade: /api/stats reads attempt_rollups now, the old GROUP BY indexes only slow down inserts
+inspector = inspect(engine)
+with engine.begin() as conn:
+    for table in inspector.get_table_names():
+        for index in inspector.get_indexes(table):
+            if table.startswith("attempt_logs") and index["name"].endswith("_stats"):
+                conn.execute(text(f'DROP INDEX IF EXISTS "{index["name"]}"'))
+                print(f"   Dropped unused index {index['name']}")
+
+# Upgrade: build rollups for attempt_logs rows written before rollups existed
+db = SessionLocal()
+try:
+    backfilled = backfill_rollups(db)
+finally:
+    db.close()
+if backfilled:
+    print(f"   Backfilled attempt_rollups from {backfilled} attempt_logs rows")
+
 print("[SUCCESS] Tables created successfully!")
 print("   - users")
-print("   - attempt_logs")
+print("   - attempt_logs (attempt_logs_<day|experiment> partitions are created on first write)")
+print("   - attempt_rollups")
 print("=" * 60)
\ No newline at end of file
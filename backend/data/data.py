@@ -1,100 +1,211 @@
 import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
 import json
 import glob
 import os
 import matplotlib as mpl
 
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
 # --- הגדרות נתיב ---
-LOGS_FOLDER = 'backend/data' 
+LOGS_FOLDER = 'backend/data'
+CACHE_FOLDER = os.path.join(LOGS_FOLDER, '.cache')
+CHUNK_LINES = 100_000
+PERCENTILES = [0.5, 0.9, 0.95, 0.99]
+ROLLING_WINDOW = '5s'
 
-# 1. טעינה ואיחוד
-all_files = glob.glob(os.path.join(LOGS_FOLDER, "*.log"))
-if not all_files:
-    print("No logs found!")
-    exit()
+COLUMNS = ['timestamp', 'username', 'hash_mode', 'protection_flags', 'result', 'latency_ms']
+CATEGORY_COLUMNS = ['username', 'hash_mode', 'protection_flags', 'result']
 
-li = []
-for filename in all_files:
-    scenario_name = os.path.basename(filename).replace('.log', '')
-    with open(filename, 'r', encoding='utf-8') as f:
+
+# Typed columnar frame from a chunk of parsed records
+def _chunk_frame(timestamps, usernames, hash_modes, protections, results, latencies):
+    frame = pd.DataFrame({
+        'timestamp': pd.to_datetime(np.array(timestamps), format='ISO8601'),
+        'username': usernames,
+        'hash_mode': hash_modes,
+        'protection_flags': protections,
+        'result': results,
+        'latency_ms': np.array(latencies, dtype=np.float64),
+    })
+    for column in CATEGORY_COLUMNS:
+        frame[column] = frame[column].astype('category')
+    return frame
+
+
+# Parse one JSONL log file in chunks, never holding a list of dicts
+def parse_log_file(filename):
+    chunks = []
+    columns = ([], [], [], [], [], [])
+    with open(filename, 'rb') as f:
         for line in f:
-            line = line.strip()
-            if line:
-                try:
-                    data = json.loads(line)
-                    data['scenario'] = scenario_name
-                    li.append(data)
-                except: continue
-
-df = pd.DataFrame(li)
-df['timestamp'] = pd.to_datetime(df['timestamp'])
-
-# 2. עיצוב וצבעים
-scenarios = sorted(df['scenario'].unique())
-cmap = mpl.colormaps.get_cmap('tab10')
-color_dict = {scenario: cmap(i % 10) for i, scenario in enumerate(scenarios)}
-
-# 3. בניית הדאשבורד
-fig = plt.figure(figsize=(18, 18))
-gs = fig.add_gridspec(4, 1, height_ratios=[1, 1, 1, 1.2])
-
-# --- שורה 1: Latency ---
-sub_gs0 = gs[0].subgridspec(1, 2, wspace=0.3)
-ax1 = fig.add_subplot(sub_gs0[0])
-ax2 = fig.add_subplot(sub_gs0[1])
-
-stats = df.groupby('scenario')['latency_ms'].agg(['mean', 'median'])
-for i, scenario in enumerate(stats.index):
-    ax1.bar(i - 0.2, stats.loc[scenario, 'mean'], width=0.4, color=color_dict[scenario])
-    ax1.bar(i + 0.2, stats.loc[scenario, 'median'], width=0.4, color=color_dict[scenario], alpha=0.5)
-ax1.set_xticks(range(len(stats)))
-ax1.set_xticklabels(stats.index, rotation=20, ha='right', fontsize=9)
-ax1.set_title('Avg vs Median Latency', fontsize=12, pad=10) # כותרת קטנה יותר
-
-# --- שורה 2: Throughput ---
-for scenario in scenarios:
-    subset = df[df['scenario'] == scenario].resample('1s', on='timestamp').count()
-    ax2.plot(subset.index, subset['username'], label=scenario, color=color_dict[scenario])
-ax2.set_title('Throughput (Requests/Sec)', fontsize=12, pad=10)
-ax2.legend(fontsize='8', ncol=2)
-
-# --- שורה 3: Rolling Trend ---
-ax3 = fig.add_subplot(gs[1])
-df_sorted = df.sort_values('timestamp').set_index('timestamp')
-for scenario in scenarios:
-    group = df_sorted[df_sorted['scenario'] == scenario]
-    group['latency_ms'].rolling(window='5s').mean().plot(ax=ax3, label=scenario, color=color_dict[scenario], linewidth=2)
-ax3.set_title('Performance Trend (5s Smoothed)', fontsize=12, pad=10)
-ax3.set_ylabel('ms', fontsize=10)
-ax3.tick_params(labelsize=9)
-
-# --- שורה 4: טבלה ---
-ax4 = fig.add_subplot(gs[2])
-ax4.axis('off')
-
-success_df = df[df['result'] == 'success']
-if not success_df.empty:
-    summary = success_df.groupby('scenario').agg({
-        'result': 'count',
-        'latency_ms': 'mean',
-        'username': lambda x: ", ".join(x.unique()[:3]) + ("..." if len(x.unique()) > 3 else "")
-    }).reset_index()
-    summary.columns = ['Scenario', 'Successes', 'Avg Latency', 'Involved Users']
-    summary['Avg Latency'] = summary['Avg Latency'].map('{:.2f} ms'.format)
-
-    table = ax4.table(cellText=summary.values, colLabels=summary.columns, loc='center', cellLoc='left')
-    table.auto_set_font_size(False)
-    table.set_fontsize(10) # גופן טבלה קטן יותר
-    table.scale(1, 2.2) 
-
-    for (row, col), cell in table.get_celld().items():
-        if row == 0:
-            cell.set_text_props(weight='bold')
-            cell.set_facecolor('#f0f0f0')
-else:
-    ax4.text(0.5, 0.5, "No success records found", ha='center')
-
-# פקודת הרווחים המאוזנת
-plt.subplots_adjust(top=0.92, bottom=0.08, hspace=0.6, left=0.1, right=0.95)
-plt.show()
\ No newline at end of file
+            try:
+                data = _loads(line)
+                row = (data['timestamp'], data.get('username'), data.get('hash_mode'),
+                       data.get('protection_flags'), data.get('result'), float(data['latency_ms']))
+            except (ValueError, KeyError, TypeError):
+                continue
+            for column, value in zip(columns, row):
+                column.append(value)
+            if len(columns[0]) >= CHUNK_LINES:
+                chunks.append(_chunk_frame(*columns))
+                columns = ([], [], [], [], [], [])
+    if columns[0] or not chunks:
+        chunks.append(_chunk_frame(*columns))
+    frame = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+    for column in CATEGORY_COLUMNS:
+        frame[column] = frame[column].astype('category')
+    return frame
+
+
+# Parsed file from the Feather cache when its mtime matches, otherwise parse and cache
+def load_log_file(filename):
+    scenario_name = os.path.basename(filename).replace('.log', '')
+    mtime = os.stat(filename).st_mtime_ns
+    cache_path = os.path.join(CACHE_FOLDER, f'{scenario_name}.{mtime}.feather')
+
+    if os.path.exists(cache_path):
+        try:
+            return pd.read_feather(cache_path)
+        except Exception:
+            pass
+
+    frame = parse_log_file(filename)
+    try:
+        os.makedirs(CACHE_FOLDER, exist_ok=True)
+        for stale in glob.glob(os.path.join(CACHE_FOLDER, f'{glob.escape(scenario_name)}.*.feather')):
+            os.remove(stale)
+        frame.to_feather(cache_path)
+    except (ImportError, OSError) as e:
+        print(f"[WARN] Cache disabled for {scenario_name}: {e}")
+    return frame
+
+
+def load_logs(folder=LOGS_FOLDER):
+    frames = []
+    for filename in sorted(glob.glob(os.path.join(folder, "*.log"))):
+        frame = load_log_file(filename)
+        frame['scenario'] = os.path.basename(filename).replace('.log', '')
+        frames.append(frame)
+    if not frames:
+        return None
+    df = pd.concat(frames, ignore_index=True)
+    df['scenario'] = df['scenario'].astype('category')
+    for column in CATEGORY_COLUMNS:
+        df[column] = df[column].astype('category')
+    return df
+
+
+# Everything per scenario from one sort and one groupby pass
+def analyze(df):
+    df = df.sort_values(['scenario', 'timestamp'], kind='stable')
+    stats = {}
+    throughput = {}
+    trend = {}
+    successes = {}
+
+    for scenario, group in df.groupby('scenario', observed=True, sort=True):
+        latency = group['latency_ms'].to_numpy()
+        quantiles = np.quantile(latency, PERCENTILES)
+        span = (group['timestamp'].iloc[-1] - group['timestamp'].iloc[0]).total_seconds()
+        stats[scenario] = {
+            'count': len(latency),
+            'mean': latency.mean(),
+            'median': quantiles[0],
+            **{f'p{int(q * 100)}': value for q, value in zip(PERCENTILES[1:], quantiles[1:])},
+            'throughput': len(latency) / span if span > 0 else float(len(latency)),
+        }
+
+        indexed = group.set_index('timestamp')
+        throughput[scenario] = indexed['latency_ms'].resample('1s').count()
+        trend[scenario] = indexed['latency_ms'].rolling(window=ROLLING_WINDOW).mean()
+
+        success = group[group['result'] == 'success']
+        if not success.empty:
+            users = success['username'].astype(str).unique()
+            successes[scenario] = {
+                'Successes': len(success),
+                'Avg Latency': success['latency_ms'].mean(),
+                'Involved Users': ", ".join(users[:3]) + ("..." if len(users) > 3 else ""),
+            }
+
+    return pd.DataFrame.from_dict(stats, orient='index'), throughput, trend, successes
+
+
+def plot_dashboard(stats, throughput, trend, successes):
+    # 2. עיצוב וצבעים
+    scenarios = list(stats.index)
+    cmap = mpl.colormaps.get_cmap('tab10')
+    color_dict = {scenario: cmap(i % 10) for i, scenario in enumerate(scenarios)}
+
+    # 3. בניית הדאשבורד
+    fig = plt.figure(figsize=(18, 18))
+    gs = fig.add_gridspec(4, 1, height_ratios=[1, 1, 1, 1.2])
+
+    # --- שורה 1: Latency ---
+    sub_gs0 = gs[0].subgridspec(1, 2, wspace=0.3)
+    ax1 = fig.add_subplot(sub_gs0[0])
+    ax2 = fig.add_subplot(sub_gs0[1])
+
+    for i, scenario in enumerate(scenarios):
+        ax1.bar(i - 0.2, stats.loc[scenario, 'mean'], width=0.4, color=color_dict[scenario])
+        ax1.bar(i + 0.2, stats.loc[scenario, 'median'], width=0.4, color=color_dict[scenario], alpha=0.5)
+    ax1.set_xticks(range(len(stats)))
+    ax1.set_xticklabels(stats.index, rotation=20, ha='right', fontsize=9)
+    ax1.set_title('Avg vs Median Latency', fontsize=12, pad=10) # כותרת קטנה יותר
+
+    # --- שורה 2: Throughput ---
+    for scenario in scenarios:
+        series = throughput[scenario]
+        ax2.plot(series.index, series.values, label=scenario, color=color_dict[scenario])
+    ax2.set_title('Throughput (Requests/Sec)', fontsize=12, pad=10)
+    ax2.legend(fontsize='8', ncol=2)
+
+    # --- שורה 3: Rolling Trend ---
+    ax3 = fig.add_subplot(gs[1])
+    for scenario in scenarios:
+        trend[scenario].plot(ax=ax3, label=scenario, color=color_dict[scenario], linewidth=2)
+    ax3.set_title(f'Performance Trend ({ROLLING_WINDOW} Smoothed)', fontsize=12, pad=10)
+    ax3.set_ylabel('ms', fontsize=10)
+    ax3.tick_params(labelsize=9)
+
+    # --- שורה 4: טבלה ---
+    ax4 = fig.add_subplot(gs[2])
+    ax4.axis('off')
+
+    if successes:
+        summary = pd.DataFrame.from_dict(successes, orient='index').rename_axis('Scenario').reset_index()
+        summary['Avg Latency'] = summary['Avg Latency'].map('{:.2f} ms'.format)
+
+        table = ax4.table(cellText=summary.values, colLabels=summary.columns, loc='center', cellLoc='left')
+        table.auto_set_font_size(False)
+        table.set_fontsize(10) # גופן טבלה קטן יותר
+        table.scale(1, 2.2)
+
+        for (row, col), cell in table.get_celld().items():
+            if row == 0:
+                cell.set_text_props(weight='bold')
+                cell.set_facecolor('#f0f0f0')
+    else:
+        ax4.text(0.5, 0.5, "No success records found", ha='center')
+
+    # פקודת הרווחים המאוזנת
+    plt.subplots_adjust(top=0.92, bottom=0.08, hspace=0.6, left=0.1, right=0.95)
+    plt.show()
+
+
+if __name__ == "__main__":
+    # 1. טעינה ואיחוד
+    df = load_logs()
+    if df is None or df.empty:
+        print("No logs found!")
+        exit()
+
+    stats, throughput, trend, successes = analyze(df)
+    print(stats.round(2).to_string())
+    plot_dashboard(stats, throughput, trend, successes)
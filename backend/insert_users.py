@@ -1,24 +1,76 @@
 """
 Insert users from JSON
+Streams the JSON array, hashes passwords in parallel and bulk-inserts in batches
 """
 import sys
+import os
 import json
+import time
+import argparse
+from itertools import islice, repeat
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
 sys.path.insert(0, str(Path(__file__).parent / 'app'))
 
+from sqlalchemy import insert
+
 from app.database import SessionLocal, User
 from app.config import HASH_MODE
 from app.hash_utils import hash_password
+from app.logger import configure_worker_logging
 
 USERS_JSON_PATH = Path(__file__).parent / 'data' / 'users.json'
+DEFAULT_BATCH_SIZE = 1000
+READ_CHUNK_SIZE = 64 * 1024
+
+
+# Yield objects from a top-level JSON array without loading the whole file
+def iter_users_from_json(path: Path):
+    decoder = json.JSONDecoder()
+    buffer = ""
+    started = False
+
+    with open(path, 'r') as f:
+        while True:
+            chunk = f.read(READ_CHUNK_SIZE)
+            buffer += chunk
+            pos = 0
+
+            while True:
+                # Skip whitespace, separators and the array brackets
+                while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                    pos += 1
+                if not started and pos < len(buffer):
+                    if buffer[pos] != "[":
+                        raise json.JSONDecodeError("Expected JSON array", buffer, pos)
+                    started = True
+                    pos += 1
+                    continue
+                if pos < len(buffer) and buffer[pos] == "]":
+                    return
+                if pos >= len(buffer):
+                    break
+                try:
+                    obj, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if not chunk:
+                        raise
+                    break  # object spans the chunk boundary - read more
+                yield obj
+                pos = end
+
+            buffer = buffer[pos:]
+            if not chunk:
+                if buffer.strip():
+                    raise json.JSONDecodeError("Unterminated JSON array", buffer, 0)
+                return
 
 
 def load_users_from_json():
     try:
-        with open(USERS_JSON_PATH, 'r') as f:
-            return json.load(f)
+        yield from iter_users_from_json(USERS_JSON_PATH)
     except FileNotFoundError:
         print(f"[ERROR] File not found: {USERS_JSON_PATH}")
         sys.exit(1)
@@ -27,44 +79,90 @@ def load_users_from_json():
         sys.exit(1)
 
 
-def insert_users():
+# Split an iterable into lists of at most size items
+def batched(iterable, size: int):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+# Hash a batch across the pool - map submits every task right away, the results are collected later
+def submit_batch(pool, batch: list, workers: int):
+    chunksize = max(1, len(batch) // (workers * 4))
+    return pool.map(hash_password, (u["password"] for u in batch), repeat(HASH_MODE), chunksize=chunksize)
+
+
+def build_rows(batch: list, hashes) -> list:
+    now = datetime.utcnow()
+    return [
+        {
+            "username": user_data["username"],
+            "password_hash": password_hash,
+            "password_strength": user_data["strength"],
+            "hash_mode": HASH_MODE.value,
+            "failed_attempts": 0,
+            "created_at": now,
+        }
+        for user_data, password_hash in zip(batch, hashes)
+    ]
+
+
+def insert_users(batch_size: int = DEFAULT_BATCH_SIZE, workers: int = None):
+    workers = workers or os.cpu_count() or 1
     db = SessionLocal()
-    users_data = load_users_from_json()
-    
+    total = 0
+    start_time = time.time()
+    hash_wait_seconds = 0.0
+    insert_seconds = 0.0
+
     try:
         print("=" * 60)
         print(f"Current hash mode: {HASH_MODE.value}")
+        print(f"Workers: {workers} | Batch size: {batch_size}")
         print("=" * 60)
+        # Delete and inserts share one transaction - a failure leaves the old users in place
         print("Clearing existing users...")
         db.query(User).delete()
-        db.commit()
-        
-        print(f"Inserting {len(users_data)} users...")
+
+        print("Inserting users...")
         print("=" * 60)
-        
-        for user_data in users_data:
-            password_hash = hash_password(user_data["password"], HASH_MODE)
-            
-            user = User(
-                username=user_data["username"],
-                password_hash=password_hash,
-                password_strength=user_data["strength"],
-                hash_mode=HASH_MODE.value,
-                failed_attempts=0,
-                created_at=datetime.utcnow()
-            )
-            db.add(user)
-            
-            print(f"  [OK] {user_data['username']:15} | {user_data['password']:20} | {user_data['strength']}")
-        
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=configure_worker_logging) as pool:
+            pending = None
+            batches = batched(load_users_from_json(), batch_size)
+            while True:
+                # Queue the next batch's hashes before inserting the current one, so both overlap
+                batch = next(batches, None)
+                submitted = (batch, submit_batch(pool, batch, workers)) if batch else None
+                if pending:
+                    t0 = time.time()
+                    rows = build_rows(*pending)
+                    t1 = time.time()
+                    db.execute(insert(User), rows)
+                    t2 = time.time()
+
+                    hash_wait_seconds += t1 - t0
+                    insert_seconds += t2 - t1
+                    total += len(rows)
+                    rate = total / (t2 - start_time) if t2 > start_time else 0
+                    print(f"  [OK] {total:8} users | {rate:8.1f} users/sec")
+                if not submitted:
+                    break
+                pending = submitted
+
+        t0 = time.time()
         db.commit()
-        
+        insert_seconds += time.time() - t0
+        elapsed = time.time() - start_time
+
         print("=" * 60)
-        print(f"[SUCCESS] Inserted {len(users_data)} users")
+        print(f"[SUCCESS] Inserted {total} users in {elapsed:.2f}s")
         print(f"[INFO] Hash mode: {HASH_MODE.value}")
+        print(f"[INFO] Throughput: {total / elapsed if elapsed else 0:.1f} users/sec")
+        print(f"[INFO] Waiting on hashes: {hash_wait_seconds:.2f}s | Inserting: {insert_seconds:.2f}s")
         print(f"[INFO] Test: user1 / 123456")
         print("=" * 60)
-        
+
     except Exception as e:
         print(f"[ERROR] {e}")
         db.rollback()
@@ -73,4 +171,8 @@ def insert_users():
 
 
 if __name__ == "__main__":
-    insert_users()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Seed users from data/users.json")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    insert_users(batch_size=args.batch_size, workers=args.workers)
@@ -0,0 +1,17 @@
+"""
+Test setup - backend and attack_scripts on the import path, throwaway SQLite files for app state
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT / "backend"))
+sys.path.insert(0, str(ROOT / "attack_scripts"))
+
+# Must be set before app.config is imported
+_state_dir = Path(tempfile.mkdtemp(prefix="password_auth_tests_"))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_state_dir / 'test.db'}")
+os.environ.setdefault("SHARED_STATE_SQLITE_PATH", str(_state_dir / "shared_state.db"))
+os.environ.setdefault("DB_STATEMENT_TIMEOUT_MS", "30000")
@@ -0,0 +1,24 @@
+from attacker import AttackScheduler
+
+RULES = ("suffix",)
+
+
+def test_correct_password_with_wrong_captcha_is_a_find():
+    scheduler = AttackScheduler(["alice", "bob"], rules=RULES)
+    username, password = scheduler.next_attempt()
+
+    found = scheduler.record(username, password, (403, '{"detail": {"error": "captcha_required", '
+                                                       '"message": "Password correct but CAPTCHA invalid"}}'))
+    assert found
+    assert scheduler.cracked == {username: password}
+    assert all(user != username for user, _ in (scheduler.next_attempt() for _ in range(3)))
+
+
+def test_captcha_after_failures_switches_to_captcha_mode():
+    scheduler = AttackScheduler(["alice"], rules=RULES)
+    username, password = scheduler.next_attempt()
+
+    found = scheduler.record(username, password, (403, '{"detail": {"error": "captcha_required", '
+                                                       '"message": "CAPTCHA required after multiple failed attempts"}}'))
+    assert not found
+    assert scheduler.request_args(username)[0] == "captcha"
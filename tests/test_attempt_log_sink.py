@@ -0,0 +1,119 @@
+import json
+import uuid
+from datetime import datetime
+
+import pytest
+
+import app.attempt_log_sink as sink_module
+from app.attempt_log_sink import AttemptLogSink
+from app.attempt_partitions import attempt_partitions
+from app.attempt_stats import AttemptCounters, attempt_counters, merge_rollups
+from app.database import Base, engine, SessionLocal, AttemptRollup
+
+MINUTE = datetime(2024, 5, 1, 12, 30)
+
+
+def record(group_seed: str, result: str = "failed", latency_ms: float = 3.0, second: int = 0) -> dict:
+    return {
+        "timestamp": MINUTE.replace(second=second),
+        "group_seed": group_seed,
+        "username": "alice",
+        "hash_mode": "plain",
+        "protection_flags": "NONE",
+        "result": result,
+        "latency_ms": latency_ms,
+        "ip_address": "127.0.0.1",
+        "stages": None,
+    }
+
+
+def rollups(group_seed: str) -> dict:
+    db = SessionLocal()
+    try:
+        rows = db.query(AttemptRollup).filter(AttemptRollup.group_seed == group_seed)
+        return {row.result: (row.count, row.latency_max_ms) for row in rows}
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def seed():
+    Base.metadata.create_all(bind=engine)
+    return f"sink_{uuid.uuid4().hex[:8]}"
+
+
+@pytest.fixture
+def sink(tmp_path, monkeypatch):
+    monkeypatch.setattr(sink_module, "ATTEMPT_LOG_FILE", str(tmp_path / "attempts.log"))
+    sink = AttemptLogSink(batch_size=10, flush_interval=0.05, max_queue=5)
+    yield sink
+    sink.stop()
+
+
+def test_merge_rollups_adds_to_the_existing_minute_row(seed):
+    for batch in ([record(seed), record(seed, latency_ms=8.0)], [record(seed, "success", 1.0), record(seed)]):
+        db = SessionLocal()
+        try:
+            merge_rollups(db, batch)
+            db.commit()
+        finally:
+            db.close()
+
+    assert rollups(seed) == {"failed": (3, 8.0), "success": (1, 1.0)}
+
+
+def test_counters_only_count_batches_after_seeding():
+    counters = AttemptCounters(refresh_interval=3600)
+    counters.record_batch([record("before")])
+    assert counters.snapshot() == {}
+
+    db = SessionLocal()
+    try:
+        counters.seed(db)
+    finally:
+        db.close()
+    counters.record_batch([record("after"), record("after")])
+
+    key = ("failed", "plain", "NONE", "2024-05-01T12:00:00")
+    assert counters.snapshot()[key] >= 2
+    assert not counters.refresh_due()
+
+
+def test_write_batch_persists_rows_rollups_and_file(seed, sink, tmp_path, monkeypatch):
+    counted = []
+    monkeypatch.setattr(attempt_counters, "record_batch", counted.append)
+    batch = [record(seed), record(seed, "success")]
+
+    sink.write_batch(batch)
+
+    assert rollups(seed) == {"failed": (1, 3.0), "success": (1, 3.0)}
+    assert counted == [batch]
+    sink.stop()
+    lines = (tmp_path / "attempts.log").read_text().splitlines()
+    assert [json.loads(line)["result"] for line in lines] == ["failed", "success"]
+    assert (sink.written, sink.failed, sink.flushes) == (2, 0, 1)
+
+
+def test_failed_flush_is_not_counted(seed, sink, monkeypatch):
+    counted = []
+    monkeypatch.setattr(attempt_counters, "record_batch", counted.append)
+
+    def broken_write(db, batch):
+        raise RuntimeError("database down")
+
+    monkeypatch.setattr(attempt_partitions, "write", broken_write)
+
+    sink.write_batch([record(seed), record(seed)])
+
+    assert rollups(seed) == {}
+    assert counted == []
+    assert (sink.written, sink.failed, sink.file_fallback, sink.failed_flushes) == (0, 2, 2, 1)
+
+
+def test_queued_records_are_flushed_by_stop(seed, sink):
+    for second in range(3):
+        sink.enqueue(record(seed, second=second))
+    sink.stop()
+
+    assert rollups(seed) == {"failed": (3, 3.0)}
+    assert (sink.written, sink.dropped) == (3, 0)
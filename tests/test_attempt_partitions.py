@@ -0,0 +1,90 @@
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import MetaData, Table, func, inspect, select
+
+from app.attempt_partitions import AttemptPartitions, PARTITION_PREFIX
+from app.database import Base, engine, SessionLocal
+
+
+def record(timestamp: datetime, group_seed: str = "seed") -> dict:
+    return {
+        "timestamp": timestamp,
+        "group_seed": group_seed,
+        "username": "alice",
+        "hash_mode": "plain",
+        "protection_flags": "NONE",
+        "result": "failed",
+        "latency_ms": 1.0,
+        "ip_address": "127.0.0.1",
+        "stages": None,
+    }
+
+
+def count_rows(name: str) -> int:
+    with engine.connect() as conn:
+        table = Table(name, MetaData(), autoload_with=conn)
+        return conn.execute(select(func.count()).select_from(table)).scalar()
+
+
+@pytest.fixture
+def partitions():
+    Base.metadata.create_all(bind=engine)
+    partitions = AttemptPartitions("experiment", retention_days=1, retention_interval=3600)
+    yield partitions
+    with engine.begin() as conn:
+        for name in partitions.list_partitions():
+            Table(name, MetaData()).drop(conn)
+
+
+def write(partitions: AttemptPartitions, batch: list, commit: bool = True):
+    db = SessionLocal()
+    try:
+        partitions.write(db, batch)
+        if commit:
+            db.commit()
+        else:
+            db.rollback()
+    finally:
+        db.close()
+
+
+def test_write_creates_one_table_per_partition(partitions):
+    now = datetime.utcnow()
+    seed_a, seed_b = f"a_{uuid.uuid4().hex[:6]}", f"b_{uuid.uuid4().hex[:6]}"
+    write(partitions, [record(now, seed_a), record(now, seed_b), record(now, seed_a)])
+
+    assert count_rows(PARTITION_PREFIX + seed_a) == 2
+    assert count_rows(PARTITION_PREFIX + seed_b) == 1
+
+
+def test_rolled_back_batch_keeps_the_partition_usable(partitions):
+    seed = f"rb_{uuid.uuid4().hex[:6]}"
+    write(partitions, [record(datetime.utcnow(), seed)], commit=False)
+
+    # the table outlives the rolled back inserts, so the next batch can still be written
+    assert inspect(engine).has_table(PARTITION_PREFIX + seed)
+    write(partitions, [record(datetime.utcnow(), seed)])
+    assert count_rows(PARTITION_PREFIX + seed) == 1
+
+
+def test_partition_created_by_another_worker_is_reused(partitions):
+    seed = f"w_{uuid.uuid4().hex[:6]}"
+    other_worker = AttemptPartitions("experiment", retention_days=1, retention_interval=3600)
+    write(other_worker, [record(datetime.utcnow(), seed)])
+
+    write(partitions, [record(datetime.utcnow(), seed)])
+    assert count_rows(PARTITION_PREFIX + seed) == 2
+
+
+def test_day_partitions_past_retention_are_dropped():
+    Base.metadata.create_all(bind=engine)
+    partitions = AttemptPartitions("day", retention_days=2, retention_interval=3600)
+    write(partitions, [record(datetime(2020, 1, 1)), record(datetime(2020, 1, 5))])
+
+    dropped = partitions.drop_expired(now=datetime(2020, 1, 6, 12))
+
+    assert dropped == [PARTITION_PREFIX + "20200101"]
+    assert partitions.list_partitions() == [PARTITION_PREFIX + "20200105"]
+    partitions.drop_expired(now=datetime(2030, 1, 1))
@@ -0,0 +1,117 @@
+import asyncio
+import uuid
+
+import httpx
+import pytest
+from sqlalchemy import delete
+
+import app.helpers as helpers
+from app.attempt_log_sink import attempt_log_sink
+from app.database import Base, engine, async_engine, SessionLocal, User
+from app.helpers import create_jwt_token, _attempt_batch
+from app.main import app
+
+AUDITOR = "auditor"
+
+
+@pytest.fixture
+def usernames():
+    Base.metadata.create_all(bind=engine)
+    names = [f"batch_{uuid.uuid4().hex[:8]}" for _ in range(2)]
+    db = SessionLocal()
+    try:
+        for name in names:
+            db.add(User(username=name, password_hash=f"pw-{name}", password_strength="weak",
+                        hash_mode="plain", failed_attempts=0))
+        db.commit()
+    finally:
+        db.close()
+
+    yield names
+
+    db = SessionLocal()
+    try:
+        db.execute(delete(User).where(User.username.in_(names)))
+        db.commit()
+    finally:
+        db.close()
+
+
+# Attempt records as the sink would receive them: bulk batches and single queued records
+@pytest.fixture
+def written(monkeypatch):
+    monkeypatch.setattr(helpers, "BATCH_LOGIN_AUDITORS", [AUDITOR])
+    batches, single = [], []
+    monkeypatch.setattr(attempt_log_sink, "write_batch", lambda records: batches.append(list(records)))
+    monkeypatch.setattr(attempt_log_sink, "enqueue", single.append)
+    return batches, single
+
+
+# All requests run in one task, like consecutive requests on one keep-alive connection
+def post_all(*requests) -> list:
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return [await client.post(url, json=body, headers=headers or {}) for url, body, headers in requests]
+        finally:
+            # pooled aiosqlite connections belong to this loop
+            await async_engine.dispose()
+    return asyncio.run(run())
+
+
+def batch_request(attempts: list, username: str = AUDITOR) -> tuple:
+    headers = {"Authorization": f"Bearer {create_jwt_token(username)}"} if username else None
+    return "/api/login/batch", {"attempts": attempts}, headers
+
+
+def load_failed_attempts(username: str) -> int:
+    db = SessionLocal()
+    try:
+        return db.query(User).filter(User.username == username).one().failed_attempts
+    finally:
+        db.close()
+
+
+def test_batch_requires_an_auditor_token(written):
+    attempts = [{"username": "nobody", "password": "x"}]
+    missing, other = post_all(batch_request(attempts, username=None), batch_request(attempts, "someone"))
+
+    assert missing.status_code == 401
+    assert other.status_code == 403
+    assert written == ([], [])
+
+
+def test_batch_results_are_committed_and_logged_in_one_write(usernames, written):
+    batches, single = written
+    right, wrong = usernames
+    (response,) = post_all(batch_request([
+        {"username": right, "password": f"pw-{right}"},
+        {"username": wrong, "password": "nope"},
+        {"username": "ghost_" + uuid.uuid4().hex[:8], "password": "x"},
+    ]))
+
+    body = response.json()
+    assert response.status_code == 200
+    assert [r["status_code"] for r in body["results"]] == [200, 401, 401]
+    assert all("token" not in r for r in body["results"])
+    assert load_failed_attempts(wrong) == 1
+
+    # unknown users are not logged; the two real attempts arrive as one bulk write
+    assert single == []
+    assert len(batches) == 1
+    assert [(r["username"], r["result"]) for r in batches[0]] == [(right, "success"), (wrong, "failed")]
+    assert all("password_verify" in r["stages"] for r in batches[0])
+
+
+def test_requests_after_a_batch_queue_their_attempts_again(usernames, written):
+    batches, single = written
+    right, wrong = usernames
+    post_all(
+        batch_request([{"username": right, "password": f"pw-{right}"}]),
+        ("/api/login", {"username": wrong, "password": "nope"}, None),
+    )
+
+    assert _attempt_batch.get() is None
+    assert [len(batch) for batch in batches] == [1]
+    assert [r["username"] for r in single] == [wrong]
@@ -0,0 +1,92 @@
+import itertools
+
+import pytest
+
+from candidates import (
+    Wordlist, BloomFilter, HashSet, RULES, expand, generate_candidates, word_prior
+)
+
+WORDS = ["password", "123456", "qwerty", "dragon", "monkey"]
+
+
+def all_scores(words, rules) -> dict:
+    # best score per candidate over every word that produces it
+    best = {}
+    rule_fns = [RULES[name] for name in rules]
+    for rank, word in enumerate(words):
+        for candidate, weight in expand(word, rule_fns):
+            value = weight * word_prior(rank)
+            if value > best.get(candidate, 0.0):
+                best[candidate] = value
+    return best
+
+
+@pytest.mark.parametrize("rules", [("suffix",), ("case",), ("suffix", "case", "leet")])
+def test_candidates_come_in_descending_score_order(rules):
+    best = all_scores(WORDS, rules)
+    candidates = list(generate_candidates(rules, words=WORDS))
+    scores = [best[c] for c in candidates]
+
+    assert scores == sorted(scores, reverse=True)
+
+
+@pytest.mark.parametrize("dedup", ["hashset", "bloom"])
+def test_candidates_are_unique_and_complete(dedup):
+    rules = ("suffix", "case", "leet")
+    best = all_scores(WORDS, rules)
+    candidates = list(generate_candidates(rules, dedup=dedup, words=WORDS))
+
+    assert len(candidates) == len(set(candidates))
+    assert set(candidates) == set(best)
+
+
+def test_word_prior_and_suffix_weight_interleave():
+    candidates = list(itertools.islice(generate_candidates(("suffix",), words=WORDS), 6))
+
+    # password 1.0, 123456 1/2, qwerty 1/3, dragon 1/4, then password1 (1.0 x 0.2) ties monkey (1/5)
+    assert candidates[:4] == ["password", "123456", "qwerty", "dragon"]
+    assert set(candidates[4:]) == {"password1", "monkey"}
+
+
+def test_duplicate_words_are_yielded_once():
+    candidates = list(generate_candidates((), words=["abc", "abc", "xyz", "abc"]))
+    assert candidates == ["abc", "xyz"]
+
+
+def test_generation_is_lazy():
+    def words():
+        # the first candidate needs the first word plus one word of look-ahead
+        yield WORDS[0]
+        yield WORDS[1]
+        raise AssertionError("read past the words that were needed")
+
+    first = next(generate_candidates(("suffix",), words=words()))
+    assert first == "password"
+
+
+def test_expand_keeps_the_best_weight_for_duplicates():
+    variants = dict(expand("123", [RULES["case"]]))
+    # capitalize/upper of digits is the word itself - only the identity weight remains
+    assert variants == {"123": 1.0}
+
+
+def test_wordlist_reads_lines_without_blank_or_crlf(tmp_path):
+    path = tmp_path / "words.txt"
+    path.write_bytes(b"alpha\r\n\nbeta\ngamma")
+
+    assert list(Wordlist(str(path))) == ["alpha", "beta", "gamma"]
+
+
+def test_empty_wordlist(tmp_path):
+    path = tmp_path / "empty.txt"
+    path.write_bytes(b"")
+
+    assert list(Wordlist(str(path))) == []
+
+
+@pytest.mark.parametrize("dedup_class", [HashSet, BloomFilter])
+def test_dedup_add_reports_new_items(dedup_class):
+    seen = dedup_class()
+    assert seen.add("password")
+    assert not seen.add("password")
+    assert seen.add("password1")
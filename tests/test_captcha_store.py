@@ -0,0 +1,128 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import app.captcha_store as captcha_store_module
+from app.captcha_store import CaptchaStore, MemoryCaptchaBackend, SQLiteCaptchaBackend
+
+TTL = 300.0
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(captcha_store_module, "time", SimpleNamespace(time=clock.time))
+    return clock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path, clock):
+    def make(max_size: int = 100) -> CaptchaStore:
+        if request.param == "memory":
+            backend = MemoryCaptchaBackend(max_size)
+        else:
+            backend = SQLiteCaptchaBackend(str(tmp_path / "captcha.db"), max_size)
+        return CaptchaStore(backend, ttl_seconds=TTL, sweep_interval=3600)
+    return make
+
+
+def test_correct_code_solves_once(make_store):
+    store = make_store()
+    store.issue("alice", "AB12CD", "img")
+
+    assert store.solve("alice", "ab12cd")
+    assert not store.solve("alice", "AB12CD")
+    assert store.get("alice") is None
+    assert store.stats()["solved"] == 1
+
+
+def test_wrong_or_missing_code_keeps_the_challenge(make_store):
+    store = make_store()
+    store.issue("alice", "AB12CD", "img")
+
+    assert not store.solve("alice", "ZZZZZZ")
+    assert not store.solve("alice", "")
+    assert not store.solve("alice", None)
+    assert store.get("alice")["code"] == "AB12CD"
+    assert not store.solve("bob", "AB12CD")
+
+
+def test_reissue_replaces_the_previous_code(make_store):
+    store = make_store()
+    store.issue("alice", "AAAAAA", "img")
+    store.issue("alice", "BBBBBB", "img")
+
+    assert not store.solve("alice", "AAAAAA")
+    assert store.solve("alice", "BBBBBB")
+    assert store.stats()["active"] == 0
+
+
+def test_expired_code_cannot_be_solved(make_store, clock):
+    store = make_store()
+    store.issue("alice", "AB12CD", "img")
+
+    clock.now += TTL
+    assert not store.solve("alice", "AB12CD")
+    stats = store.stats()
+    assert stats["expired"] == 1
+    assert stats["active"] == 0
+
+
+def test_sweep_removes_only_expired_codes(make_store, clock):
+    store = make_store()
+    store.issue("old", "AAAAAA", "img")
+    clock.now += TTL / 2
+    store.issue("new", "BBBBBB", "img")
+
+    clock.now += TTL / 2
+    assert store.sweep() == 1
+    assert store.get("old") is None
+    assert store.get("new")["code"] == "BBBBBB"
+    assert store.stats()["expired"] == 1
+
+
+def test_full_store_evicts_oldest_first(make_store, clock):
+    store = make_store(max_size=2)
+    for i, username in enumerate(["first", "second", "third"]):
+        clock.now += 1
+        store.issue(username, f"CODE0{i}", "img")
+
+    assert store.get("first") is None
+    assert store.get("second") and store.get("third")
+    stats = store.stats()
+    assert stats["active"] == 2
+    assert stats["evicted"] == 1
+    assert stats["issued"] == 3
+
+
+def test_concurrent_solves_consume_the_code_once(make_store):
+    store = make_store()
+    store.issue("alice", "AB12CD", "img")
+    threads = 8
+    barrier = threading.Barrier(threads)
+    results = []
+    lock = threading.Lock()
+
+    def worker():
+        barrier.wait()
+        solved = store.solve("alice", "AB12CD")
+        with lock:
+            results.append(solved)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+    assert results.count(True) == 1
+    assert store.stats()["solved"] == 1
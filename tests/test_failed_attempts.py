@@ -0,0 +1,98 @@
+import threading
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import delete
+
+from app.database import Base, engine, SessionLocal, User
+from app.protection_service import register_failed_attempt
+
+THREADS = 6
+FAILURES_PER_THREAD = 50
+
+
+@pytest.fixture
+def user_id():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = User(username=f"atomic_{uuid.uuid4().hex[:8]}", password_hash="x",
+                    password_strength="weak", hash_mode="plain", failed_attempts=0)
+        db.add(user)
+        db.commit()
+        user_id = user.id
+    finally:
+        db.close()
+
+    yield user_id
+
+    db = SessionLocal()
+    try:
+        db.execute(delete(User).where(User.id == user_id))
+        db.commit()
+    finally:
+        db.close()
+
+
+# One login request: load the row, count the failure, commit
+def fail_once(user_id: int, lock_after: int = None) -> int:
+    db = SessionLocal()
+    try:
+        user = db.get(User, user_id)
+        count = register_failed_attempt(user, db, lock_after)
+        db.commit()
+        return count
+    finally:
+        db.close()
+
+
+def load_user(user_id: int) -> User:
+    db = SessionLocal()
+    try:
+        return db.get(User, user_id)
+    finally:
+        db.close()
+
+
+def test_concurrent_failures_are_all_counted(user_id):
+    counts = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(FAILURES_PER_THREAD):
+            count = fail_once(user_id)
+            with lock:
+                counts.append(count)
+
+    threads = [threading.Thread(target=worker) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    total = THREADS * FAILURES_PER_THREAD
+    assert load_user(user_id).failed_attempts == total
+    # every request saw its own increment - no two read the same value
+    assert sorted(counts) == list(range(1, total + 1))
+
+
+def test_lock_is_set_by_the_update_that_reaches_lock_after(user_id):
+    assert fail_once(user_id, lock_after=3) == 1
+    assert fail_once(user_id, lock_after=3) == 2
+    assert load_user(user_id).locked_until is None
+
+    assert fail_once(user_id, lock_after=3) == 3
+    assert load_user(user_id).locked_until > datetime.utcnow()
+
+
+def test_user_object_reflects_the_new_count_without_reload(user_id):
+    db = SessionLocal()
+    try:
+        user = db.get(User, user_id)
+        register_failed_attempt(user, db)
+        register_failed_attempt(user, db)
+        assert user.failed_attempts == 2
+        db.commit()
+    finally:
+        db.close()
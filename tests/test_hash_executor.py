@@ -0,0 +1,109 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+import app.hash_executor as hash_executor
+from app.config import HashMode
+from app.database import User
+from app.hash_executor import QueueSlots, verify_password_async
+from app.helpers import validate_password_async
+
+
+def test_try_acquire_rejects_once_every_slot_is_taken():
+    slots = QueueSlots(2)
+    assert slots.try_acquire() and slots.try_acquire()
+    assert not slots.try_acquire()
+
+    slots.release()
+    assert slots.try_acquire()
+    assert (slots.pending, slots.rejected) == (2, 1)
+
+
+def test_acquire_waits_for_a_released_slot():
+    slots = QueueSlots(1)
+    slots.try_acquire()
+    threading.Timer(0.05, slots.release).start()
+
+    assert slots.acquire(timeout=2)
+    assert (slots.pending, slots.waited, slots.rejected) == (1, 1, 0)
+
+
+def test_acquire_gives_up_after_the_timeout():
+    slots = QueueSlots(1)
+    slots.try_acquire()
+
+    assert not slots.acquire(timeout=0.05)
+    assert (slots.waited, slots.rejected) == (1, 1)
+
+
+def test_acquire_async_is_woken_by_a_release_from_another_thread():
+    slots = QueueSlots(1)
+    slots.try_acquire()
+
+    async def wait_for_slot():
+        threading.Timer(0.05, slots.release).start()
+        return await slots.acquire_async(timeout=2)
+
+    assert asyncio.run(wait_for_slot())
+    assert (slots.pending, slots.waited, slots.rejected) == (1, 1, 0)
+
+
+def test_acquire_async_times_out_without_blocking_the_loop():
+    slots = QueueSlots(1)
+    slots.try_acquire()
+
+    async def wait_alongside_ticks():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticker = asyncio.create_task(tick())
+        acquired = await slots.acquire_async(timeout=0.1)
+        ticker.cancel()
+        return acquired, ticks
+
+    acquired, ticks = asyncio.run(wait_alongside_ticks())
+    assert not acquired
+    assert ticks > 1
+    assert slots.rejected == 1
+    assert not slots._waiters
+
+
+@pytest.fixture
+def full_queue(monkeypatch):
+    slots = QueueSlots(1)
+    slots.try_acquire()
+    monkeypatch.setattr(hash_executor, "_queue_slots", slots)
+    monkeypatch.setattr(hash_executor, "HASH_QUEUE_TIMEOUT_SECONDS", 0.05)
+    return slots
+
+
+def test_pool_modes_raise_hash_queue_full_when_no_slot_frees_up(full_queue):
+    start = time.monotonic()
+    with pytest.raises(hash_executor.HashQueueFull):
+        asyncio.run(verify_password_async("pw", "hash", HashMode.BCRYPT))
+
+    assert time.monotonic() - start >= 0.05
+    assert full_queue.rejected == 1
+
+
+def test_inline_modes_ignore_a_full_queue(full_queue):
+    assert asyncio.run(verify_password_async("pw", "pw", HashMode.PLAIN))
+    assert full_queue.rejected == 0
+
+
+def test_full_queue_is_a_503_for_the_login(full_queue):
+    user = User(username="busy", password_hash="$2b$12$" + "x" * 53, hash_mode=HashMode.BCRYPT.value)
+
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(validate_password_async(user, "pw"))
+
+    assert e.value.status_code == 503
+    assert e.value.detail["error"] == "Service unavailable"
@@ -0,0 +1,49 @@
+from app.config import HashMode
+from app.hash_utils import parse_hash
+
+BCRYPT_SALT = "abcdefghijklmnopqrstuv"
+BCRYPT_DIGEST = "ABCDEFGHIJKLMNOPQRSTUVWXYZ01234"
+
+
+def test_parse_plain():
+    assert parse_hash("hunter2", HashMode.PLAIN) == {
+        "algorithm": "plain", "cost": None, "salt": None, "digest": "hunter2"
+    }
+
+
+def test_parse_sha256_splits_digest_and_salt():
+    parsed = parse_hash("deadbeef:0123abcd", HashMode.SHA256)
+    assert parsed == {"algorithm": "sha256", "cost": None, "salt": "0123abcd", "digest": "deadbeef"}
+
+
+def test_parse_sha256_without_salt_leaves_fields_empty():
+    parsed = parse_hash("deadbeef", HashMode.SHA256)
+    assert parsed["salt"] is None and parsed["digest"] is None
+
+
+def test_parse_bcrypt_reads_variant_cost_salt_and_digest():
+    parsed = parse_hash(f"$2b$12${BCRYPT_SALT}{BCRYPT_DIGEST}", HashMode.BCRYPT)
+    assert parsed == {
+        "algorithm": "bcrypt-2b",
+        "cost": {"rounds": 12},
+        "salt": BCRYPT_SALT,
+        "digest": BCRYPT_DIGEST,
+    }
+
+
+def test_parse_argon2id_reads_memory_time_and_parallelism():
+    parsed = parse_hash("$argon2id$v=19$m=65536,t=3,p=4$c2FsdHNhbHQ$ZGlnZXN0ZGlnZXN0", HashMode.ARGON2ID)
+    assert parsed == {
+        "algorithm": "argon2id",
+        "cost": {"m": 65536, "t": 3, "p": 4},
+        "salt": "c2FsdHNhbHQ",
+        "digest": "ZGlnZXN0ZGlnZXN0",
+    }
+
+
+def test_parse_malformed_hash_returns_empty_fields():
+    for stored_hash, hash_mode in [("not-a-hash", HashMode.BCRYPT), ("$argon2id$broken", HashMode.ARGON2ID),
+                                   ("$2b$xx$" + BCRYPT_SALT, HashMode.BCRYPT)]:
+        parsed = parse_hash(stored_hash, hash_mode)
+        assert parsed["cost"] is None
+        assert parsed["digest"] is None
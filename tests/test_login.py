@@ -0,0 +1,125 @@
+import asyncio
+import uuid
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import delete
+
+from app.attempt_log_sink import attempt_log_sink
+from app.database import Base, engine, async_engine, SessionLocal, User
+from app.helpers import get_login_db
+from app.main import app
+
+
+@pytest.fixture
+def username():
+    Base.metadata.create_all(bind=engine)
+    name = f"login_{uuid.uuid4().hex[:8]}"
+    db = SessionLocal()
+    try:
+        db.add(User(username=name, password_hash="right", password_strength="weak",
+                    hash_mode="plain", failed_attempts=0))
+        db.commit()
+    finally:
+        db.close()
+
+    yield name
+
+    db = SessionLocal()
+    try:
+        db.execute(delete(User).where(User.username == name))
+        db.commit()
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def queued(monkeypatch):
+    records = []
+    monkeypatch.setattr(attempt_log_sink, "enqueue", records.append)
+    return records
+
+
+def load_user(username: str) -> User:
+    db = SessionLocal()
+    try:
+        return db.query(User).filter(User.username == username).one()
+    finally:
+        db.close()
+
+
+# Run the login dependency around a request that changes failed_attempts, then ends with error (or not)
+def run_login_db(username: str, error: Exception = None):
+    async def request():
+        dependency = get_login_db()
+        db = await dependency.__anext__()
+        user = (await db.execute(User.__table__.select().where(User.username == username))).one()
+        await db.execute(User.__table__.update().where(User.id == user.id).values(failed_attempts=7))
+        try:
+            if error is None:
+                with pytest.raises(StopAsyncIteration):
+                    await dependency.__anext__()
+            else:
+                with pytest.raises(type(error)):
+                    await dependency.athrow(error)
+        finally:
+            await async_engine.dispose()
+    asyncio.run(request())
+
+
+def test_login_db_commits_a_successful_request(username):
+    run_login_db(username)
+    assert load_user(username).failed_attempts == 7
+
+
+@pytest.mark.parametrize("status_code", [401, 403, 423, 429])
+def test_login_db_commits_protection_state_of_rejected_logins(username, status_code):
+    run_login_db(username, HTTPException(status_code=status_code))
+    assert load_user(username).failed_attempts == 7
+
+
+@pytest.mark.parametrize("error", [HTTPException(status_code=500), HTTPException(status_code=503),
+                                   RuntimeError("broken")])
+def test_login_db_rolls_back_failed_requests(username, error):
+    run_login_db(username, error)
+    assert load_user(username).failed_attempts == 0
+
+
+def post_logins(*bodies) -> list:
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return [await client.post("/api/login", json=body) for body in bodies]
+        finally:
+            await async_engine.dispose()
+    return asyncio.run(run())
+
+
+def test_wrong_password_is_counted_and_logged(username, queued):
+    first, second = post_logins({"username": username, "password": "wrong"},
+                                {"username": username, "password": "wrong"})
+
+    assert (first.status_code, second.status_code) == (401, 401)
+    assert load_user(username).failed_attempts == 2
+    assert [(r["username"], r["result"]) for r in queued] == [(username, "failed")] * 2
+    assert "password_verify" in queued[0]["stages"]
+
+
+def test_correct_password_returns_a_token_and_resets_failures(username, queued):
+    wrong, right = post_logins({"username": username, "password": "wrong"},
+                               {"username": username, "password": "right"})
+
+    assert wrong.status_code == 401
+    assert right.status_code == 200
+    assert right.json()["token"]
+    assert load_user(username).failed_attempts == 0
+    assert [r["result"] for r in queued] == ["failed", "success"]
+
+
+def test_unknown_user_is_rejected_without_a_log(queued):
+    (response,) = post_logins({"username": "ghost_" + uuid.uuid4().hex[:8], "password": "x"})
+
+    assert response.status_code == 401
+    assert queued == []
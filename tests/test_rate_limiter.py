@@ -0,0 +1,120 @@
+import pytest
+
+from app.rate_limiter import (
+    EMPTY_STATE, SlidingWindowCounter, TokenBucket, MemoryBackend, SQLiteBackend, RateLimiter
+)
+
+WINDOW = 60.0
+
+
+def consume_many(algorithm, state, now, limit, times):
+    results = []
+    for _ in range(times):
+        state, allowed, retry_after, count = algorithm.consume(state, now, limit, WINDOW)
+        results.append((allowed, retry_after, count))
+    return state, results
+
+
+# ---- sliding window counter ----
+
+def test_sliding_window_allows_up_to_limit_then_waits_for_next_window():
+    state, results = consume_many(SlidingWindowCounter(), EMPTY_STATE, 120.0, 3, 4)
+
+    assert [allowed for allowed, _, _ in results] == [True, True, True, False]
+    assert [count for _, _, count in results[:3]] == [1, 2, 3]
+    assert results[3][1] == 60
+    assert state == (120.0, 3.0, 0.0)
+
+
+def test_sliding_window_weights_previous_window_by_overlap():
+    counter = SlidingWindowCounter()
+    # 4 hits in [60, 120), then half way through [120, 180) half of them still count
+    state = (60.0, 4.0, 0.0)
+
+    state, allowed, _, count = counter.consume(state, 150.0, 3, WINDOW)
+    assert allowed and count == 3
+    assert state == (120.0, 1.0, 4.0)
+
+    state, allowed, retry_after, count = counter.consume(state, 150.0, 3, WINDOW)
+    assert not allowed
+    assert count == 3
+    assert retry_after == 1
+
+    # a second later the previous window weighs less and there is room again
+    _, allowed, _, _ = counter.consume(state, 151.0, 3, WINDOW)
+    assert allowed
+
+
+def test_sliding_window_forgets_windows_older_than_one_window():
+    state = (60.0, 10.0, 10.0)
+    state, allowed, _, count = SlidingWindowCounter().consume(state, 250.0, 3, WINDOW)
+
+    assert allowed and count == 1
+    assert state == (240.0, 1.0, 0.0)
+
+
+def test_sliding_window_retry_after_is_at_least_one_second():
+    state, results = consume_many(SlidingWindowCounter(), EMPTY_STATE, 179.5, 1, 2)
+    assert results[1] == (False, 1, 1)
+
+
+# ---- token bucket ----
+
+def test_token_bucket_starts_full_and_rejects_when_empty():
+    state, results = consume_many(TokenBucket(), EMPTY_STATE, 1000.0, 10, 11)
+
+    assert all(allowed for allowed, _, _ in results[:10])
+    allowed, retry_after, _ = results[10]
+    assert not allowed
+    # 10 per 60s -> one token every 6s
+    assert retry_after == 6
+    assert state[0] == pytest.approx(0.0)
+
+
+def test_token_bucket_refills_at_limit_per_window():
+    bucket = TokenBucket()
+    state, _ = consume_many(bucket, EMPTY_STATE, 1000.0, 10, 10)
+
+    _, allowed, _, _ = bucket.consume(state, 1005.0, 10, WINDOW)
+    assert not allowed
+
+    state, allowed, _, _ = bucket.consume(state, 1007.0, 10, WINDOW)
+    assert allowed
+    assert state[0] == pytest.approx(1 / 6)
+
+
+def test_token_bucket_never_holds_more_than_limit():
+    bucket = TokenBucket()
+    state, _ = consume_many(bucket, EMPTY_STATE, 1000.0, 10, 1)
+
+    state, allowed, _, _ = bucket.consume(state, 1000.0 + 24 * 3600, 10, WINDOW)
+    assert allowed
+    assert state[0] == pytest.approx(9.0)
+
+
+# ---- limiter + backends ----
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackend()
+    return SQLiteBackend(str(tmp_path / "rate_limits.db"))
+
+
+def test_limiter_keys_are_per_ip_and_endpoint(backend):
+    limiter = RateLimiter(SlidingWindowCounter(), backend, window=WINDOW, evict_interval=3600)
+
+    assert limiter.hit("10.0.0.1", "login", 1)[0]
+    assert not limiter.hit("10.0.0.1", "login", 1)[0]
+    assert limiter.hit("10.0.0.2", "login", 1)[0]
+    assert limiter.hit("10.0.0.1", "register", 1)[0]
+    assert backend.size() == 3
+
+
+def test_backend_evicts_only_idle_keys(backend):
+    state_fn = lambda state: (state, True)
+    backend.update("old", 100.0, state_fn)
+    backend.update("new", 500.0, state_fn)
+
+    assert backend.evict_idle(300.0) == 1
+    assert backend.size() == 1
@@ -0,0 +1,50 @@
+import itertools
+
+import pytest
+
+from attacker import AttackScheduler
+from candidates import generate_candidates
+from sharded_runner import merged_progress
+
+RULES = ("suffix",)
+
+
+def take(scheduler: AttackScheduler, count: int) -> list:
+    return [scheduler.next_attempt() for _ in range(count)]
+
+
+@pytest.mark.parametrize("shards", [1, 3, 4])
+def test_shards_split_each_users_candidates_without_overlap(shards):
+    expected = list(itertools.islice(generate_candidates(RULES), 40))
+    per_shard = 40 // shards
+
+    sent = []
+    for shard in range(shards):
+        scheduler = AttackScheduler(["alice"], rules=RULES, shard=shard, shards=shards)
+        sent.extend(password for _, password in take(scheduler, per_shard))
+
+    assert len(sent) == len(set(sent))
+    assert set(sent) == set(expected[:per_shard * shards])
+
+
+def test_resume_point_is_the_slowest_shard():
+    shards = 3
+    schedulers = [AttackScheduler(["alice"], rules=RULES, start={"alice": 4}, shard=shard, shards=shards)
+                  for shard in range(shards)]
+    for scheduler, count in zip(schedulers, [3, 1, 2]):
+        take(scheduler, count)
+
+    progress = [scheduler.progress()["alice"] for scheduler in schedulers]
+    # shard 0 sent 6, 9, 12 / shard 1 sent 4 / shard 2 sent 5, 8 - everything below 7 was sent
+    assert progress == [15, 7, 11]
+    assert merged_progress(progress, shards, 1) == [7]
+
+
+def test_candidate_waiting_for_resend_is_not_progress():
+    scheduler = AttackScheduler(["alice"], rules=RULES, shard=1, shards=2)
+    username, password = scheduler.next_attempt()
+    assert scheduler.progress() == {"alice": 3}
+
+    scheduler.record(username, password, (429, "Too many requests. Try again in 0 seconds."))
+    assert scheduler.progress() == {"alice": 1}
+    assert scheduler.next_attempt() == (username, password)
@@ -0,0 +1,123 @@
+import uuid
+
+import pytest
+from sqlalchemy import delete, event
+
+from app.database import Base, engine, SessionLocal, User
+from app.helpers import find_user
+from app.protection_service import register_failed_attempt
+from app.user_cache import UserCache, MemoryInvalidations, SQLiteInvalidations, user_cache
+
+
+@pytest.fixture
+def username():
+    Base.metadata.create_all(bind=engine)
+    username = f"cached_{uuid.uuid4().hex[:8]}"
+    db = SessionLocal()
+    try:
+        db.add(User(username=username, password_hash="x", password_strength="weak",
+                    hash_mode="plain", failed_attempts=0))
+        db.commit()
+    finally:
+        db.close()
+
+    yield username
+
+    db = SessionLocal()
+    try:
+        db.execute(delete(User).where(User.username == username))
+        db.commit()
+    finally:
+        db.close()
+    user_cache.invalidate(username)
+
+
+@pytest.fixture
+def statements():
+    seen = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    yield seen
+    event.remove(engine, "before_cursor_execute", count)
+
+
+def lookup(username: str) -> User:
+    db = SessionLocal()
+    try:
+        return find_user(db, username)
+    finally:
+        db.close()
+
+
+def test_cache_hit_runs_no_query(username, statements):
+    assert lookup(username).failed_attempts == 0
+    statements.clear()
+
+    user = lookup(username)
+    assert user.username == username
+    assert statements == []
+
+
+def test_committed_failed_attempt_invalidates_the_entry(username):
+    lookup(username)
+
+    db = SessionLocal()
+    try:
+        register_failed_attempt(find_user(db, username), db)
+        db.commit()
+    finally:
+        db.close()
+
+    assert user_cache.get(username) is None
+    assert lookup(username).failed_attempts == 1
+
+
+def test_rolled_back_change_keeps_the_entry(username):
+    lookup(username)
+
+    db = SessionLocal()
+    try:
+        register_failed_attempt(find_user(db, username), db)
+        db.rollback()
+    finally:
+        db.close()
+
+    assert user_cache.get(username)["failed_attempts"] == 0
+
+
+def test_sqlite_invalidation_reaches_other_workers(tmp_path):
+    path = str(tmp_path / "shared.db")
+    worker_a = UserCache(SQLiteInvalidations(path), max_size=10, ttl_seconds=60)
+    worker_b = UserCache(SQLiteInvalidations(path), max_size=10, ttl_seconds=60)
+    user = User(id=1, username="alice", password_hash="x", hash_mode="plain", failed_attempts=0)
+
+    worker_b.put(user, worker_b.version("alice"))
+    assert worker_b.get("alice") is not None
+
+    worker_a.invalidate("alice")
+    assert worker_b.get("alice") is None
+
+
+def test_change_between_load_and_put_is_not_cached():
+    cache = UserCache(MemoryInvalidations(), max_size=10, ttl_seconds=60)
+    user = User(id=1, username="alice", password_hash="x", hash_mode="plain", failed_attempts=0)
+
+    version = cache.version("alice")
+    cache.invalidate("alice")  # another request commits a lockout after our SELECT
+    cache.put(user, version)
+
+    assert cache.get("alice") is None
+
+
+def test_lru_eviction():
+    cache = UserCache(MemoryInvalidations(), max_size=2, ttl_seconds=60)
+    for i, name in enumerate(["a", "b"]):
+        cache.put(User(id=i, username=name, password_hash="x", hash_mode="plain"), 0)
+    cache.get("a")
+    cache.put(User(id=3, username="c", password_hash="x", hash_mode="plain"), 0)
+
+    assert cache.get("b") is None
+    assert cache.get("a") and cache.get("c")